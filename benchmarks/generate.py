@@ -0,0 +1,89 @@
+import codecs
+import os
+import random
+
+# Perfis de árvore sintética: profundidade/leque dos diretórios, arquivos por
+# diretório, faixa de tamanho (bytes) e a mistura de conteúdo de cada perfil
+PROFILES = {
+    'deep': {'depth': 8, 'fanout': 2, 'files_per_dir': 3, 'size': (500, 4000)},
+    'wide': {'depth': 1, 'fanout': 200, 'files_per_dir': 10, 'size': (500, 4000)},
+    'tiny': {'depth': 2, 'fanout': 10, 'files_per_dir': 50, 'size': (20, 200)},
+    'huge': {'depth': 1, 'fanout': 2, 'files_per_dir': 2, 'size': (1_500_000, 4_000_000)},
+    'mixed': {'depth': 3, 'fanout': 4, 'files_per_dir': 8, 'size': (200, 8000), 'encodings': True,
+              'binary_ratio': 0.1, 'crlf_ratio': 0.2},
+    'ignored': {'depth': 2, 'fanout': 3, 'files_per_dir': 5, 'size': (500, 4000),
+                'ignored_dirs': {'node_modules': 3000, '.git': 1000, 'dist': 500}},
+}
+
+_EXTENSIONS = ['.py', '.py', '.py', '.js', '.ts', '.md', '.json', '.yaml']
+_ENCODINGS = ['utf-8', 'utf-8', 'utf-8', 'utf-8-sig', 'latin-1', 'cp1252', 'utf-16']
+_WORDS = ['def', 'return', 'class', 'import', 'self', 'value', 'config', 'path', 'for', 'in', 'if', 'else',
+          'ação', 'configuração', 'índice', 'não', '“aspas”', '€']
+
+
+def _text(rng, size, encoding='utf-8', crlf=False):
+    lines = []
+    total = 0
+    while total < size:
+        indent = '    ' * rng.randint(0, 3)
+        words = rng.choices(_WORDS if encoding != 'latin-1' else _WORDS[:-2], k=rng.randint(3, 12))
+        line = indent + ' '.join(words)
+        lines.append(line)
+        total += len(line) + 1
+    newline = '\r\n' if crlf else '\n'
+    text = newline.join(lines) + newline
+    if encoding == 'utf-8-sig':
+        return codecs.BOM_UTF8 + text.encode('utf-8')
+    if encoding == 'utf-16':
+        return text.encode('utf-16')
+    return text.encode(encoding, errors='replace')
+
+
+def _binary(rng, size):
+    return b'\x89PNG\r\n\x1a\n' + bytes(rng.getrandbits(8) for _ in range(size))
+
+
+def generate_tree(root, profile, seed=0, scale=1.0):
+    """Gera a árvore de um perfil em `root` (reproduzível pela `seed`).
+
+    Devolve a lista de arquivos gerados fora dos diretórios ignorados e o
+    total de bytes deles, usados como referência de throughput.
+    """
+    spec = PROFILES[profile]
+    rng = random.Random(f"{profile}:{seed}")
+    files_per_dir = max(1, round(spec['files_per_dir'] * scale))
+    low, high = spec['size']
+    files = []
+    total_bytes = 0
+
+    def fill(dir_path, depth):
+        nonlocal total_bytes
+        os.makedirs(dir_path, exist_ok=True)
+        for index in range(files_per_dir):
+            size = rng.randint(low, high)
+            if rng.random() < spec.get('binary_ratio', 0):
+                path = os.path.join(dir_path, f"asset_{index}.dat")
+                data = _binary(rng, min(size, 4096))
+            else:
+                encoding = rng.choice(_ENCODINGS) if spec.get('encodings') else 'utf-8'
+                crlf = rng.random() < spec.get('crlf_ratio', 0)
+                path = os.path.join(dir_path, f"file_{index}{rng.choice(_EXTENSIONS)}")
+                data = _text(rng, size, encoding, crlf)
+            with open(path, 'wb') as f:
+                f.write(data)
+            files.append(path)
+            total_bytes += len(data)
+        if depth < spec['depth']:
+            for child in range(spec['fanout']):
+                fill(os.path.join(dir_path, f"pkg_{child}"), depth + 1)
+
+    fill(root, 0)
+
+    for name, count in spec.get('ignored_dirs', {}).items():
+        ignored_root = os.path.join(root, name)
+        for index in range(max(1, round(count * scale))):
+            dir_path = os.path.join(ignored_root, f"lib_{index // 100}")
+            os.makedirs(dir_path, exist_ok=True)
+            with open(os.path.join(dir_path, f"mod_{index}.js"), 'wb') as f:
+                f.write(_text(rng, rng.randint(low, high)))
+    return files, total_bytes
@@ -0,0 +1,212 @@
+"""Benchmarks dos três modos de merge sobre árvores sintéticas.
+
+Uso (a partir da raiz do repositório):
+
+    python -m benchmarks.run                       # todos os perfis, compara com benchmarks/baseline.json
+    python -m benchmarks.run --profiles tiny huge  # só alguns perfis
+    python -m benchmarks.run --save-baseline       # grava os resultados atuais como baseline
+    python -m benchmarks.run --latency 5 --io-mode thread async  # 5 ms por operação de I/O, os dois modos
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from functools import partial
+
+from benchmarks.generate import PROFILES, generate_tree
+from benchmarks.slowfs import slow_filesystem
+from src.constants import IO_MODES
+from src.merge import merge_files_from_directory, merge_files_from_list, process_subfolders
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+IGNORE_DIRS = ['.git', 'node_modules', 'dist', '_kslist']
+# Quanto um caso pode ficar mais lento (ou usar mais memória) que o baseline antes de ser regressão
+DEFAULT_TOLERANCE = 0.25
+
+
+def _run_directory(root, files, paths_only, **options):
+    output_path = os.path.join(root, '_kslist', 'bench.md')
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    return merge_files_from_directory(root, output_path, ignore_dirs=IGNORE_DIRS, paths_only=paths_only, **options)
+
+
+def _run_subfolders(root, files, paths_only, **options):
+    results = process_subfolders(root, ignore_dirs=IGNORE_DIRS, paths_only=paths_only, **options)
+    return sum(result['files'] or 0 for result in results)
+
+
+def _run_list(root, files, paths_only, **options):
+    output_path = os.path.join(root, '_kslist', 'bench_list.md')
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    return merge_files_from_list(files, output_path, paths_only=paths_only, **options)
+
+
+MODES = {
+    'directory': _run_directory,
+    'subfolders': _run_subfolders,
+    'list': _run_list,
+}
+
+
+def _measure(func, root, files, paths_only, repeat, latency=0.0, **options):
+    """Tempo (mediana de `repeat` execuções) e pico de memória (execução extra com tracemalloc).
+
+    Com `latency` (s), cada operação de I/O sob `root` é atrasada (ver slowfs.py).
+    """
+    slow = partial(slow_filesystem, root, latency) if latency else contextlib.nullcontext
+    timings = []
+    file_count = 0
+    for _ in range(repeat):
+        shutil.rmtree(os.path.join(root, '_kslist'), ignore_errors=True)
+        with contextlib.redirect_stdout(io.StringIO()), slow():
+            started = time.perf_counter()
+            file_count = func(root, files, paths_only, **options)
+            timings.append(time.perf_counter() - started)
+
+    shutil.rmtree(os.path.join(root, '_kslist'), ignore_errors=True)
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()), slow():
+            func(root, files, paths_only, **options)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return statistics.median(timings), peak, file_count
+
+
+def _case_name(profile, mode, fmt, io_mode, latency):
+    """`perfil/modo/formato`, com sufixo para o modo de I/O e a latência simulada quando não são os padrões"""
+    case = f"{profile}/{mode}/{fmt}"
+    if io_mode != 'thread':
+        case += f"@{io_mode}"
+    if latency:
+        case += f"+{latency * 1000:g}ms"
+    return case
+
+
+def run_benchmarks(profiles, modes, workdir, repeat=3, scale=1.0, seed=0, io_modes=('thread',), latency=0.0):
+    results = []
+    for profile in profiles:
+        root = os.path.join(workdir, profile)
+        shutil.rmtree(root, ignore_errors=True)
+        print(f"🏗️ Gerando árvore '{profile}'...", file=sys.stderr)
+        files, total_bytes = generate_tree(root, profile, seed=seed, scale=scale)
+        for mode, io_mode, paths_only in itertools.product(modes, io_modes, (True, False)):
+            seconds, peak, file_count = _measure(MODES[mode], root, files, paths_only, repeat, latency,
+                                                 io_mode=io_mode)
+            fmt = 'paths' if paths_only else 'full'
+            result = {
+                'case': _case_name(profile, mode, fmt, io_mode, latency),
+                'files': file_count,
+                'mb': total_bytes / 1024 / 1024,
+                'seconds': seconds,
+                'files_per_s': file_count / seconds if seconds else 0.0,
+                'mb_per_s': (total_bytes / 1024 / 1024) / seconds if seconds and not paths_only else None,
+                'peak_mb': peak / 1024 / 1024,
+            }
+            results.append(result)
+            print(f"⏱️ {result['case']}: {seconds:.3f}s", file=sys.stderr)
+    return results
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Devolve as regressões: casos mais lentos ou com mais memória que o baseline além da tolerância"""
+    previous = {result['case']: result for result in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        base = previous.get(result['case'])
+        if base is None:
+            continue
+        for key in ('seconds', 'peak_mb'):
+            if base[key] and result[key] > base[key] * (1 + tolerance):
+                regressions.append((result['case'], key, base[key], result[key]))
+    return regressions
+
+
+def print_report(results, baseline=None):
+    previous = {result['case']: result for result in (baseline or {}).get('results', [])}
+    header = f"{'caso':<32} {'arquivos':>8} {'tempo (s)':>10} {'arq/s':>10} {'MB/s':>8} {'pico MB':>8} {'vs base':>8}"
+    print(header)
+    print('-' * len(header))
+    for result in results:
+        base = previous.get(result['case'])
+        delta = f"{(result['seconds'] / base['seconds'] - 1) * 100:+.0f}%" if base and base['seconds'] else '-'
+        mb_per_s = f"{result['mb_per_s']:.1f}" if result['mb_per_s'] is not None else '-'
+        print(f"{result['case']:<32} {result['files']:>8} {result['seconds']:>10.3f} {result['files_per_s']:>10.0f} "
+              f"{mb_per_s:>8} {result['peak_mb']:>8.1f} {delta:>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run', description=__doc__.splitlines()[0])
+    parser.add_argument('--profiles', nargs='+', choices=sorted(PROFILES), default=sorted(PROFILES))
+    parser.add_argument('--modes', nargs='+', choices=sorted(MODES), default=list(MODES))
+    parser.add_argument('--repeat', type=int, default=3, help="execuções por caso (vale a mediana)")
+    parser.add_argument('--scale', type=float, default=1.0, help="multiplica a quantidade de arquivos por diretório")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--io-mode', nargs='+', choices=IO_MODES, default=['thread'], dest='io_modes',
+                        help="modo(s) de I/O medidos (chave io_mode)")
+    parser.add_argument('--latency', type=float, default=0.0, metavar='MS',
+                        help="latência simulada (ms) em cada listagem, stat e leitura (ver benchmarks/slowfs.py)")
+    parser.add_argument('--workdir', help="onde gerar as árvores (padrão: diretório temporário apagado ao final)")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help="grava os resultados como novo baseline")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--json', metavar='ARQUIVO', help="grava também os resultados em JSON")
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='ks-bench-')
+    try:
+        results = run_benchmarks(args.profiles, args.modes, workdir, args.repeat, args.scale, args.seed,
+                                 args.io_modes, args.latency / 1000)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    print_report(results, baseline)
+    data = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'scale': args.scale,
+        'seed': args.seed,
+        'results': results,
+    }
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        print(f"\n💾 Baseline salvo em {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print("\nℹ️ Nenhum baseline encontrado; use --save-baseline para criar um.")
+        return 0
+    if baseline.get('scale') != args.scale or baseline.get('seed') != args.seed:
+        print("\n⚠️ Baseline gerado com outra escala/seed; comparação pode não ser válida.")
+    regressions = compare(results, baseline, args.tolerance)
+    if not regressions:
+        print(f"\n✅ Nenhuma regressão acima de {args.tolerance:.0%} em relação ao baseline.")
+        return 0
+    print(f"\n❌ {len(regressions)} regressão(ões) acima de {args.tolerance:.0%}:")
+    for case, key, before, after in regressions:
+        print(f"   {case} — {key}: {before:.3f} → {after:.3f}")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""Sistema de arquivos "lento" para medir o modo de I/O assíncrono localmente.
+
+Simula um compartilhamento de rede/WSL acrescentando uma latência fixa a cada
+listagem, stat e abertura para leitura de paths dentro de uma raiz:
+
+    with slow_filesystem(root, latency=0.005):
+        merge_files_from_directory(root, output_path, io_mode='async')
+
+A espera usa `time.sleep`, que libera o GIL, então chamadas simultâneas se
+sobrepõem como num servidor remoto. Aberturas para escrita não são
+atrasadas.
+"""
+import builtins
+import contextlib
+import os
+import time
+
+
+@contextlib.contextmanager
+def slow_filesystem(root, latency):
+    """Acrescenta `latency` segundos a os.scandir/os.listdir/os.stat/open (leitura) sob `root`"""
+    root = os.path.join(os.path.abspath(root), '')
+    original = {'scandir': os.scandir, 'listdir': os.listdir, 'stat': os.stat, 'open': builtins.open}
+
+    def is_slow(path):
+        try:
+            path = os.fsdecode(path)
+        except TypeError:
+            return False
+        return os.path.join(os.path.abspath(path), '').startswith(root)
+
+    def delayed(name):
+        func = original[name]
+
+        def call(path='.', *args, **kwargs):
+            if is_slow(path):
+                time.sleep(latency)
+            return func(path, *args, **kwargs)
+        return call
+
+    def slow_open(file, mode='r', *args, **kwargs):
+        if not any(flag in mode for flag in 'wax+') and is_slow(file):
+            time.sleep(latency)
+        return original['open'](file, mode, *args, **kwargs)
+
+    os.scandir = delayed('scandir')
+    os.listdir = delayed('listdir')
+    os.stat = delayed('stat')
+    builtins.open = slow_open
+    try:
+        yield
+    finally:
+        os.scandir = original['scandir']
+        os.listdir = original['listdir']
+        os.stat = original['stat']
+        builtins.open = original['open']
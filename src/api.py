@@ -0,0 +1,220 @@
+"""API de biblioteca: os mesmos bundles do merge.py, gerados sob demanda e sem gravar em disco.
+
+Tudo é gerador: nada é lido antes de o consumidor pedir o próximo item e no
+máximo uma janela de `read_workers` * 2 arquivos (ou a janela do modo async)
+fica lida à frente, então um consumidor lento (ex.: um socket) freia a
+leitura. Não há `print`: arquivos ignorados pelos filtros simplesmente não
+aparecem, e binários, duplicados e erros de leitura viram registros com
+`skipped`, `duplicate_of` ou `error`.
+
+    from src.api import iter_directory_records, render_bundle
+
+    records = iter_directory_records('/projeto', extensions=['.py'], ignore_dirs=['.venv'])
+    for chunk in render_bundle(records, title='projeto'):
+        sock.sendall(chunk)
+"""
+import hashlib
+import json
+import os
+from functools import partial
+
+from src.config import get_path_prefix
+from src.constants import (
+    DEFAULT_READ_WORKERS, DEFAULT_WALK_WORKERS, DEFAULT_MAX_FILE_SIZE, DEFAULT_IO_CONCURRENCY, DEDUP_MIN_SIZE
+)
+from src.dedup import ContentIndex
+from src.formats import SECTION_END, record_content
+from src.matcher import PathMatcher
+from src.merge import _io_setup, _iter_directory_files, _iter_list_files
+from src.profiling import RunStats
+from src.reader import load_file, refresh_if_changed
+from src.utils import remove_path_prefix, language_for
+from src.writer import BundleWriter, record_stats, index_note, section_header, duplicate_section
+
+# Chaves de todo registro gerado por iter_directory_records / iter_list_records
+RECORD_FIELDS = ('path', 'display_path', 'lang', 'encoding', 'size', 'bytes', 'lines', 'sha256', 'truncated',
+                 'content', 'skipped', 'duplicate_of', 'error')
+
+
+def _quiet(message):
+    pass
+
+
+def iter_directory_paths(dir_path, ignore_dirs=None, extensions=None, max_depth=0, use_gitignore=True,
+                         walk_workers=DEFAULT_WALK_WORKERS, io_mode='thread', io_concurrency=DEFAULT_IO_CONCURRENCY,
+                         matcher=None, output_path=None):
+    """Paths do walk de `dir_path` que passam pelos filtros do modo 1, na ordem do bundle (sem ler os arquivos).
+
+    Usa os mesmos filtros do merge. `matcher` substitui o montado a partir de
+    `ignore_dirs`, `extensions` e `use_gitignore` (ex.: o da raiz do modo 2,
+    para uma subpasta); com `output_path`, os arquivos desse bundle ficam de
+    fora, como no CLI.
+    """
+    _, _, io_concurrency = _io_setup(io_mode, None, io_concurrency)
+    if matcher is None:
+        matcher = PathMatcher(dir_path, ignore_dirs, extensions, use_gitignore=use_gitignore)
+    return _iter_directory_files(dir_path, output_path, matcher, max_depth, walk_workers, RunStats(),
+                                 io_concurrency=io_concurrency, log=_quiet)
+
+
+def iter_list_paths(file_list, base_dir=None):
+    """Paths da lista que passam pelos filtros do modo 3 (existentes e não sensíveis), na ordem recebida"""
+    return _iter_list_files(file_list, base_dir, RunStats(), log=_quiet)
+
+
+def _read(file_paths, loader, read_workers, io_mode, io_concurrency):
+    reader, workers, _ = _io_setup(io_mode, read_workers, io_concurrency)
+    return reader(file_paths, workers=workers, loader=loader)
+
+
+def iter_path_records(file_paths, path_prefix=None, paths_only=False, max_file_size=DEFAULT_MAX_FILE_SIZE,
+                      skip_binary=True, dedup=True, read_workers=DEFAULT_READ_WORKERS, io_mode='thread',
+                      io_concurrency=DEFAULT_IO_CONCURRENCY):
+    """Gera um registro (dict com as chaves de RECORD_FIELDS) por path de `file_paths`, na ordem recebida.
+
+    `content` traz os bytes UTF-8 que iriam para o bundle (None para
+    binários, duplicados, erros e `paths_only`). `path_prefix` None usa o
+    prefixo configurado.
+    """
+    _io_setup(io_mode, read_workers, io_concurrency)
+    if path_prefix is None:
+        path_prefix = get_path_prefix()
+    if paths_only:
+        loader = os.stat
+    else:
+        loader = partial(load_file, max_file_size=max_file_size, skip_binary=skip_binary)
+    return _records(_read(file_paths, loader, read_workers, io_mode, io_concurrency), path_prefix,
+                    ContentIndex() if dedup and not paths_only else None, paths_only)
+
+
+def _records(results, path_prefix, content_index, paths_only):
+    for file_path, result, error in results:
+        record = dict.fromkeys(RECORD_FIELDS)
+        record.update(path=file_path, display_path=remove_path_prefix(file_path, path_prefix),
+                      lang=language_for(file_path), truncated=0)
+        if error is not None:
+            record['error'] = f"{type(error).__name__}: {error}"
+        elif paths_only:
+            record['size'] = result.st_size
+        elif 'skipped' in result:
+            record.update(skipped=result['skipped'], size=result['size'])
+        else:
+            result = refresh_if_changed(result)
+            num_bytes, lines = record_stats(result)
+            size = result.get('size')
+            if 'source' in result:
+                size += result.get('offset', 0)
+            record.update(encoding=result.get('encoding') or 'utf-8', size=size, bytes=num_bytes, lines=lines,
+                          sha256=result.get('sha256'), truncated=result.get('truncated', 0))
+            original = None
+            if content_index is not None and record['sha256'] and num_bytes is not None and num_bytes >= DEDUP_MIN_SIZE:
+                original = content_index.find(record['sha256'], None)
+                if original is None:
+                    content_index.add(record['sha256'], record['display_path'], None)
+            if original is not None:
+                record['duplicate_of'] = original[0]
+            else:
+                record['content'] = record_content(result)
+        yield record
+
+
+def iter_directory_records(dir_path, ignore_dirs=None, extensions=None, max_depth=0, use_gitignore=True,
+                           path_prefix=None, paths_only=False, max_file_size=DEFAULT_MAX_FILE_SIZE, skip_binary=True,
+                           dedup=True, read_workers=DEFAULT_READ_WORKERS, walk_workers=DEFAULT_WALK_WORKERS,
+                           io_mode='thread', io_concurrency=DEFAULT_IO_CONCURRENCY, matcher=None, output_path=None):
+    """Registros dos arquivos de `dir_path`, na ordem do modo 1 e com os filtros de `merge_files_from_directory`"""
+    file_paths = iter_directory_paths(dir_path, ignore_dirs, extensions, max_depth, use_gitignore, walk_workers,
+                                      io_mode, io_concurrency, matcher, output_path)
+    return iter_path_records(file_paths, path_prefix, paths_only, max_file_size, skip_binary, dedup, read_workers,
+                             io_mode, io_concurrency)
+
+
+def iter_list_records(file_list, base_dir=None, path_prefix=None, paths_only=False,
+                      max_file_size=DEFAULT_MAX_FILE_SIZE, skip_binary=True, dedup=True,
+                      read_workers=DEFAULT_READ_WORKERS, io_mode='thread', io_concurrency=DEFAULT_IO_CONCURRENCY):
+    """Como `iter_directory_records`, para uma lista de paths (modo 3); paths inexistentes são pulados"""
+    return iter_path_records(iter_list_paths(file_list, base_dir), path_prefix, paths_only, max_file_size,
+                             skip_binary, dedup, read_workers, io_mode, io_concurrency)
+
+
+def fingerprint_paths(file_paths, read_workers=DEFAULT_READ_WORKERS, io_mode='thread',
+                      io_concurrency=DEFAULT_IO_CONCURRENCY, with_size=False):
+    """sha256 dos paths com tamanho e mtime de cada um (via stat, sem ler os arquivos).
+
+    Muda quando um arquivo é criado, removido, renomeado ou alterado; serve
+    de chave de cache para os bundles gerados a partir dos mesmos paths. Com
+    `with_size`, devolve (sha256, soma dos tamanhos dos arquivos).
+    """
+    _io_setup(io_mode, read_workers, io_concurrency)
+    digest = hashlib.sha256()
+    total_size = 0
+    for file_path, stat, error in _read(file_paths, os.stat, read_workers, io_mode, io_concurrency):
+        signature = None if error is not None else (stat.st_size, stat.st_mtime_ns)
+        if error is None:
+            total_size += stat.st_size
+        digest.update(f"{file_path}\0{signature}\n".encode('utf-8', 'surrogateescape'))
+    if with_size:
+        return digest.hexdigest(), total_size
+    return digest.hexdigest()
+
+
+def iter_sections(records):
+    """Gera, para cada registro, a seção Markdown do arquivo (bytes) como ela aparece no corpo do bundle.
+
+    Registros sem seção (binários, erros, `paths_only`) não geram nada.
+    """
+    for record in records:
+        if record['duplicate_of'] is not None:
+            yield duplicate_section(record['display_path'], f"`{record['duplicate_of']}`")
+        elif record['content'] is not None:
+            yield section_header(record['display_path'], record['lang']) + record['content'] + SECTION_END
+
+
+def render_jsonl(records):
+    """Gera uma linha JSON (bytes) por registro, no formato do `nome.jsonl` gravado com output_formats.
+
+    Erros de leitura não geram linha, como no arquivo gravado pelo merge.
+    """
+    for record in records:
+        if record['error'] is not None:
+            continue
+        line = {key: record[key] for key in ('path', 'display_path', 'lang', 'encoding', 'size', 'truncated')}
+        if record['skipped'] is not None:
+            line['skipped'] = record['skipped']
+        elif record['duplicate_of'] is not None:
+            line.update(encoding=None, size=record['bytes'], truncated=0, duplicate_of=record['duplicate_of'])
+        content = record['content']
+        line['content'] = content.decode('utf-8') if content is not None else None
+        yield json.dumps(line, ensure_ascii=False).encode('utf-8') + b'\n'
+
+
+def render_bundle(records, title=None, index_title="Índice de Arquivos", index_stats=True, name='bundle.md'):
+    """Gera o bundle Markdown completo em blocos de bytes, idêntico ao que as funções de merge gravariam.
+
+    O índice vem antes do corpo, então o corpo é acumulado num spool (em
+    memória até SPOOL_MAX_SIZE) enquanto os registros são consumidos e os
+    blocos só começam a sair depois do último registro. Para enviar cada
+    arquivo assim que é lido, use `iter_sections`. `name` é o nome do bundle
+    usado nas referências de duplicados.
+    """
+    writer = BundleWriter(name, title=title, index_title=index_title, index_stats=index_stats, bundle_index=False)
+    try:
+        for record in records:
+            display_path = record['display_path']
+            if record['error'] is not None:
+                writer.add_path(display_path)
+            elif record['skipped'] is not None:
+                writer.add_skipped(display_path, record['skipped'], record['size'])
+            elif record['duplicate_of'] is not None:
+                writer.add_duplicate(display_path, (record['duplicate_of'], None, 0), record['bytes'], record['sha256'])
+            elif record['content'] is None:
+                writer.add_path_line(display_path, num_bytes=record['size'] if writer.index_stats else None)
+            else:
+                writer.add_record(display_path, record['lang'], {
+                    'data': record['content'], 'size': record['size'], 'encoding': record['encoding'],
+                    'sha256': record['sha256'], 'truncated': record['truncated'], 'lines': record['lines'],
+                }, note=index_note(record))
+    except BaseException:
+        writer.discard()
+        raise
+    yield from writer.iter_chunks()
@@ -0,0 +1,197 @@
+import asyncio
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from src.constants import DEFAULT_IO_CONCURRENCY, ASYNC_IO_WINDOW_PER_WORKER
+from src.reader import load_file, read_safely
+from src.walker import list_dir, split_entries
+
+_ITEM, _DONE, _ERROR = range(3)
+_END = object()
+
+
+def _serve(produce, concurrency, window, items, control):
+    """Thread do event loop: consome `produce(run)` e entrega cada item em `items`"""
+    async def main():
+        loop = asyncio.get_running_loop()
+        credits = asyncio.Semaphore(window)
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='ks-aio')
+        control.update(loop=loop, release=credits.release, cancel=asyncio.current_task().cancel)
+        control['ready'].set()
+
+        def run(func, *args):
+            return loop.run_in_executor(executor, partial(func, *args))
+
+        results = produce(run)
+        try:
+            async for item in results:
+                await credits.acquire()
+                items.put((_ITEM, item))
+            items.put((_DONE, None))
+        except asyncio.CancelledError:
+            items.put((_DONE, None))
+        finally:
+            await results.aclose()
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    try:
+        asyncio.run(main())
+    except BaseException as e:
+        items.put((_ERROR, e))
+    finally:
+        control['ready'].set()
+
+
+def _call_in_loop(control, action):
+    try:
+        control['loop'].call_soon_threadsafe(control[action])
+    except (KeyError, RuntimeError):
+        # loop já encerrado: não há mais nada a liberar ou cancelar
+        pass
+
+
+def iter_async(produce, concurrency=DEFAULT_IO_CONCURRENCY, window=None):
+    """Gera, para um consumidor síncrono, os itens do gerador assíncrono `produce(run)`.
+
+    O event loop roda numa thread própria. `run(func, *args)` executa uma
+    chamada bloqueante (scandir, stat, open/read) num pool de `concurrency`
+    threads e devolve um awaitable: a stdlib não tem I/O de arquivo
+    assíncrono, então o asyncio só orquestra as chamadas para que a latência
+    de cada uma se sobreponha à das outras. No máximo `window` itens ficam
+    prontos e não consumidos; encerrar o gerador cancela o trabalho pendente.
+    """
+    concurrency = max(concurrency or 1, 1)
+    if window is None:
+        window = concurrency * ASYNC_IO_WINDOW_PER_WORKER
+    items = queue.Queue()
+    control = {'ready': threading.Event()}
+    thread = threading.Thread(target=_serve, args=(produce, concurrency, max(window, 1), items, control),
+                              name='ks-aio-loop', daemon=True)
+    thread.start()
+    finished = False
+    try:
+        while True:
+            kind, value = items.get()
+            if kind == _DONE:
+                finished = True
+                return
+            if kind == _ERROR:
+                finished = True
+                raise value
+            _call_in_loop(control, 'release')
+            yield value
+    finally:
+        if not finished:
+            control['ready'].wait()
+            _call_in_loop(control, 'cancel')
+        thread.join()
+
+
+def async_read_files(file_paths, workers=DEFAULT_IO_CONCURRENCY, max_in_flight=None, loader=load_file):
+    """Mesmo contrato do `read_files` (path, conteúdo, erro na ordem de entrada), com as leituras no event loop.
+
+    Até `max_in_flight` chamadas de `loader` ficam em andamento ao mesmo
+    tempo. Quando `file_paths` é um gerador (ex.: o walk), cada item é puxado
+    no pool, para que um walk lento não bloqueie o loop.
+    """
+    workers = max(workers or 1, 1)
+    if max_in_flight is None:
+        max_in_flight = workers * ASYNC_IO_WINDOW_PER_WORKER
+    max_in_flight = max(max_in_flight, 1)
+    materialized = isinstance(file_paths, (list, tuple))
+
+    async def produce(run):
+        source = iter(file_paths)
+        pending = deque()
+        try:
+            while True:
+                file_path = next(source, _END) if materialized else await run(next, source, _END)
+                if file_path is _END:
+                    break
+                pending.append((file_path, run(read_safely, loader, file_path)))
+                if len(pending) >= max_in_flight:
+                    done_path, future = pending.popleft()
+                    yield (done_path,) + await future
+            while pending:
+                done_path, future = pending.popleft()
+                yield (done_path,) + await future
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+    return iter_async(produce, workers, max_in_flight)
+
+
+def async_walk_files(dir_path, max_depth=0, ignore_dir=None, accept=None, concurrency=DEFAULT_IO_CONCURRENCY,
+                     stats=None):
+    """Walk com as listagens no event loop, gerando `accept(entry)` de cada arquivo na ordem do `walk_files`.
+
+    Cada diretório listado dispara na hora a listagem das suas subpastas
+    (até `concurrency` * ASYNC_IO_WINDOW_PER_WORKER diretórios à frente do
+    consumidor), então a latência de toda a árvore se sobrepõe. `ignore_dir`
+    e `accept` rodam no pool, junto com a listagem do diretório; arquivos
+    com `accept` None são descartados (sem `accept`, gera o path).
+    """
+    concurrency = max(concurrency or 1, 1)
+    max_ahead = concurrency * ASYNC_IO_WINDOW_PER_WORKER
+
+    def list_and_filter(path, depth):
+        entries = list_dir(path)
+        if stats is not None:
+            stats.for_path(os.path.join(path, '')).count('dirs_visited')
+        if entries is None:
+            return [], []
+        files, subdirs = split_entries(entries, ignore_dir)
+        if accept is None:
+            accepted = [entry.path for entry in files]
+        else:
+            accepted = [result for result in map(accept, files) if result is not None]
+        if 0 < max_depth <= depth + 1:
+            subdirs = []
+        return accepted, subdirs
+
+    async def produce(run):
+        tasks = set()
+        # subpastas descobertas e ainda não listadas (nó = [path, profundidade, task])
+        deferred = []
+
+        def start(node):
+            node[2] = asyncio.ensure_future(listing(node[0], node[1]))
+            tasks.add(node[2])
+
+        def refill():
+            while deferred and len(tasks) < max_ahead:
+                node = deferred.pop()
+                if node[2] is None:
+                    start(node)
+
+        async def listing(path, depth):
+            files, subdirs = await run(list_and_filter, path, depth)
+            children = [[entry.path, depth + 1, None] for entry in subdirs]
+            deferred.extend(reversed(children))
+            refill()
+            return files, children
+
+        root = [dir_path, 0, None]
+        start(root)
+        stack = [root]
+        try:
+            while stack:
+                node = stack.pop()
+                if node[2] is None:
+                    start(node)
+                files, children = await node[2]
+                tasks.discard(node[2])
+                for file_path in files:
+                    yield file_path
+                stack.extend(reversed(children))
+                refill()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return iter_async(produce, concurrency)
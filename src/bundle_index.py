@@ -0,0 +1,87 @@
+import json
+import os
+
+from src.compression import open_bundle, strip_compression_suffix
+from src.constants import BUNDLE_INDEX_SUFFIX, BUNDLE_INDEX_VERSION
+
+# Colunas de cada seção no índice: uma lista por seção, sem repetir as chaves
+INDEX_FIELDS = ('path', 'part', 'offset', 'length', 'language', 'sha256', 'duplicate_of')
+
+
+def index_path(output_path):
+    """Índice de seções gravado ao lado do bundle (`nome.index.json`)"""
+    return os.path.splitext(strip_compression_suffix(output_path))[0] + BUNDLE_INDEX_SUFFIX
+
+
+def write_bundle_index(writer):
+    """Grava o índice das seções de um BundleWriter já fechado (escrita atômica) e devolve o path.
+
+    `part` é a posição da parte em `outputs`; `offset` e `length` são em
+    bytes da parte descomprimida.
+    """
+    data = {
+        'version': BUNDLE_INDEX_VERSION,
+        'bundle': os.path.basename(writer.output_path),
+        'outputs': [os.path.basename(path) for path in writer.outputs],
+        'sha256': writer.digest,
+        'fields': list(INDEX_FIELDS),
+        'sections': [[section.get(field) for field in INDEX_FIELDS] for section in writer.sections],
+    }
+    path = index_path(writer.output_path)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_bundle_index(output_path):
+    """Índice de seções do bundle, ou None se ele não existir ou for de outra versão.
+
+    As seções voltam como dicionários (chaves de INDEX_FIELDS) e `outputs`
+    com o path completo de cada parte.
+    """
+    path = index_path(output_path)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    if data.get('version') != BUNDLE_INDEX_VERSION:
+        return None
+    fields = data['fields']
+    data['sections'] = [dict(zip(fields, row)) for row in data['sections']]
+    data['outputs'] = [os.path.join(os.path.dirname(path), name) for name in data['outputs']]
+    return data
+
+
+def find_section(index, file_path):
+    """Seção de `file_path`: path exato ou, se for o único, o que termina com ele (ex.: o path exibido)"""
+    file_path = os.path.normpath(file_path)
+    suffix = os.sep + file_path.lstrip(os.sep)
+    matches = []
+    for section in index['sections']:
+        if section['path'] == file_path:
+            return section
+        if section['path'].endswith(suffix):
+            matches.append(section)
+    return matches[0] if len(matches) == 1 else None
+
+
+def read_section(output_path, file_path, index=None):
+    """Bytes da seção de `file_path`, lidos com seek direto no bundle (sem percorrer o Markdown).
+
+    Em bundles comprimidos o seek descomprime o stream até o offset. Levanta
+    FileNotFoundError sem índice e KeyError se o arquivo não estiver no
+    bundle (ou o path for ambíguo).
+    """
+    if index is None:
+        index = load_bundle_index(output_path)
+        if index is None:
+            raise FileNotFoundError(index_path(output_path))
+    section = find_section(index, file_path)
+    if section is None:
+        raise KeyError(file_path)
+    with open_bundle(index['outputs'][section['part']]) as bundle:
+        bundle.seek(section['offset'])
+        return bundle.read(section['length'])
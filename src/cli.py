@@ -0,0 +1,248 @@
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.bundle_index import read_section
+from src.compression import open_bundle
+from src.config import list_configs, load_config, record_run
+from src.constants import (
+    DEFAULT_BATCH_WORKERS, PRESET_EXTENSIONS, WATCH_DEBOUNCE, DEFAULT_SERVER_HOST, DEFAULT_SERVER_PORT,
+    DEFAULT_SERVER_CACHE_BYTES, DEFAULT_IGNORE_DIRS
+)
+from src.menu import execute_from_config
+from src.server import serve
+from src.utils import normalize_path
+from src.watch import watch_config
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='cli.py',
+        description="Executa configurações salvas (ou uma configuração avulsa) sem o menu interativo.",
+    )
+    parser.add_argument('configs', nargs='*', metavar='CONFIG', help="nomes de configurações salvas")
+    parser.add_argument('--all', action='store_true', help="executa todas as configurações salvas")
+    parser.add_argument('--list', action='store_true', help="lista as configurações salvas e sai")
+    parser.add_argument('--cat', metavar='BUNDLE',
+                        help="imprime um bundle (.md, .md.gz, .md.bz2, .md.xz) descomprimindo em stream e sai")
+    parser.add_argument('--section', nargs=2, metavar=('BUNDLE', 'ARQUIVO'),
+                        help="imprime só a seção de ARQUIVO, com seek direto pelo índice do bundle (nome.index.json)")
+    parser.add_argument('-j', '--workers', type=int, default=DEFAULT_BATCH_WORKERS,
+                        help=f"configurações executadas em paralelo (padrão: {DEFAULT_BATCH_WORKERS})")
+    parser.add_argument('--json', action='store_true',
+                        help="imprime só o resumo em JSON no stdout (o log vai para o stderr)")
+    parser.add_argument('--delta', action='store_true',
+                        help="grava só o que mudou desde a execução anterior (nome.delta.md), como a chave 'delta'")
+    parser.add_argument('--watch', action='store_true',
+                        help="mantém os bundles de uma configuração atualizados até Ctrl+C")
+    parser.add_argument('--poll', action='store_true', help="--watch: usa polling mesmo com inotify disponível")
+    parser.add_argument('--debounce', type=float, default=WATCH_DEBOUNCE,
+                        help=f"--watch: segundos sem alterações antes de regenerar (padrão: {WATCH_DEBOUNCE})")
+
+    server = parser.add_argument_group("servidor HTTP")
+    server.add_argument('--serve', action='store_true',
+                        help="serve os bundles das configurações por HTTP, com cache em memória, até Ctrl+C")
+    server.add_argument('--host', default=DEFAULT_SERVER_HOST, help=f"endereço (padrão: {DEFAULT_SERVER_HOST})")
+    server.add_argument('--port', type=int, default=DEFAULT_SERVER_PORT, help=f"porta (padrão: {DEFAULT_SERVER_PORT})")
+    server.add_argument('--cache-mb', type=int, default=DEFAULT_SERVER_CACHE_BYTES // (1024 * 1024),
+                        help="limite (MB) da soma dos bundles mantidos no cache "
+                             f"(padrão: {DEFAULT_SERVER_CACHE_BYTES // (1024 * 1024)})")
+
+    adhoc = parser.add_argument_group("configuração avulsa")
+    adhoc.add_argument('--dir', help="diretório raiz (modos 1 e 2)")
+    adhoc.add_argument('--mode', choices=('1', '2', '3'), help="1 = um arquivo, 2 = um por subpasta, 3 = lista")
+    adhoc.add_argument('--ext', action='append', dest='extensions', metavar='EXT',
+                       help="extensão a incluir (repetível); --preset N usa um preset do menu")
+    adhoc.add_argument('--preset', type=int, choices=range(1, len(PRESET_EXTENSIONS) + 1), metavar='N',
+                       help=f"preset de extensões do menu (1 a {len(PRESET_EXTENSIONS)})")
+    adhoc.add_argument('--max-depth', type=int, default=0, help="profundidade máxima (0 = sem limite)")
+    adhoc.add_argument('--ignore-dir', action='append', dest='ignore_dirs', metavar='DIR',
+                       help="diretório a ignorar (repetível)")
+    adhoc.add_argument('--paths-only', action='store_true', help="gera apenas os paths dos arquivos")
+    adhoc.add_argument('--files-from', metavar='ARQUIVO', help="modo 3: arquivo com a lista de paths")
+    adhoc.add_argument('--base-dir', help="modo 3: diretório base dos paths relativos")
+    adhoc.add_argument('--output', help="modo 3: arquivo .md de saída")
+    adhoc.add_argument('--set', action='append', default=[], metavar='CHAVE=VALOR',
+                       help="opção avançada da configuração (valor em JSON), ex.: --set max_part_tokens=100000")
+    return parser
+
+
+def _parse_overrides(items):
+    overrides = {}
+    for item in items:
+        key, sep, value = item.partition('=')
+        if not sep or not key:
+            raise ValueError(f"opção inválida: {item!r} (use CHAVE=VALOR)")
+        try:
+            overrides[key] = json.loads(value)
+        except ValueError:
+            overrides[key] = value
+    return overrides
+
+
+def config_from_args(args):
+    """Monta uma configuração avulsa a partir das flags, no mesmo formato das salvas"""
+    modo = args.mode or ('3' if args.files_from else '1')
+    config_data = {'modo': modo, 'paths_only': args.paths_only}
+    if modo == '3':
+        if not args.files_from or not args.output:
+            raise ValueError("o modo 3 exige --files-from e --output")
+        with open(normalize_path(args.files_from), 'r', encoding='utf-8') as f:
+            file_list = [line.strip() for line in f if line.strip()]
+        output_path = normalize_path(args.output)
+        if not output_path.endswith('.md'):
+            output_path += '.md'
+        config_data.update({
+            'file_list': file_list,
+            'base_dir': normalize_path(args.base_dir) if args.base_dir else None,
+            'output_path': os.path.abspath(output_path),
+        })
+    else:
+        if not args.dir or not os.path.isdir(normalize_path(args.dir)):
+            raise ValueError("--dir deve apontar para um diretório existente")
+        extensions = args.extensions
+        if args.preset:
+            extensions = PRESET_EXTENSIONS[args.preset - 1]
+        config_data.update({
+            'dir_path': normalize_path(args.dir),
+            'extensions': extensions or None,
+            'max_depth': args.max_depth,
+            'ignore_dirs': args.ignore_dirs or list(DEFAULT_IGNORE_DIRS),
+        })
+    config_data.update(_parse_overrides(args.set))
+    return config_data
+
+
+def run_config(name, config_data):
+    """Executa uma configuração e devolve o resultado usado no resumo (nunca levanta exceção)"""
+    started = time.perf_counter()
+    result = {'name': name, 'status': 'ok', 'files': 0, 'seconds': 0.0, 'error': None}
+    try:
+        if config_data is None:
+            raise LookupError(f"configuração '{name}' não encontrada ou inválida")
+        summary = execute_from_config(config_data)
+        result['files'] = summary['files']
+        if summary['errors']:
+            result['status'] = 'error'
+            result['error'] = '; '.join(summary['errors'])
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['seconds'] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def run_batch(jobs, workers=DEFAULT_BATCH_WORKERS):
+    """Executa [(nome, config)] em paralelo e devolve os resultados na ordem recebida"""
+    if workers <= 1 or len(jobs) <= 1:
+        return [run_config(name, config_data) for name, config_data in jobs]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ks-batch') as executor:
+        futures = [executor.submit(run_config, name, config_data) for name, config_data in jobs]
+        return [future.result() for future in futures]
+
+
+def _print_summary(results, as_json):
+    ok = all(result['status'] == 'ok' for result in results)
+    if as_json:
+        json.dump({'ok': ok, 'results': results}, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write('\n')
+        return
+    print("\n📊 Resumo:")
+    for result in results:
+        if result['status'] == 'ok':
+            print(f"✅ {result['name']} — {result['files']} arquivo(s) em {result['seconds']:.2f}s")
+        else:
+            print(f"❌ {result['name']} — erro: {result['error']}")
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for config in sorted(list_configs()):
+            print(config)
+        return EXIT_OK
+
+    if args.cat:
+        try:
+            with open_bundle(normalize_path(args.cat)) as bundle:
+                shutil.copyfileobj(bundle, sys.stdout.buffer)
+        except BrokenPipeError:
+            # leitor fechou o pipe antes do fim (ex.: `| head`)
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            return EXIT_OK
+        except (OSError, EOFError) as e:
+            print(f"❌ Erro ao ler {args.cat}: {e}", file=sys.stderr)
+            return EXIT_FAILED
+        return EXIT_OK
+
+    if args.section:
+        bundle_path, file_path = args.section
+        try:
+            sys.stdout.buffer.write(read_section(normalize_path(bundle_path), file_path))
+            sys.stdout.flush()
+        except BrokenPipeError:
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        except KeyError:
+            print(f"❌ {file_path} não está no bundle {bundle_path} (ou o path é ambíguo)", file=sys.stderr)
+            return EXIT_FAILED
+        except FileNotFoundError as e:
+            print(f"❌ Arquivo não encontrado: {e.filename or e}", file=sys.stderr)
+            return EXIT_FAILED
+        except (OSError, EOFError, ValueError) as e:
+            print(f"❌ Erro ao ler {bundle_path}: {e}", file=sys.stderr)
+            return EXIT_FAILED
+        return EXIT_OK
+
+    if args.serve:
+        try:
+            serve(args.host, args.port, max(args.cache_mb, 0) * 1024 * 1024)
+        except OSError as e:
+            print(f"❌ Não foi possível abrir {args.host}:{args.port}: {e}", file=sys.stderr)
+            return EXIT_FAILED
+        return EXIT_OK
+
+    log = contextlib.redirect_stdout(sys.stderr) if args.json else contextlib.nullcontext()
+    with log:
+        jobs = []
+        names = sorted(list_configs()) if args.all else args.configs
+        for name in names:
+            jobs.append((name, load_config(name)))
+        if args.dir or args.files_from:
+            try:
+                jobs.append(('avulsa', config_from_args(args)))
+            except (OSError, ValueError) as e:
+                print(f"❌ {e}")
+                return EXIT_USAGE
+        if args.delta:
+            jobs = [(name, dict(config_data, delta=True) if config_data is not None else None)
+                    for name, config_data in jobs]
+        if not jobs:
+            parser.print_usage(sys.stderr)
+            print("❌ Informe configurações salvas, --all ou --dir/--files-from.")
+            return EXIT_USAGE
+
+        if args.watch:
+            if len(jobs) != 1 or jobs[0][1] is None:
+                print("❌ --watch observa exatamente uma configuração válida.")
+                return EXIT_USAGE
+            watch_config(jobs[0][1], debounce=args.debounce, force_polling=args.poll)
+            return EXIT_OK
+
+        results = run_batch(jobs, max(args.workers, 1))
+        for (name, config_data), result in zip(jobs[:len(names)], results):
+            if config_data is not None:
+                record_run(name, result['status'])
+
+    _print_summary(results, args.json)
+    return EXIT_OK if all(result['status'] == 'ok' for result in results) else EXIT_FAILED
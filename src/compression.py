@@ -0,0 +1,66 @@
+import bz2
+import gzip
+import lzma
+
+from src.constants import COMPRESSION_SUFFIXES, DEFAULT_COMPRESSION_LEVELS
+
+
+def validate_compression(compression):
+    """Normaliza o codec configurado ('gz' → 'gzip'); None/'' desativa a compressão"""
+    if not compression:
+        return None
+    compression = {'gz': 'gzip', 'lzma': 'xz', 'bzip2': 'bz2'}.get(compression, compression)
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"compressão desconhecida: {compression!r} (use {', '.join(COMPRESSION_SUFFIXES)})")
+    return compression
+
+
+def compressed_path(path, compression):
+    return path + COMPRESSION_SUFFIXES[compression] if compression else path
+
+
+def strip_compression_suffix(path):
+    """Path sem o sufixo de compressão (`x.md.gz` → `x.md`)"""
+    for suffix in COMPRESSION_SUFFIXES.values():
+        if path.endswith(suffix):
+            return path[:-len(suffix)]
+    return path
+
+
+def is_compressed(path):
+    return strip_compression_suffix(path) != path
+
+
+def compressing_writer(fileobj, compression, level=None):
+    """Envolve `fileobj` (binário, aberto para escrita) num compressor em stream"""
+    if level is None:
+        level = DEFAULT_COMPRESSION_LEVELS[compression]
+    if compression == 'gzip':
+        # mtime=0: o mesmo conteúdo gera sempre os mesmos bytes
+        return gzip.GzipFile(fileobj=fileobj, mode='wb', compresslevel=level, mtime=0)
+    if compression == 'bz2':
+        return bz2.BZ2File(fileobj, mode='wb', compresslevel=level)
+    return lzma.LZMAFile(fileobj, mode='wb', preset=level)
+
+
+def open_bundle(path, mode='rb', encoding='utf-8'):
+    """Abre um bundle (ou parte) para leitura, descomprimindo em stream conforme a extensão.
+
+    Não cria cópia descomprimida: `.md.gz`, `.md.bz2` e `.md.xz` são lidos
+    pelo respectivo módulo da stdlib e `.md` é aberto normalmente. Com
+    `mode='r'` devolve texto.
+    """
+    if mode not in ('r', 'rb', 'rt'):
+        raise ValueError("open_bundle só abre bundles para leitura")
+    text = mode != 'rb'
+    if path.endswith(COMPRESSION_SUFFIXES['gzip']):
+        opener = gzip.open
+    elif path.endswith(COMPRESSION_SUFFIXES['bz2']):
+        opener = bz2.open
+    elif path.endswith(COMPRESSION_SUFFIXES['xz']):
+        opener = lzma.open
+    else:
+        return open(path, 'r' if text else 'rb', **({'encoding': encoding} if text else {}))
+    if text:
+        return opener(path, 'rt', encoding=encoding)
+    return opener(path, 'rb')
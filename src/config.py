@@ -1,37 +1,263 @@
 import json
 import os
+import threading
+from datetime import datetime
 
-from src.constants import CONFIG_DIR, PATH_PREFIX_CONFIG
+from src.constants import CONFIG_DIR, PATH_PREFIX_CONFIG, CONFIG_INDEX_PATH, CONFIG_INDEX_VERSION
+
+
+def _detect_path_prefix():
+    home = os.path.expanduser("~")
+    common_patterns = ['stk-dev', 'projects', 'workspace', 'dev', 'code']
+    for pattern in common_patterns:
+        potential_prefix = os.path.join(home, pattern)
+        if os.path.isdir(potential_prefix):
+            return potential_prefix + os.sep
+    return ''
+
+
+def _signature(path):
+    """(tamanho, mtime_ns) do arquivo, ou None se ele não existir"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _write_json(path, data, indent=2):
+    """Grava via arquivo temporário + rename: leitores nunca veem um JSON pela metade"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _summarize(config_data, signature):
+    """Entrada do índice de uma configuração"""
+    modo = config_data.get('modo')
+    if modo == '3':
+        target = config_data.get('base_dir') or os.path.dirname(config_data.get('output_path') or '')
+    else:
+        target = config_data.get('dir_path')
+    return {
+        'modo': modo,
+        'dir': target,
+        'files': len(config_data.get('file_list', [])) if modo == '3' else None,
+        'size': signature[0],
+        'mtime_ns': signature[1],
+        'last_run': None,
+        'last_status': None,
+    }
+
+
+class ConfigStore:
+    """Configurações salvas em `config_dir`, com índice persistente e cache em memória.
+
+    Listar usa só o índice (nome, modo, diretório, tamanho, última execução),
+    que é revalidado pela mtime do diretório e pelo tamanho e mtime de cada
+    configuração (só `stat`): enquanto nenhuma for criada, removida, renomeada
+    ou editada, nenhum JSON é aberto. Configurações
+    lidas ficam em cache e são relidas só quando o tamanho ou a mtime do
+    arquivo mudam. Toda gravação é atômica (temporário + rename).
+    """
+
+    def __init__(self, config_dir=CONFIG_DIR, index_path=CONFIG_INDEX_PATH, prefix_path=PATH_PREFIX_CONFIG):
+        self.config_dir = config_dir
+        self.index_path = index_path
+        self.prefix_path = prefix_path
+        self._lock = threading.RLock()
+        self._index = None
+        self._configs = {}
+        self._prefix = None
+
+    def _path(self, name):
+        return os.path.join(self.config_dir, f"{name}.json")
+
+    def _is_config_file(self, file_name):
+        return file_name.endswith('.json') and file_name != os.path.basename(self.prefix_path)
+
+    def _read_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {'dir_mtime_ns': None, 'configs': {}}
+        if data.get('version') != CONFIG_INDEX_VERSION or not isinstance(data.get('configs'), dict):
+            return {'dir_mtime_ns': None, 'configs': {}}
+        return data
+
+    def _write_index(self):
+        data = dict(self._index, version=CONFIG_INDEX_VERSION)
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            _write_json(self.index_path, data, indent=None)
+        except OSError:
+            pass
+
+    def _parse(self, name, signature):
+        with open(self._path(name), 'r', encoding='utf-8') as f:
+            config_data = json.load(f)
+        self._configs[name] = (signature, config_data)
+        return config_data
+
+    def _refresh_entry(self, name, signature, config_data, previous=None):
+        """Recalcula a entrada do índice, preservando os dados da última execução"""
+        if previous is None:
+            previous = self._index['configs'].get(name) or {}
+        entry = _summarize(config_data, signature)
+        entry['last_run'] = previous.get('last_run')
+        entry['last_status'] = previous.get('last_status')
+        self._index['configs'][name] = entry
+
+    def _rescan(self, dir_mtime_ns):
+        """Sincroniza o índice com o diretório; só abre os JSON novos ou alterados"""
+        previous = self._index['configs']
+        self._index = {'dir_mtime_ns': dir_mtime_ns, 'configs': {}}
+        with os.scandir(self.config_dir) as it:
+            file_names = [entry.name for entry in it if entry.is_file() and self._is_config_file(entry.name)]
+        for file_name in file_names:
+            name = file_name[:-len('.json')]
+            signature = _signature(self._path(name))
+            if signature is None:
+                continue
+            entry = previous.get(name)
+            if entry and (entry.get('size'), entry.get('mtime_ns')) == signature:
+                self._index['configs'][name] = entry
+                continue
+            try:
+                config_data = self._parse(name, signature)
+            except (OSError, ValueError):
+                continue
+            self._refresh_entry(name, signature, config_data, previous=entry or {})
+        self._write_index()
+
+    def _refresh_edited(self):
+        """Atualiza as entradas das configurações editadas no lugar (mesmo nome, sem mudar a mtime do diretório)"""
+        changed = False
+        for name, entry in list(self._index['configs'].items()):
+            signature = _signature(self._path(name))
+            if signature is None or (entry.get('size'), entry.get('mtime_ns')) == signature:
+                continue
+            try:
+                config_data = self._parse(name, signature)
+            except (OSError, ValueError):
+                continue
+            self._refresh_entry(name, signature, config_data, previous=entry)
+            changed = True
+        if changed:
+            self._write_index()
+
+    def index(self):
+        """Entradas do índice por nome de configuração"""
+        with self._lock:
+            dir_mtime_ns = os.stat(self.config_dir).st_mtime_ns
+            if self._index is None:
+                self._index = self._read_index()
+            if self._index.get('dir_mtime_ns') != dir_mtime_ns:
+                self._rescan(dir_mtime_ns)
+            else:
+                self._refresh_edited()
+            return {name: dict(entry) for name, entry in self._index['configs'].items()}
+
+    def names(self):
+        return sorted(self.index())
+
+    def load(self, name):
+        """Configuração `name` (do cache, se o arquivo não mudou); FileNotFoundError se não existir.
+
+        Devolve uma cópia rasa: as listas internas (ex.: `file_list`) são
+        compartilhadas com o cache e não devem ser alteradas.
+        """
+        with self._lock:
+            signature = _signature(self._path(name))
+            if signature is None:
+                self._configs.pop(name, None)
+                raise FileNotFoundError(self._path(name))
+            cached = self._configs.get(name)
+            if cached is not None and cached[0] == signature:
+                return dict(cached[1])
+            config_data = self._parse(name, signature)
+            entry = self._index['configs'].get(name) if self._index is not None else None
+            if entry is not None and (entry.get('size'), entry.get('mtime_ns')) != signature:
+                self._refresh_entry(name, signature, config_data)
+                self._write_index()
+            return dict(config_data)
+
+    def save(self, name, config_data):
+        with self._lock:
+            path = self._path(name)
+            _write_json(path, config_data)
+            self._configs.pop(name, None)
+            if self._index is not None:
+                self._refresh_entry(name, _signature(path), config_data)
+                self._write_index()
+            return path
+
+    def delete(self, name):
+        with self._lock:
+            os.remove(self._path(name))
+            self._configs.pop(name, None)
+            if self._index is not None and self._index['configs'].pop(name, None) is not None:
+                self._write_index()
+
+    def record_run(self, name, status='ok'):
+        """Registra no índice a data da última execução de uma configuração salva"""
+        with self._lock:
+            self.index()
+            entries = self._index['configs']
+            if name not in entries:
+                return
+            entries[name]['last_run'] = datetime.now().isoformat(timespec='seconds')
+            entries[name]['last_status'] = status
+            self._write_index()
+
+    def path_prefix(self):
+        """Prefixo configurado (relido só quando path_prefix.json muda) ou detectado automaticamente"""
+        with self._lock:
+            signature = _signature(self.prefix_path)
+            if self._prefix is not None and self._prefix[0] == signature:
+                return self._prefix[1]
+            prefix = None
+            if signature is not None:
+                try:
+                    with open(self.prefix_path, 'r') as f:
+                        prefix = json.load(f).get('prefix', '')
+                except (OSError, ValueError):
+                    pass
+            if prefix is None:
+                prefix = _detect_path_prefix()
+            self._prefix = (signature, prefix)
+            return prefix
+
+    def set_path_prefix(self, prefix):
+        with self._lock:
+            _write_json(self.prefix_path, {'prefix': prefix})
+            self._prefix = (_signature(self.prefix_path), prefix)
+
+
+_store = ConfigStore()
 
 
 def get_path_prefix():
     """Obtém o prefixo de path configurado ou detecta automaticamente"""
-    try:
-        with open(PATH_PREFIX_CONFIG, 'r') as f:
-            config = json.load(f)
-            return config.get('prefix', '')
-    except (FileNotFoundError, json.JSONDecodeError):
-        home = os.path.expanduser("~")
-        common_patterns = ['stk-dev', 'projects', 'workspace', 'dev', 'code']
-        for pattern in common_patterns:
-            potential_prefix = os.path.join(home, pattern)
-            if os.path.isdir(potential_prefix):
-                return potential_prefix + os.sep
-        return ''
+    return _store.path_prefix()
 
 
 def set_path_prefix(prefix):
     """Define o prefixo de path a ser removido"""
-    with open(PATH_PREFIX_CONFIG, 'w') as f:
-        json.dump({'prefix': prefix}, f, indent=2)
+    _store.set_path_prefix(prefix)
     print(f"✅ Prefixo de path configurado: {prefix}")
 
 
 def save_config(config_name, config_data):
-    config_path = os.path.join(CONFIG_DIR, f"{config_name}.json")
     try:
-        with open(config_path, 'w', encoding='utf-8') as f:
-            json.dump(config_data, f, indent=2)
+        config_path = _store.save(config_name, config_data)
         print(f"✅ Configuração '{config_name}' salva com sucesso!")
         print(f"📁 Local: {config_path}")
         return True
@@ -41,10 +267,8 @@ def save_config(config_name, config_data):
 
 
 def load_config(config_name):
-    config_path = os.path.join(CONFIG_DIR, f"{config_name}.json")
     try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return _store.load(config_name)
     except FileNotFoundError:
         print(f"❌ Configuração '{config_name}' não encontrada.")
         return None
@@ -54,15 +278,21 @@ def load_config(config_name):
 
 
 def list_configs():
-    configs = [f.replace('.json', '') for f in os.listdir(CONFIG_DIR) if
-               f.endswith('.json') and f != 'path_prefix.json']
-    return configs
+    return _store.names()
+
+
+def config_index():
+    """Resumo das configurações salvas por nome (modo, diretório, tamanho, última execução), sem abrir os JSON"""
+    return _store.index()
+
+
+def record_run(config_name, status='ok'):
+    _store.record_run(config_name, status)
 
 
 def delete_config(config_name):
-    config_path = os.path.join(CONFIG_DIR, f"{config_name}.json")
     try:
-        os.remove(config_path)
+        _store.delete(config_name)
         print(f"✅ Configuração '{config_name}' removida.")
         return True
     except FileNotFoundError:
@@ -37,3 +37,120 @@ EXCLUDED_FILES = [
 CONFIG_DIR = os.path.join(os.path.expanduser("~"), ".merge_files_configs")
 os.makedirs(CONFIG_DIR, exist_ok=True)
 PATH_PREFIX_CONFIG = os.path.join(CONFIG_DIR, "path_prefix.json")
+# Índice das configurações salvas (nome, modo, diretório, tamanho, última execução),
+# para listar sem abrir cada JSON; fica num subdiretório para que a própria
+# gravação não altere a mtime de CONFIG_DIR, usada (com o tamanho e a mtime de
+# cada configuração) para invalidar o índice
+CONFIG_INDEX_PATH = os.path.join(CONFIG_DIR, ".cache", "index.json")
+CONFIG_INDEX_VERSION = 1
+
+# Acima deste tamanho (bytes) o spool do bundle em construção vai para disco
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+# Threads usadas para ler arquivos em paralelo (1 = leitura sequencial)
+DEFAULT_READ_WORKERS = 8
+
+# Bundles do modo 2 gerados em paralelo (1 = uma subpasta por vez)
+DEFAULT_SUBFOLDER_WORKERS = 1
+# Peso (em bytes estimados) de cada entrada de uma subpasta sem bundle anterior
+SUBFOLDER_ENTRY_WEIGHT = 4096
+
+# Tamanho dos blocos copiados do spool para o bundle final
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Manifestos da geração incremental ficam em _kslist/.manifest/
+MANIFEST_DIRNAME = '.manifest'
+MANIFEST_VERSION = 5
+
+# Bundles delta (chave 'delta'): sufixo do bundle com só as alterações (`nome.delta.md`) e
+# snapshot (path, tamanho, mtime e sha256 de cada arquivo) gravado em MANIFEST_DIRNAME
+DELTA_SUFFIX = '.delta'
+SNAPSHOT_SUFFIX = '.snapshot.json'
+SNAPSHOT_VERSION = 1
+
+# Varredura da árvore: threads usadas para listar diretórios em paralelo, quantos
+# diretórios visitar antes de ativá-las e quantas listagens antecipar por thread
+DEFAULT_WALK_WORKERS = 4
+WALK_PARALLEL_THRESHOLD = 64
+WALK_PREFETCH_PER_WORKER = 8
+
+# Modo de I/O (chave 'io_mode'): 'thread' (padrão) ou 'async', que sobrepõe a latência
+# de listagem, stat e leitura em sistemas de arquivos lentos por operação (rede, WSL,
+# FUSE); chamadas bloqueantes simultâneas no modo async (chave 'io_concurrency') e
+# quantos resultados prontos antecipar por chamada
+IO_MODES = ('thread', 'async')
+DEFAULT_IO_CONCURRENCY = 64
+ASYNC_IO_WINDOW_PER_WORKER = 4
+
+# Regras de .gitignore aninhados são respeitadas por padrão (chave 'use_gitignore')
+GITIGNORE_FILENAME = '.gitignore'
+
+# Classificação de conteúdo: bytes inspecionados para detectar binários, fração
+# máxima de caracteres de controle num texto e limite de tamanho (0 = sem limite)
+# acima do qual só o início e o fim do arquivo entram no bundle
+BINARY_SNIFF_SIZE = 8192
+BINARY_CONTROL_RATIO = 0.3
+DEFAULT_MAX_FILE_SIZE = 2 * 1024 * 1024
+
+# Arquivos UTF-8 a partir deste tamanho são copiados do disco direto para o bundle
+# (copy_file_range/sendfile/mmap) em vez de passarem pela memória
+PASSTHROUGH_MIN_SIZE = 1024 * 1024
+
+# Divisão de bundles em partes (chaves 'max_part_bytes' / 'max_part_tokens', 0 = sem divisão):
+# bytes por token usados na estimativa e nome de cada parte
+BYTES_PER_TOKEN = 4
+PART_FILENAME_FORMAT = '{stem}.part-{number:03d}{ext}'
+
+# Deduplicação por sha256: arquivos menores que isso (ex.: __init__.py vazios) são
+# sempre emitidos, pois a referência não seria menor que o próprio conteúdo
+DEDUP_MIN_SIZE = 64
+
+# CLI (cli.py): configurações executadas em paralelo num lote
+DEFAULT_BATCH_WORKERS = 4
+
+# Pasta dos bundles gerados, criada dentro do diretório processado. Nunca é
+# tratada como subpasta do modo 2, seja qual for o ignore_dirs
+KSLIST_DIRNAME = '_kslist'
+
+# ignore_dirs assumido quando uma configuração salva não define a chave
+DEFAULT_CONFIG_IGNORE_DIRS = ['.venv', '.git', '.idea', '__pycache__', KSLIST_DIRNAME]
+
+# ignore_dirs das configurações criadas agora: menu interativo, --dir no CLI e
+# rota avulsa do servidor
+DEFAULT_IGNORE_DIRS = ['.venv', '.git', '.idea', '__pycache__', 'assets', '_kslist']
+
+# Modo watch: espera (s) sem novos eventos antes de regenerar, intervalo (s) da
+# varredura por polling (usada quando inotify não está disponível) e tamanho do
+# buffer de leitura dos eventos do inotify
+WATCH_DEBOUNCE = 0.5
+WATCH_POLL_INTERVAL = 1.0
+WATCH_READ_SIZE = 64 * 1024
+
+# Relatório de execução (chave 'run_report'): sufixo do JSON gravado ao lado do
+# bundle e intervalo mínimo (s) entre as linhas de progresso no console
+RUN_REPORT_SUFFIX = '.report.json'
+PROGRESS_INTERVAL = 2.0
+
+# Índice de seções gravado ao lado de cada bundle (chave 'bundle_index'): sufixo do
+# arquivo e versão do formato (path, parte, offset, tamanho, linguagem e sha256 por seção)
+BUNDLE_INDEX_SUFFIX = '.index.json'
+BUNDLE_INDEX_VERSION = 1
+
+# Formatos gravados junto com o Markdown (chave 'output_formats'): sufixo de cada um
+# e assinatura do pack (início e fim do arquivo)
+OUTPUT_FORMAT_SUFFIXES = {'jsonl': '.jsonl', 'pack': '.pack'}
+PACK_MAGIC = b'KSPACK01'
+
+# Compressão dos bundles (chave 'compression'): sufixo de cada codec da stdlib,
+# nível padrão de cada um e tamanho (bytes) abaixo do qual um bundle não
+# dividido é gravado sem compressão, pois o ganho não compensa
+COMPRESSION_SUFFIXES = {'gzip': '.gz', 'bz2': '.bz2', 'xz': '.xz'}
+DEFAULT_COMPRESSION_LEVELS = {'gzip': 6, 'bz2': 9, 'xz': 6}
+COMPRESS_MIN_SIZE = 16 * 1024
+
+# Modo servidor (`cli.py --serve`): endereço padrão (só a máquina local), limite (bytes)
+# da soma dos bundles mantidos no cache LRU e tamanho dos blocos enviados na resposta
+DEFAULT_SERVER_HOST = '127.0.0.1'
+DEFAULT_SERVER_PORT = 8765
+DEFAULT_SERVER_CACHE_BYTES = 256 * 1024 * 1024
+SERVER_CHUNK_SIZE = 64 * 1024
@@ -0,0 +1,72 @@
+import os
+import threading
+
+
+class ContentIndex:
+    """Registro dos conteúdos já emitidos, por sha256, para deduplicação.
+
+    A primeira ocorrência de um conteúdo é a que vai inteira para o bundle; as
+    seguintes viram referência a ela. Um mesmo índice pode ser compartilhado
+    entre os bundles de uma execução do modo 2 (com threads, não processos).
+
+    As ocorrências de um bundle ficam pendentes até ele ser gravado
+    (`commit`): só então passam a valer para os outros bundles, com o nome do
+    arquivo (ou da parte) onde estão. Um bundle descartado (`discard`) nunca é
+    referenciado. Com `set_order`, cada bundle espera os anteriores da ordem
+    serem concluídos antes da primeira consulta, então a cópia completa fica
+    sempre no mesmo bundle, qualquer que seja a ordem em que as threads rodam.
+    """
+
+    def __init__(self):
+        self._first = {}
+        self._pending = {}
+        self._order = {}
+        self._done = set()
+        self._condition = threading.Condition()
+
+    def set_order(self, bundle_names):
+        """Fixa a ordem em que os bundles `bundle_names` consultam o índice"""
+        with self._condition:
+            self._order = {bundle_name: rank for rank, bundle_name in enumerate(bundle_names)}
+
+    def _earlier_done(self, bundle_name):
+        rank = self._order.get(bundle_name)
+        if rank is None:
+            return True
+        return all(name in self._done for name, other in self._order.items() if other < rank)
+
+    def find(self, sha256, bundle_name):
+        """Primeira ocorrência do conteúdo como (path exibido, arquivo, parte), ou None.
+
+        Num bundle já gravado vem o nome do arquivo (parte None); no próprio
+        `bundle_name` vem a parte (0, 1, ...) e o arquivo None.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._earlier_done(bundle_name))
+            first = self._first.get(sha256)
+            if first is not None:
+                return first[0], first[1], None
+            pending = self._pending.get(bundle_name, {}).get(sha256)
+            if pending is not None:
+                return pending[0], None, pending[1]
+            return None
+
+    def add(self, sha256, display_path, bundle_name, part=0):
+        """Registra a ocorrência completa gravada na parte `part` de `bundle_name` (pendente até o `commit`)"""
+        with self._condition:
+            self._pending.setdefault(bundle_name, {}).setdefault(sha256, (display_path, part))
+
+    def commit(self, bundle_name, outputs):
+        """Bundle gravado: as ocorrências pendentes passam a valer para os outros, em `outputs[parte]`"""
+        with self._condition:
+            for sha256, (display_path, part) in self._pending.pop(bundle_name, {}).items():
+                self._first.setdefault(sha256, (display_path, os.path.basename(outputs[part])))
+            self._done.add(bundle_name)
+            self._condition.notify_all()
+
+    def discard(self, bundle_name):
+        """Bundle não gravado (ou com erro): as ocorrências pendentes são esquecidas"""
+        with self._condition:
+            self._pending.pop(bundle_name, None)
+            self._done.add(bundle_name)
+            self._condition.notify_all()
@@ -0,0 +1,184 @@
+import json
+import mmap
+import os
+import struct
+
+from src.constants import COPY_CHUNK_SIZE, OUTPUT_FORMAT_SUFFIXES, PACK_MAGIC
+from src.reader import refresh_if_changed
+
+# Pack: cabeçalho de cada registro (tamanho do JSON de metadados, tamanho do conteúdo)
+# e rodapé (offset da tabela de registros, quantidade de registros, assinatura)
+_RECORD_HEADER = struct.Struct('<IQ')
+_FOOTER = struct.Struct('<QQ8s')
+# Fecho da seção Markdown gravada pelo BundleWriter (após o conteúdo do arquivo)
+SECTION_END = b'\n```\n\n'
+
+
+def validate_formats(formats):
+    """Normaliza a lista de formatos extras (ex.: ['jsonl', 'pack']); ValueError para formato desconhecido"""
+    formats = tuple(dict.fromkeys(formats or ()))
+    for output_format in formats:
+        if output_format not in OUTPUT_FORMAT_SUFFIXES:
+            raise ValueError(f"formato desconhecido: {output_format!r} (use {', '.join(OUTPUT_FORMAT_SUFFIXES)})")
+    return formats
+
+
+def format_path(output_path, output_format):
+    """Arquivo do formato extra ao lado do bundle (`nome.jsonl`, `nome.pack`)"""
+    return os.path.splitext(output_path)[0] + OUTPUT_FORMAT_SUFFIXES[output_format]
+
+
+def section_content(section):
+    """Conteúdo de uma seção Markdown já renderizada (ex.: reaproveitada do bundle anterior)"""
+    start = section.index(b'\n', section.index(b'\n\n```') + 2) + 1
+    return section[start:len(section) - len(SECTION_END)]
+
+
+def _iter_source(record):
+    """Conteúdo de um registro `source` (arquivo grande copiado do disco), em blocos"""
+    remaining = record['size']
+    with open(record['source'], 'rb') as source:
+        source.seek(record.get('offset', 0))
+        while remaining > 0:
+            chunk = source.read(min(COPY_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def record_content(record):
+    """Conteúdo (bytes UTF-8) que o registro coloca no bundle, ou None (binário, duplicado, só paths)"""
+    if 'data' in record:
+        return record['data']
+    if 'section' in record:
+        return section_content(record['section'])
+    if 'source' in record:
+        reloaded = refresh_if_changed(record)
+        if reloaded is not record:
+            return reloaded['data']
+        return b''.join(_iter_source(record))
+    return None
+
+
+class _Sink:
+    """Arquivo de um formato extra, montado num temporário e renomeado só no `close()`"""
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = path + '.tmp'
+        self._file = open(self.tmp_path, 'wb')
+
+    def close(self):
+        self._file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def discard(self):
+        self._file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+class JsonlSink(_Sink):
+    """Um objeto JSON por linha e por arquivo, com os metadados e o conteúdo em `content`"""
+
+    def add(self, meta, record):
+        content = record_content(record)
+        line = dict(meta, content=content.decode('utf-8') if content is not None else None)
+        self._file.write(json.dumps(line, ensure_ascii=False).encode('utf-8'))
+        self._file.write(b'\n')
+
+
+class PackSink(_Sink):
+    """Pack binário com prefixo de tamanho, pensado para ser lido com mmap.
+
+    Layout (inteiros little-endian): PACK_MAGIC; para cada arquivo, u32 com o
+    tamanho do JSON de metadados, u64 com o tamanho do conteúdo, o JSON e o
+    conteúdo cru (UTF-8); no fim, a tabela com o offset (u64) de cada registro
+    e o rodapé: offset da tabela (u64), quantidade de registros (u64) e
+    PACK_MAGIC de novo.
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._offsets = []
+        self._file.write(PACK_MAGIC)
+
+    def add(self, meta, record):
+        encoded = json.dumps(meta, ensure_ascii=False).encode('utf-8')
+        self._offsets.append(self._file.tell())
+        if 'source' in record and 'data' not in record:
+            self._file.write(_RECORD_HEADER.pack(len(encoded), record['size']))
+            self._file.write(encoded)
+            copied = 0
+            for chunk in _iter_source(record):
+                self._file.write(chunk)
+                copied += len(chunk)
+            reloaded = refresh_if_changed(record, copied)
+            if reloaded is record:
+                return
+            # o arquivo mudou durante a cópia: o registro é refeito com o conteúdo relido em memória
+            self._file.seek(self._offsets[-1])
+            self._file.truncate()
+            record = reloaded
+        content = record_content(record) or b''
+        self._file.write(_RECORD_HEADER.pack(len(encoded), len(content)))
+        self._file.write(encoded)
+        self._file.write(content)
+
+    def close(self):
+        table_offset = self._file.tell()
+        for start in range(0, len(self._offsets), 4096):
+            chunk = self._offsets[start:start + 4096]
+            self._file.write(struct.pack(f'<{len(chunk)}Q', *chunk))
+        self._file.write(_FOOTER.pack(table_offset, len(self._offsets), PACK_MAGIC))
+        super().close()
+
+
+SINKS = {'jsonl': JsonlSink, 'pack': PackSink}
+
+
+class PackReader:
+    """Leitura de um `.pack` via mmap: `reader[i]` devolve (metadados, memoryview do conteúdo) sem cópia.
+
+    As memoryviews apontam para o mmap e precisam ser liberadas antes do
+    `close()`.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < len(PACK_MAGIC) + _FOOTER.size or self._mmap[:len(PACK_MAGIC)] != PACK_MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} não é um pack válido")
+        table_offset, self._count, magic = _FOOTER.unpack_from(self._mmap, len(self._mmap) - _FOOTER.size)
+        if magic != PACK_MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} não é um pack válido (rodapé ausente)")
+        self._table_offset = table_offset
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, number):
+        if not 0 <= number < self._count:
+            raise IndexError(number)
+        offset, = struct.unpack_from('<Q', self._mmap, self._table_offset + number * 8)
+        meta_length, content_length = _RECORD_HEADER.unpack_from(self._mmap, offset)
+        start = offset + _RECORD_HEADER.size
+        meta = json.loads(self._mmap[start:start + meta_length])
+        start += meta_length
+        return meta, memoryview(self._mmap)[start:start + content_length]
+
+    def __iter__(self):
+        for number in range(self._count):
+            yield self[number]
+
+    def close(self):
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+
+from src.compression import is_compressed
+from src.constants import MANIFEST_DIRNAME, MANIFEST_VERSION
+from src.reader import read_files, load_file
+
+
+def manifest_path(output_path):
+    return os.path.join(os.path.dirname(output_path), MANIFEST_DIRNAME, os.path.basename(output_path) + '.json')
+
+
+def params_digest(params):
+    encoded = json.dumps(params, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class BundleManifest:
+    """Manifesto de um bundle gerado, salvo em `_kslist/.manifest/<bundle>.json`.
+
+    Guarda path, tamanho, mtime e hash de cada arquivo de entrada, além da
+    posição da seção renderizada dentro do bundle (ou da parte, quando o bundle
+    é dividido) e do digest do bundle. Numa nova execução permite pular bundles
+    sem alterações e reaproveitar seções de arquivos que não mudaram,
+    copiando-as do bundle anterior.
+    """
+
+    def __init__(self, output_path, params, previous=None):
+        self.output_path = output_path
+        self.params = params_digest(params)
+        self.previous = previous or {}
+        self.previous_order = []
+        self.previous_outputs = []
+        self.signatures = []
+        self._by_path = {}
+
+    @classmethod
+    def load(cls, output_path, params):
+        manifest = cls(output_path, params)
+        try:
+            with open(manifest_path(output_path), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return manifest
+
+        if data.get('version') != MANIFEST_VERSION or data.get('params') != manifest.params:
+            return manifest
+        outputs = []
+        for output in data.get('outputs', []):
+            path = os.path.join(os.path.dirname(output_path), output['name'])
+            try:
+                output_stat = os.stat(path)
+            except OSError:
+                return manifest
+            if output.get('size') != output_stat.st_size or output.get('mtime_ns') != output_stat.st_mtime_ns:
+                return manifest
+            outputs.append(path)
+        if not outputs:
+            return manifest
+
+        manifest.previous = {entry['path']: entry for entry in data.get('files', [])}
+        manifest.previous_order = [entry['path'] for entry in data.get('files', [])]
+        manifest.previous_outputs = outputs
+        return manifest
+
+    def scan(self, file_paths, workers, reader=read_files):
+        """Faz stat de todos os arquivos candidatos (via `reader`) e devolve a lista de paths"""
+        self.signatures = []
+        for file_path, stat, error in reader(file_paths, workers=workers, loader=os.stat):
+            if error is not None:
+                self.signatures.append((file_path, None, None))
+            else:
+                self.signatures.append((file_path, stat.st_size, stat.st_mtime_ns))
+        self._by_path = {signature[0]: signature for signature in self.signatures}
+        return [file_path for file_path, _, _ in self.signatures]
+
+    def is_unchanged(self):
+        if not self.previous or [s[0] for s in self.signatures] != self.previous_order:
+            return False
+        return all(self._matches(*signature) for signature in self.signatures)
+
+    def _matches(self, file_path, size, mtime_ns):
+        entry = self.previous.get(file_path)
+        return entry is not None and size is not None and entry['size'] == size and entry['mtime_ns'] == mtime_ns
+
+    def load_file(self, file_path, loader=load_file):
+        """Loader para `read_files`: reaproveita o resultado anterior ou delega para `loader`.
+
+        Seções de bundles comprimidos não são reaproveitadas (exigiria
+        descomprimir o bundle até cada offset); esses arquivos são relidos.
+        """
+        signature = self._by_path.get(file_path)
+        if signature and self._matches(*signature):
+            entry = self.previous[file_path]
+            if entry.get('skipped'):
+                return {'skipped': entry['skipped'], 'size': entry['size']}
+            previous_output = self.previous_outputs[entry.get('part') or 0]
+            if entry.get('offset') is not None and not entry.get('duplicate_of') and not is_compressed(previous_output):
+                with open(previous_output, 'rb') as bundle:
+                    bundle.seek(entry['offset'])
+                    section = bundle.read(entry['length'])
+                return {
+                    'section': section, 'size': entry['size'], 'sha256': entry['sha256'],
+                    'truncated': entry.get('truncated', 0),
+                    'encoding': entry.get('encoding'), 'bytes': entry.get('bytes'), 'lines': entry.get('lines'),
+                }
+        return loader(file_path)
+
+    def save(self, writer):
+        sections = {section['path']: section for section in writer.sections}
+        skipped = {item['path']: item['reason'] for item in writer.skipped}
+        files = []
+        for file_path, size, mtime_ns in self.signatures:
+            if size is None:
+                continue
+            section = sections.get(file_path, {})
+            files.append({
+                'path': file_path,
+                'size': size,
+                'mtime_ns': mtime_ns,
+                'sha256': section.get('sha256'),
+                'offset': section.get('offset'),
+                'length': section.get('length'),
+                'part': section.get('part'),
+                'truncated': section.get('truncated', 0),
+                'encoding': section.get('encoding'),
+                'bytes': section.get('bytes'),
+                'lines': section.get('lines'),
+                'duplicate_of': section.get('duplicate_of'),
+                'skipped': skipped.get(file_path),
+            })
+
+        outputs = []
+        for output_path in writer.outputs:
+            output_stat = os.stat(output_path)
+            outputs.append({
+                'name': os.path.basename(output_path),
+                'size': output_stat.st_size,
+                'mtime_ns': output_stat.st_mtime_ns,
+            })
+        data = {
+            'version': MANIFEST_VERSION,
+            'params': self.params,
+            'sha256': writer.digest,
+            'outputs': outputs,
+            'files': files,
+        }
+        path = manifest_path(self.output_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def remove(self):
+        try:
+            os.remove(manifest_path(self.output_path))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,169 @@
+import os
+import re
+
+from src.constants import EXCLUDED_FILES, GITIGNORE_FILENAME
+
+
+def _translate_segment(segment):
+    """Converte um trecho de padrão do .gitignore (sem '/') para regex"""
+    out = []
+    i, n = 0, len(segment)
+    while i < n:
+        c = segment[i]
+        if c == '\\' and i + 1 < n:
+            out.append(re.escape(segment[i + 1]))
+            i += 2
+            continue
+        if c == '*':
+            while i < n and segment[i] == '*':
+                i += 1
+            out.append('[^/]*')
+            continue
+        if c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            end = segment.find(']', i + 2 if segment[i + 1:i + 2] in ('!', '^') else i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = segment[i + 1:end]
+                if body[:1] in ('!', '^'):
+                    body = '^' + body[1:]
+                out.append('[' + body.replace('\\', '\\\\') + ']')
+                i = end
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+def compile_gitignore_pattern(line):
+    """Compila uma linha de .gitignore em (regex, negado, só_diretórios), ou None se não for regra"""
+    line = line.rstrip('\n').rstrip('\r')
+    if not line or line.startswith('#'):
+        return None
+    while line.endswith(' ') and not line.endswith('\\ '):
+        line = line[:-1]
+    if not line:
+        return None
+
+    negate = line.startswith('!')
+    if negate:
+        line = line[1:]
+    elif line.startswith('\\!') or line.startswith('\\#'):
+        line = line[1:]
+
+    dir_only = line.endswith('/')
+    line = line.rstrip('/')
+    if not line:
+        return None
+
+    anchored = '/' in line
+    line = line.lstrip('/')
+
+    segments = line.split('/')
+    parts = []
+    for idx, segment in enumerate(segments):
+        last = idx == len(segments) - 1
+        if segment == '**':
+            parts.append('.*' if last else '(?:.*/)?')
+        else:
+            parts.append(_translate_segment(segment) + ('' if last else '/'))
+    regex = ''.join(parts)
+    if not anchored:
+        regex = '(?:.*/)?' + regex
+    return re.compile(regex + r'\Z', re.DOTALL), negate, dir_only
+
+
+def _find_repo_root(dir_path):
+    """Sobe a partir de `dir_path` até achar a raiz do repositório git (ou None)"""
+    current = dir_path
+    while True:
+        if os.path.exists(os.path.join(current, '.git')):
+            return current
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+
+
+class PathMatcher:
+    """Decide, uma vez por run, o que entra e o que fica de fora da varredura.
+
+    Junta `ignore_dirs` da configuração (ver `ignores_dir`), EXCLUDED_FILES,
+    o conjunto de extensões e os `.gitignore` aninhados. Os padrões são normalizados e compilados no
+    construtor e as regras de .gitignore são carregadas uma vez por diretório,
+    então cada decisão custa O(1) para nomes/extensões e O(profundidade) para
+    o .gitignore.
+    """
+
+    def __init__(self, root, ignore_dirs=None, extensions=None, excluded_files=EXCLUDED_FILES, use_gitignore=True):
+        ignore_dirs = [os.path.normpath(d) for d in (ignore_dirs or [])]
+        self.ignore_names = frozenset(os.path.basename(d) for d in ignore_dirs)
+        self.ignore_regex = re.compile('|'.join(re.escape(d) for d in ignore_dirs)) if ignore_dirs else None
+        self.extensions = tuple(ext if ext.startswith('.') else f'.{ext}' for ext in extensions) if extensions else None
+        self.excluded_files = frozenset(excluded_files)
+        self.use_gitignore = use_gitignore
+        self._gitignore_base = None
+        self._rule_chains = {}
+        if use_gitignore:
+            root = os.path.abspath(root)
+            self._gitignore_base = _find_repo_root(root) or root
+
+    def ignores_dir(self, dir_path, dir_name=None):
+        """Regras de `ignore_dirs`: nome igual ao padrão ou padrão contido no path"""
+        if dir_name is None:
+            dir_name = os.path.basename(dir_path)
+        if dir_name in self.ignore_names:
+            return True
+        return self.ignore_regex is not None and self.ignore_regex.search(os.path.normpath(dir_path)) is not None
+
+    def is_excluded(self, file_name):
+        return file_name in self.excluded_files
+
+    def matches_extension(self, file_name):
+        return self.extensions is None or file_name.endswith(self.extensions)
+
+    def is_gitignored(self, path, is_dir=False):
+        if not self.use_gitignore:
+            return False
+        path = os.path.abspath(path)
+        ignored = False
+        for base, rules in self._rules_for(os.path.dirname(path)):
+            relative = path[len(base):].lstrip(os.sep)
+            if os.sep != '/':
+                relative = relative.replace(os.sep, '/')
+            for regex, negate, dir_only in rules:
+                if dir_only and not is_dir:
+                    continue
+                if regex.match(relative):
+                    ignored = not negate
+        return ignored
+
+    def _rules_for(self, dir_path):
+        """Cadeia de regras (do .gitignore mais externo ao mais interno) válida para `dir_path`"""
+        chain = self._rule_chains.get(dir_path)
+        if chain is not None:
+            return chain
+
+        base = self._gitignore_base
+        parent = os.path.dirname(dir_path)
+        if dir_path == base or not dir_path.startswith(base.rstrip(os.sep) + os.sep) or parent == dir_path:
+            chain = ()
+        else:
+            chain = self._rules_for(parent)
+
+        rules = self._load_gitignore(dir_path)
+        if rules:
+            chain = chain + ((dir_path, rules),)
+        self._rule_chains[dir_path] = chain
+        return chain
+
+    @staticmethod
+    def _load_gitignore(dir_path):
+        try:
+            with open(os.path.join(dir_path, GITIGNORE_FILENAME), 'r', encoding='utf-8', errors='replace') as f:
+                lines = f.readlines()
+        except OSError:
+            return ()
+        return tuple(rule for rule in map(compile_gitignore_pattern, lines) if rule is not None)
@@ -1,7 +1,12 @@
 import os
 
-from src.config import get_path_prefix, set_path_prefix, list_configs, load_config, save_config, delete_config
-from src.constants import PRESET_EXTENSIONS
+from src.config import (
+    get_path_prefix, set_path_prefix, list_configs, load_config, save_config, delete_config, config_index, record_run
+)
+from src.constants import (
+    PRESET_EXTENSIONS, DEFAULT_READ_WORKERS, DEFAULT_SUBFOLDER_WORKERS, DEFAULT_WALK_WORKERS, DEFAULT_MAX_FILE_SIZE,
+    DEFAULT_CONFIG_IGNORE_DIRS, DEFAULT_IGNORE_DIRS, DEFAULT_IO_CONCURRENCY
+)
 from src.merge import ensure_kslist_dir, merge_files_from_list, process_subfolders, merge_files_from_directory
 from src.utils import normalize_path
 
@@ -75,9 +80,39 @@ def select_output_directory(file_list):
             return None
 
 
+def config_options(config_data):
+    """Opções avançadas de uma configuração, no formato aceito pelas funções de merge"""
+    options = {
+        'read_workers': config_data.get('read_workers', DEFAULT_READ_WORKERS),
+        'incremental': config_data.get('incremental', True),
+        'max_file_size': config_data.get('max_file_size', DEFAULT_MAX_FILE_SIZE),
+        'skip_binary': config_data.get('skip_binary', True),
+        'max_part_bytes': config_data.get('max_part_bytes', 0),
+        'max_part_tokens': config_data.get('max_part_tokens', 0),
+        'index_stats': config_data.get('index_stats', True),
+        'dedup': config_data.get('dedup', True),
+        'run_report': config_data.get('run_report', True),
+        'compression': config_data.get('compression'),
+        'compression_level': config_data.get('compression_level'),
+        'io_mode': config_data.get('io_mode', 'thread'),
+        'io_concurrency': config_data.get('io_concurrency', DEFAULT_IO_CONCURRENCY),
+        'bundle_index': config_data.get('bundle_index', True),
+        'output_formats': config_data.get('output_formats', []),
+        'delta': config_data.get('delta', False),
+    }
+    if config_data.get('modo') != '3':
+        options.update({
+            'walk_workers': config_data.get('walk_workers', DEFAULT_WALK_WORKERS),
+            'use_gitignore': config_data.get('use_gitignore', True),
+        })
+    return options
+
+
 def execute_from_config(config_data):
+    """Executa uma configuração salva e devolve um resumo: {'files': total de arquivos, 'errors': [...]}"""
     modo = config_data.get('modo')
     paths_only = config_data.get('paths_only', False)
+    options = config_options(config_data)
     if modo == '3':
         file_list = config_data.get('file_list', [])
         base_dir = config_data.get('base_dir')
@@ -85,34 +120,47 @@ def execute_from_config(config_data):
         kslist_dir = ensure_kslist_dir(os.path.dirname(output_path))
         output_filename = os.path.basename(output_path)
         output_path = os.path.join(kslist_dir, output_filename)
-        merge_files_from_list(file_list, output_path, base_dir, paths_only=paths_only)
-        print(f"✅ Arquivo gerado: {output_path}")
+        files = merge_files_from_list(file_list, output_path, base_dir, paths_only=paths_only, **options)
+        if not options['delta']:
+            print(f"✅ Arquivo gerado: {output_path}")
+        return {'files': files, 'errors': []}
     else:
         dir_path = config_data.get('dir_path')
         extensions = config_data.get('extensions')
         max_depth = config_data.get('max_depth', 0)
-        ignore_dirs = config_data.get('ignore_dirs', ['.venv', '.git', '.idea', '__pycache__'])
+        ignore_dirs = config_data.get('ignore_dirs', DEFAULT_CONFIG_IGNORE_DIRS)
         if modo == '2':
-            process_subfolders(
+            results = process_subfolders(
                 dir_path,
                 ignore_dirs=ignore_dirs,
                 extensions=extensions,
                 max_depth=max_depth,
-                paths_only=paths_only
+                paths_only=paths_only,
+                subfolder_workers=config_data.get('subfolder_workers', DEFAULT_SUBFOLDER_WORKERS),
+                use_processes=config_data.get('subfolder_executor') == 'process',
+                dedup_across_bundles=config_data.get('dedup_across_bundles', False),
+                **options
             )
+            summary = {
+                'files': sum(result['files'] or 0 for result in results),
+                'errors': [f"{result['name'] or 'root'}: {result['error']}" for result in results if result['error']],
+            }
         else:
             kslist_dir = ensure_kslist_dir(dir_path)
             output_file = os.path.basename(os.path.normpath(dir_path)) + ".md"
             output_path = os.path.join(kslist_dir, output_file)
-            merge_files_from_directory(
+            files = merge_files_from_directory(
                 dir_path,
                 output_path,
                 ignore_dirs=ignore_dirs,
                 extensions=extensions,
                 max_depth=max_depth,
-                paths_only=paths_only
+                paths_only=paths_only,
+                **options
             )
+            summary = {'files': files, 'errors': []}
         print("✅ Processo concluído.")
+        return summary
 
 
 def configure_path_prefix():
@@ -171,6 +219,39 @@ def configure_path_prefix():
         print("✅ Prefixo removido. Paths completos serão exibidos.")
 
 
+def describe_config(name, entry):
+    """Linha de uma configuração salva na listagem, a partir do índice (sem abrir o JSON)"""
+    if not entry:
+        return name
+    details = [f"modo {entry.get('modo')}"]
+    if entry.get('dir'):
+        details.append(entry['dir'])
+    if entry.get('files') is not None:
+        details.append(f"{entry['files']} arquivo(s)")
+    if entry.get('last_run'):
+        status = '' if entry.get('last_status') in (None, 'ok') else f" ({entry['last_status']})"
+        details.append(f"última execução: {entry['last_run'].replace('T', ' ')}{status}")
+    return f"{name} — {' · '.join(details)}"
+
+
+def print_configs(configs):
+    index = config_index()
+    for idx, config in enumerate(configs, 1):
+        print(f"{idx} - {describe_config(config, index.get(config))}")
+
+
+def run_saved_config(config_name, config_data):
+    """Executa uma configuração salva e registra a execução no índice"""
+    print(f"\n🚀 Executando configuração '{config_name}'...")
+    try:
+        summary = execute_from_config(config_data)
+    except Exception:
+        record_run(config_name, 'error')
+        raise
+    record_run(config_name, 'error' if summary['errors'] else 'ok')
+    return summary
+
+
 def manage_configs():
     configs = list_configs()
     if not configs:
@@ -180,8 +261,7 @@ def manage_configs():
     while True:
         print("\n⚙️ Gerenciar configurações salvas")
         print("=" * 40)
-        for idx, config in enumerate(configs, 1):
-            print(f"{idx} - {config}")
+        print_configs(configs)
         print("\n1 - Deletar uma configuração")
         print("2 - Voltar")
 
@@ -255,8 +335,7 @@ def menu():
             print("❌ Nenhuma configuração salva encontrada.")
             return
         print("\n📋 Configurações disponíveis:")
-        for idx, config in enumerate(configs, 1):
-            print(f"{idx} - {config}")
+        print_configs(configs)
         choice = input("\nEscolha uma configuração (número ou nome): ").strip()
         while True:
             try:
@@ -275,8 +354,7 @@ def menu():
                 choice = input("\nEscolha uma configuração (número ou nome): ").strip()
         config_data = load_config(config_name)
         if config_data:
-            print(f"\n🚀 Executando configuração '{config_name}'...")
-            execute_from_config(config_data)
+            run_saved_config(config_name, config_data)
         print("✅ Processo concluído.")
         return
 
@@ -286,8 +364,7 @@ def menu():
             print("❌ Nenhuma configuração salva encontrada.")
         else:
             print("\n📋 Configurações salvas:")
-            for idx, config in enumerate(configs, 1):
-                print(f"{idx} - {config}")
+            print_configs(configs)
 
             print("\n💡 Deseja executar alguma configuração?")
             choice = input("Digite o número da configuração ou pressione Enter para sair: ").strip()
@@ -300,8 +377,7 @@ def menu():
                             config_name = configs[config_idx]
                             config_data = load_config(config_name)
                             if config_data:
-                                print(f"\n🚀 Executando configuração '{config_name}'...")
-                                execute_from_config(config_data)
+                                run_saved_config(config_name, config_data)
                         else:
                             print("❌ Número inválido.")
                     else:
@@ -433,7 +509,7 @@ def menu():
         except Exception:
             max_depth = 0
 
-        ignore_dirs = ['.venv', '.git', '.idea', '__pycache__', 'assets', '_kslist']
+        ignore_dirs = list(DEFAULT_IGNORE_DIRS)
 
         config_data.update({
             'dir_path': dir_path,
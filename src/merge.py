@@ -1,296 +1,881 @@
+import contextlib
+import itertools
 import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 
+from src.async_io import async_read_files, async_walk_files
+from src.bundle_index import index_path
 from src.config import get_path_prefix
-from src.constants import EXTENSION_LANGUAGE_MAP
-from src.utils import should_ignore_dir, is_excluded_file, remove_path_prefix, normalize_path
+from src.constants import (
+    DEFAULT_READ_WORKERS, DEFAULT_SUBFOLDER_WORKERS, DEFAULT_WALK_WORKERS, DEFAULT_MAX_FILE_SIZE, SUBFOLDER_ENTRY_WEIGHT,
+    DEDUP_MIN_SIZE, IO_MODES, DEFAULT_IO_CONCURRENCY, KSLIST_DIRNAME
+)
+from src.dedup import ContentIndex
+from src.formats import format_path
+from src.manifest import BundleManifest
+from src.matcher import PathMatcher
+from src.profiling import Progress, RunStats
+from src.reader import read_files, load_file
+from src.snapshot import load_snapshot, save_snapshot
+from src.utils import is_excluded_file, remove_path_prefix, normalize_path, language_for
+from src.walker import walk_files
+from src.writer import BundleWriter, delta_path, is_bundle_output, record_stats, index_note
 
 
 def ensure_kslist_dir(parent_dir):
-    kslist_dir = os.path.join(parent_dir, "_kslist")
+    kslist_dir = os.path.join(parent_dir, KSLIST_DIRNAME)
     os.makedirs(kslist_dir, exist_ok=True)
     return kslist_dir
 
 
-def merge_files_from_directory(dir_path, output_path, ignore_dirs=None, extensions=None, max_depth=0, paths_only=False):
-    if ignore_dirs is None:
-        ignore_dirs = []
-
-    ignore_dirs = [os.path.normpath(d) for d in ignore_dirs]
-
-    if extensions is not None:
-        extensions = [ext if ext.startswith('.') else f'.{ext}' for ext in extensions]
-
-    base_depth = dir_path.rstrip(os.sep).count(os.sep)
-
-    processed_files = []
-    file_contents = []
-
-    path_prefix = get_path_prefix()
-
-    for root, dirs, files in os.walk(dir_path):
-        current_depth = root.rstrip(os.sep).count(os.sep) - base_depth
-
-        dirs_to_remove = []
-        for d in dirs:
-            full_dir_path = os.path.join(root, d)
-            if should_ignore_dir(full_dir_path, ignore_dirs):
-                dirs_to_remove.append(d)
-                print(f"🚫 Diretório ignorado: {full_dir_path}")
+_FALLBACK_ENCODINGS = ('cp1252', 'latin-1')
 
-        for d in dirs_to_remove:
-            dirs.remove(d)
 
-        if 0 < max_depth <= current_depth + 1:
-            dirs[:] = []
+def _io_setup(io_mode, read_workers, io_concurrency):
+    """(função de leitura, workers de leitura, concorrência do walk/filtros) conforme o modo de I/O.
 
-        for file in files:
-            file_path = os.path.join(root, file)
-
-            if is_excluded_file(file_path):
-                print(f"🔒 Arquivo excluído (sensível): {file_path}")
-                continue
+    No modo 'thread' a concorrência do walk/filtros é None (walk e filtros
+    seguem na thread atual); no 'async' tudo passa pelo event loop com até
+    `io_concurrency` chamadas simultâneas.
+    """
+    if io_mode not in IO_MODES:
+        raise ValueError(f"io_mode desconhecido: {io_mode!r} (use {', '.join(IO_MODES)})")
+    if io_mode == 'async':
+        return async_read_files, io_concurrency, io_concurrency
+    return read_files, read_workers, None
 
-            if extensions and not any(file.endswith(ext) for ext in extensions):
-                continue
 
-            if os.path.normpath(file_path) == os.path.normpath(output_path):
-                continue
+def _fill_bundle(writer, file_paths, paths_only=False, read_workers=DEFAULT_READ_WORKERS, log_added=False,
+                 manifest=None, loader=load_file, content_index=None, stats=None, reader=read_files):
+    """Consome os paths na ordem recebida, lendo o conteúdo em paralelo (via `reader`) quando necessário.
 
-            processed_files.append(file_path)
-
-            if not paths_only:
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as infile:
-                        content = infile.read()
-                except UnicodeDecodeError:
-                    try:
-                        with open(file_path, 'r', encoding='latin-1') as infile:
-                            content = infile.read()
-                    except Exception as e:
-                        print(f"Erro ao ler {file_path}: {e}")
-                        continue
-
-                ext = os.path.splitext(file)[1]
-                lang = EXTENSION_LANGUAGE_MAP.get(ext, ext.lstrip('.'))
-                file_contents.append({
-                    'path': file_path,
-                    'content': content,
-                    'lang': lang
-                })
-
-    with open(output_path, 'w', encoding='utf-8') as outfile:
-        display_path = remove_path_prefix(dir_path, path_prefix)
-        outfile.write(f"# 📁 {display_path}\n\n")
-        outfile.write("# 📋 Índice de Arquivos\n\n")
-        outfile.write(f"**Total de arquivos processados:** {len(processed_files)}\n\n")
-
-        for idx, file_path in enumerate(processed_files, 1):
-            display_file_path = remove_path_prefix(file_path, path_prefix)
-            outfile.write(f"{idx}. `{display_file_path}`\n")
-
-        outfile.write("\n---\n\n")
-        outfile.write("# 📦 Conteúdo dos Arquivos\n\n")
-
-        if paths_only:
-            for file_path in processed_files:
-                display_file_path = remove_path_prefix(file_path, path_prefix)
-                outfile.write(f'{display_file_path}\n')
+    Com `content_index`, arquivos com conteúdo já emitido (mesmo sha256) viram
+    uma referência à primeira ocorrência. O tempo de cada fase e os contadores
+    vão para `stats`; o console recebe só um progresso periódico e, com
+    `log_added`, o total adicionado ao final.
+    """
+    if stats is None:
+        stats = RunStats()
+    progress = Progress(os.path.basename(writer.output_path))
+    writing = stats.phase('write')
+    if paths_only:
+        if writer.index_stats:
+            results = reader(file_paths, workers=read_workers, loader=stats.timed('read', os.stat))
         else:
-            for file_data in file_contents:
-                display_file_path = remove_path_prefix(file_data['path'], path_prefix)
-                outfile.write(f'## 📄 {display_file_path}\n\n')
-                outfile.write(f'```{file_data["lang"]}\n')
-                outfile.write(file_data['content'])
-                outfile.write('\n```\n\n')
-
-
-def merge_files_from_list(file_list, output_path, base_dir=None, paths_only=False):
-    processed_files = []
-    file_contents = []
-    path_prefix = get_path_prefix()
+            results = ((file_path, None, None) for file_path in file_paths)
+        for file_path, stat, _ in results:
+            with writing:
+                writer.add_path_line(file_path, num_bytes=stat.st_size if stat is not None else None)
+            if stat is not None:
+                stats.count('bytes_in', stat.st_size)
+            progress.update()
+        _finish_progress(progress, writer, log_added)
+        return
 
-    for file_path in file_list:
-        file_path = file_path.strip()
-        if not file_path:
+    if manifest is not None:
+        loader = partial(manifest.load_file, loader=loader)
+    for file_path, record, error in reader(file_paths, workers=read_workers, loader=stats.timed('read', loader)):
+        progress.update()
+        if error is not None:
+            writer.add_path(file_path)
+            stats.count('read_errors')
+            print(f"❌ Erro ao ler {file_path}: {error}")
             continue
-        file_path = normalize_path(file_path)
-        if base_dir and not os.path.isabs(file_path):
-            file_path = os.path.join(base_dir, file_path)
-        if is_excluded_file(file_path):
-            print(f"🔒 Arquivo excluído (sensível): {file_path}")
+        stats.count('bytes_in', record.get('size', 0))
+        if 'section' in record:
+            stats.count('files_reused')
+        elif record.get('encoding') in _FALLBACK_ENCODINGS:
+            stats.count('decoded_fallback')
+        with writing:
+            _add_to_bundle(writer, file_path, record, content_index, stats, index_note(record))
+    _finish_progress(progress, writer, log_added)
+
+
+def _add_to_bundle(writer, file_path, record, content_index, stats, note=None):
+    """Grava um registro lido: binário ignorado, referência a um conteúdo já emitido ou seção completa"""
+    if 'skipped' in record:
+        writer.add_skipped(file_path, record['skipped'], record['size'])
+        stats.count('skipped_binary')
+        return
+    if content_index is not None and record.get('sha256'):
+        num_bytes, _ = record_stats(record)
+        if num_bytes is not None and num_bytes >= DEDUP_MIN_SIZE:
+            bundle_name = os.path.basename(writer.output_path)
+            original = content_index.find(record['sha256'], bundle_name)
+            if original is not None:
+                writer.add_duplicate(file_path, original, num_bytes, record['sha256'])
+                return
+            writer.add_record(file_path, language_for(file_path), record, note=note)
+            content_index.add(record['sha256'], writer.display_path(file_path), bundle_name, writer.current_part)
+            return
+    writer.add_record(file_path, language_for(file_path), record, note=note)
+
+
+def _write_delta(writer, output_path, file_paths, read_workers, loader, content_index, stats, reader, run_report,
+                 paths_only=False):
+    """Grava em `writer` (nome.delta.md) só o que mudou desde o snapshot do bundle `output_path`.
+
+    Arquivos com tamanho e mtime iguais aos do snapshot não são relidos, e os
+    relidos com o mesmo sha256 (só a mtime mudou) ficam de fora. Um arquivo
+    novo com o conteúdo de um removido vira um renomeado. Removidos e
+    renomeados vão para o cabeçalho, e o snapshot passa a ser o desta execução.
+    Com `paths_only`, os arquivos mudados ainda são lidos (para o sha256), mas
+    entram só como linha de path, como no bundle completo.
+    """
+    writer.index_title = f"{writer.index_title} (alterações)"
+    with stats.phase('scan'):
+        baseline = load_snapshot(output_path) or {}
+        signatures = {}
+        for file_path, stat, error in reader(file_paths, workers=read_workers, loader=os.stat):
+            signatures[file_path] = None if error is not None else (stat.st_size, stat.st_mtime_ns)
+    hashes = {}
+    changed = []
+    for file_path, signature in signatures.items():
+        previous = baseline.get(file_path)
+        if signature is not None and previous is not None and tuple(previous[:2]) == signature:
+            hashes[file_path] = previous[2]
+        else:
+            changed.append(file_path)
+    stats.count('files_reused', len(signatures) - len(changed))
+    removed = {file_path: entry[2] for file_path, entry in sorted(baseline.items()) if file_path not in signatures}
+    moved_from = {}
+    for file_path, sha256 in removed.items():
+        if sha256:
+            moved_from.setdefault(sha256, []).append(file_path)
+
+    changes = {'files_added': 0, 'files_modified': 0}
+    progress = Progress(os.path.basename(writer.output_path))
+    writing = stats.phase('write')
+    for file_path, record, error in reader(changed, workers=read_workers, loader=stats.timed('read', loader)):
+        progress.update()
+        if error is not None:
+            writer.add_path(file_path)
+            stats.count('read_errors')
+            print(f"❌ Erro ao ler {file_path}: {error}")
             continue
-        if not os.path.isfile(file_path):
-            print(f"⚠️ Aviso: Arquivo não encontrado: {file_path}")
+        stats.count('bytes_in', record.get('size', 0))
+        sha256 = record.get('sha256')
+        hashes[file_path] = sha256
+        previous = baseline.get(file_path)
+        if previous is not None and sha256 is not None and previous[2] == sha256:
+            stats.count('files_touched')
             continue
-
-        processed_files.append(file_path)
-
-        if not paths_only:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as infile:
-                    content = infile.read()
-            except UnicodeDecodeError:
-                try:
-                    with open(file_path, 'r', encoding='latin-1') as infile:
-                        content = infile.read()
-                except Exception as e:
-                    print(f"❌ Erro ao ler {file_path}: {e}")
-                    continue
-
-            ext = os.path.splitext(file_path)[1]
-            lang = EXTENSION_LANGUAGE_MAP.get(ext, ext.lstrip('.'))
-            file_contents.append({
-                'path': file_path,
-                'content': content,
-                'lang': lang
-            })
-            print(f"✅ Conteúdo coletado: {file_path}")
-
-    with open(output_path, 'w', encoding='utf-8') as outfile:
-        outfile.write("# 📋 Índice de Arquivos\n\n")
-        outfile.write(f"**Total de arquivos processados:** {len(processed_files)}\n\n")
-
-        for idx, file_path in enumerate(processed_files, 1):
-            display_file_path = remove_path_prefix(file_path, path_prefix)
-            outfile.write(f"{idx}. `{display_file_path}`\n")
-
-        outfile.write("\n---\n\n")
-        outfile.write("# 📦 Conteúdo dos Arquivos\n\n")
-
-        if paths_only:
-            for file_path in processed_files:
-                display_file_path = remove_path_prefix(file_path, path_prefix)
-                outfile.write(f'{display_file_path}\n')
-                print(f"✅ Path adicionado: {display_file_path}")
-        else:
-            for file_data in file_contents:
-                display_file_path = remove_path_prefix(file_data['path'], path_prefix)
-                outfile.write(f'## 📄 {display_file_path}\n\n')
-                outfile.write(f'```{file_data["lang"]}\n')
-                outfile.write(file_data['content'])
-                outfile.write('\n```\n\n')
-                print(f"✅ Conteúdo adicionado: {display_file_path}")
-
-
-def process_root_files(root_dir, kslist_dir, ignore_dirs=None, extensions=None, paths_only=False):
+        with writing:
+            if previous is None and sha256 in moved_from:
+                old_path = moved_from[sha256].pop(0)
+                if not moved_from[sha256]:
+                    del moved_from[sha256]
+                del removed[old_path]
+                writer.add_renamed(old_path, file_path)
+                continue
+            kind = 'files_added' if previous is None else 'files_modified'
+            stats.count(kind)
+            changes[kind] += 1
+            if paths_only:
+                writer.add_path_line(file_path, num_bytes=signatures[file_path][0] if writer.index_stats else None)
+                continue
+            note = ', '.join(filter(None, ['novo' if previous is None else 'alterado', index_note(record)]))
+            _add_to_bundle(writer, file_path, record, content_index, stats, note)
+    for file_path in removed:
+        writer.add_deleted(file_path)
+
+    _close_bundle(writer, None, stats, run_report, content_index)
+    save_snapshot(output_path, [(file_path, *signature, hashes[file_path])
+                                for file_path, signature in signatures.items()
+                                if signature is not None and file_path in hashes])
+    if not (writer.file_count or writer.deleted or writer.renamed):
+        print(f"⏭️ Sem alterações desde a execução anterior: {writer.output_path}")
+    else:
+        print(f"🧩 {os.path.basename(writer.output_path)}: {changes['files_added']} novo(s), "
+              f"{changes['files_modified']} alterado(s), {len(writer.renamed)} renomeado(s), "
+              f"{len(writer.deleted)} removido(s)")
+    return writer.file_count
+
+
+def _finish_progress(progress, writer, log_added):
+    if log_added or progress.printed:
+        print(f"✅ {progress.label}: {writer.file_count} arquivo(s) adicionado(s)")
+
+
+def _close_bundle(writer, manifest=None, stats=None, run_report=True, content_index=None):
+    with stats.phase('finalize') if stats is not None else contextlib.nullcontext():
+        writer.close()
+        if content_index is not None:
+            content_index.commit(os.path.basename(writer.output_path), writer.outputs)
+        if manifest is not None:
+            manifest.save(writer)
+    if len(writer.outputs) > 1:
+        print(f"✂️ Bundle dividido em {len(writer.outputs)} partes: "
+              f"{os.path.basename(writer.outputs[0])} … {os.path.basename(writer.outputs[-1])}")
+    if stats is not None:
+        stats.count('files_written', writer.file_count)
+        stats.count('duplicates', writer.duplicate_count)
+        stats.count('truncated', writer.truncated_count)
+        _write_run_report(stats, writer.output_path, writer.outputs + writer.extra_outputs, run_report)
+
+
+def _write_run_report(stats, output_path, outputs, run_report):
+    stats.count('bytes_out', sum(os.path.getsize(path) for path in outputs if os.path.exists(path)))
+    if not run_report:
+        return
+    try:
+        stats.write_report(output_path, outputs)
+    except OSError as e:
+        print(f"⚠️ Não foi possível gravar o relatório de {output_path}: {e}")
+
+
+def _sidecar_paths(output_path, params):
+    """Arquivos gravados ao lado do bundle que precisam existir para ele ser mantido (índice, formatos extras)"""
+    paths = [format_path(output_path, output_format) for output_format in params.get('output_formats') or ()]
+    if params.get('bundle_index'):
+        paths.append(index_path(output_path))
+    return paths
+
+
+def _scan_for_changes(output_path, params, file_paths, read_workers, stats, run_report=True, reader=read_files):
+    """Geração incremental: compara os candidatos com o manifesto do bundle anterior.
+
+    Devolve (manifest, file_paths, unchanged); com `unchanged` verdadeiro o
+    bundle existente continua válido e não precisa ser reescrito (o relatório
+    da execução é gravado mesmo assim).
+    """
+    with stats.phase('scan'):
+        manifest = BundleManifest.load(output_path, params)
+        file_paths = manifest.scan(file_paths, read_workers, reader=reader)
+        unchanged = manifest.is_unchanged()
+        if not all(os.path.exists(path) for path in _sidecar_paths(output_path, params)):
+            unchanged = False
+    if unchanged:
+        print(f"⏭️ Sem alterações, bundle mantido: {output_path}")
+        stats.count('files_reused', len(file_paths))
+        _write_run_report(stats, output_path, manifest.previous_outputs, run_report)
+    return manifest, file_paths, unchanged
+
+
+def _match_directory_file(entry, output_path, matcher, stats, log=print):
+    """Aplica os filtros a um arquivo do walk; devolve o path ou None, contando o motivo da exclusão"""
+    file = entry.name
+    file_path = entry.path
+
+    if matcher.is_excluded(file):
+        log(f"🔒 Arquivo excluído (sensível): {file_path}")
+        stats.count('files_excluded')
+        return None
+
+    if not matcher.matches_extension(file):
+        stats.count('files_filtered')
+        return None
+
+    if matcher.is_gitignored(file_path):
+        stats.count('files_gitignored')
+        return None
+
+    if output_path is not None and is_bundle_output(file_path, output_path):
+        return None
+
+    stats.count('files_matched')
+    return file_path
+
+
+def _iter_directory_files(dir_path, output_path, matcher, max_depth, walk_workers, stats, subfolders=None,
+                          io_concurrency=None, log=print):
+    """Paths filtrados do walk de `dir_path`, na ordem do walk.
+
+    Com `subfolders` (lista), as subpastas diretas não ignoradas são
+    registradas nela à medida que a raiz é listada (usado pelo modo 2). Os
+    filtros de cada entrada vão para `stats.for_path` do path dela, para que
+    um roteador atribua ao bundle certo mesmo o trabalho feito adiantado por
+    outra thread. Com `io_concurrency`, o walk e os filtros rodam no event
+    loop (`async_walk_files`). As mensagens de exclusão vão para `log`.
+    """
+    root = os.path.dirname(os.path.join(dir_path, ''))
+
+    def ignore_dir(entry):
+        # subpasta ignorada conta no bundle do diretório onde foi encontrada
+        entry_stats = stats.for_path(os.path.join(os.path.dirname(entry.path), ''))
+        with entry_stats.phase('filter'):
+            top_level = subfolders is not None and os.path.dirname(entry.path) == root
+            if matcher.ignores_dir(entry.path, entry.name):
+                message = "🚫 Diretório ignorado"
+            elif matcher.is_gitignored(entry.path, is_dir=True):
+                message = "🚫 Diretório ignorado (.gitignore)"
+            else:
+                if top_level:
+                    subfolders.append(entry.name)
+                return False
+            log(f"🚫 Subpasta ignorada: {entry.path}" if top_level else f"{message}: {entry.path}")
+            entry_stats.count('dirs_ignored')
+            return True
+
+    if io_concurrency:
+        def accept(entry):
+            entry_stats = stats.for_path(entry.path)
+            with entry_stats.phase('filter'):
+                return _match_directory_file(entry, output_path, matcher, entry_stats, log)
+
+        walker = async_walk_files(dir_path, max_depth=max_depth, ignore_dir=ignore_dir, accept=accept,
+                                  concurrency=io_concurrency, stats=stats)
+        while True:
+            with stats.phase('walk'):
+                file_path = next(walker, None)
+            if file_path is None:
+                return
+            yield file_path
+
+    walker = walk_files(dir_path, max_depth=max_depth, ignore_dir=ignore_dir, workers=walk_workers, stats=stats)
+    while True:
+        with stats.phase('walk'):
+            entry, _ = next(walker, (None, None))
+        if entry is None:
+            return
+        entry_stats = stats.for_path(entry.path)
+        with entry_stats.phase('filter'):
+            file_path = _match_directory_file(entry, output_path, matcher, entry_stats, log)
+        if file_path is not None:
+            yield file_path
+
+
+def merge_files_from_directory(dir_path, output_path, ignore_dirs=None, extensions=None, max_depth=0, paths_only=False,
+                               read_workers=DEFAULT_READ_WORKERS, incremental=False, walk_workers=DEFAULT_WALK_WORKERS,
+                               use_gitignore=True, matcher=None, max_file_size=DEFAULT_MAX_FILE_SIZE, skip_binary=True,
+                               max_part_bytes=0, max_part_tokens=0, index_stats=True, dedup=True,
+                               content_index=None, run_report=True, compression=None, compression_level=None,
+                               io_mode='thread', io_concurrency=DEFAULT_IO_CONCURRENCY, bundle_index=True,
+                               output_formats=(), delta=False, file_paths=None, path_prefix=None, stats=None):
+    """Gera o bundle de um diretório.
+
+    Com `file_paths`, usa os paths já filtrados recebidos (ex.: a fatia de uma
+    subpasta no walk único do modo 2) em vez de percorrer `dir_path`. Com
+    `delta`, grava só as alterações desde a execução anterior em `nome.delta.md`.
+    """
     if ignore_dirs is None:
         ignore_dirs = []
 
+    ignore_dirs = [os.path.normpath(d) for d in ignore_dirs]
+
     if extensions is not None:
         extensions = [ext if ext.startswith('.') else f'.{ext}' for ext in extensions]
 
-    processed_files = []
-    file_contents = []
-    path_prefix = get_path_prefix()
-
-    try:
-        entries = os.listdir(root_dir)
-    except Exception as e:
-        print(f"❌ Erro ao listar diretório {root_dir}: {e}")
+    if matcher is None:
+        matcher = PathMatcher(dir_path, ignore_dirs, extensions, use_gitignore=use_gitignore)
+
+    if stats is None:
+        stats = RunStats()
+    if path_prefix is None:
+        path_prefix = get_path_prefix()
+    reader, read_workers, io_concurrency = _io_setup(io_mode, read_workers, io_concurrency)
+    if file_paths is None:
+        file_paths = _iter_directory_files(dir_path, output_path, matcher, max_depth, walk_workers, stats,
+                                           io_concurrency=io_concurrency)
+
+    manifest = None
+    if incremental and not delta:
+        params = {
+            'kind': 'directory', 'dir_path': dir_path, 'ignore_dirs': ignore_dirs, 'extensions': extensions,
+            'max_depth': max_depth, 'paths_only': paths_only, 'path_prefix': path_prefix,
+            'use_gitignore': matcher.use_gitignore, 'max_file_size': max_file_size, 'skip_binary': skip_binary,
+            'max_part_bytes': max_part_bytes, 'max_part_tokens': max_part_tokens, 'index_stats': index_stats,
+            'dedup': dedup, 'compression': compression, 'compression_level': compression_level,
+            'bundle_index': bundle_index, 'output_formats': list(output_formats),
+        }
+        manifest, file_paths, unchanged = _scan_for_changes(output_path, params, file_paths, read_workers, stats,
+                                                            run_report, reader)
+        if unchanged:
+            return len(file_paths)
+
+    writer = BundleWriter(delta_path(output_path) if delta else output_path,
+                          title=remove_path_prefix(dir_path, path_prefix), path_prefix=path_prefix,
+                          max_part_bytes=max_part_bytes, max_part_tokens=max_part_tokens, index_stats=index_stats,
+                          compression=compression, compression_level=compression_level, bundle_index=bundle_index,
+                          formats=output_formats)
+    loader = partial(load_file, max_file_size=max_file_size, skip_binary=skip_binary, stats=stats)
+    if dedup and content_index is None:
+        content_index = ContentIndex()
+    if delta:
+        return _write_delta(writer, output_path, file_paths, read_workers, loader, content_index if dedup else None,
+                            stats, reader, run_report, paths_only)
+    _fill_bundle(writer, file_paths, paths_only, read_workers, manifest=manifest, loader=loader,
+                 content_index=content_index if dedup else None, stats=stats, reader=reader)
+
+    _close_bundle(writer, manifest, stats, run_report, content_index if dedup else None)
+    return writer.file_count
+
+
+def _match_list_file(file_path, base_dir, stats, log=print):
+    file_path = normalize_path(file_path)
+    if base_dir and not os.path.isabs(file_path):
+        file_path = os.path.join(base_dir, file_path)
+    if is_excluded_file(file_path):
+        log(f"🔒 Arquivo excluído (sensível): {file_path}")
+        stats.count('files_excluded')
+        return None
+    if not os.path.isfile(file_path):
+        log(f"⚠️ Aviso: Arquivo não encontrado: {file_path}")
+        stats.count('files_missing')
+        return None
+    stats.count('files_matched')
+    return file_path
+
+
+def _filter_paths(items, match, stats, io_concurrency=None):
+    """Aplica `match` (path ou None) a cada item, na ordem; com `io_concurrency`, as checagens rodam no event loop"""
+    if not io_concurrency:
+        filtering = stats.phase('filter')
+        for item in items:
+            with filtering:
+                file_path = match(item)
+            if file_path is not None:
+                yield file_path
         return
 
-    for entry in entries:
-        entry_path = os.path.join(root_dir, entry)
+    for _, file_path, error in async_read_files(items, workers=io_concurrency, loader=stats.timed('filter', match)):
+        if error is not None:
+            raise error
+        if file_path is not None:
+            yield file_path
 
-        if os.path.isdir(entry_path):
-            continue
 
-        if is_excluded_file(entry_path):
-            print(f"🔒 Arquivo excluído (sensível): {entry_path}")
-            continue
+def _iter_list_files(file_list, base_dir, stats, io_concurrency=None, log=print):
+    file_list = [file_path for file_path in (line.strip() for line in file_list) if file_path]
+    return _filter_paths(file_list, partial(_match_list_file, base_dir=base_dir, stats=stats, log=log), stats,
+                         io_concurrency)
 
-        if extensions and not any(entry.endswith(ext) for ext in extensions):
-            continue
 
-        processed_files.append(entry_path)
-
-        if not paths_only:
-            try:
-                with open(entry_path, 'r', encoding='utf-8') as infile:
-                    content = infile.read()
-            except UnicodeDecodeError:
-                try:
-                    with open(entry_path, 'r', encoding='latin-1') as infile:
-                        content = infile.read()
-                except Exception as e:
-                    print(f"❌ Erro ao ler {entry_path}: {e}")
-                    continue
-
-            ext = os.path.splitext(entry)[1]
-            lang = EXTENSION_LANGUAGE_MAP.get(ext, ext.lstrip('.'))
-            file_contents.append({
-                'path': entry_path,
-                'content': content,
-                'lang': lang
-            })
-
-    if len(processed_files) == 1 and os.path.basename(processed_files[0]) == '__init__.py':
-        print("ℹ️ Apenas __init__.py encontrado na raiz. Arquivo root não será gerado.")
-        return
+def merge_files_from_list(file_list, output_path, base_dir=None, paths_only=False, read_workers=DEFAULT_READ_WORKERS,
+                          incremental=False, max_file_size=DEFAULT_MAX_FILE_SIZE, skip_binary=True, max_part_bytes=0,
+                          max_part_tokens=0, index_stats=True, dedup=True, run_report=True, compression=None,
+                          compression_level=None, io_mode='thread', io_concurrency=DEFAULT_IO_CONCURRENCY,
+                          bundle_index=True, output_formats=(), delta=False):
+    stats = RunStats()
+    path_prefix = get_path_prefix()
+    reader, read_workers, io_concurrency = _io_setup(io_mode, read_workers, io_concurrency)
+    file_paths = _iter_list_files(file_list, base_dir, stats, io_concurrency)
+
+    manifest = None
+    if incremental and not delta:
+        params = {'kind': 'list', 'base_dir': base_dir, 'paths_only': paths_only, 'path_prefix': path_prefix,
+                  'max_file_size': max_file_size, 'skip_binary': skip_binary, 'max_part_bytes': max_part_bytes,
+                  'max_part_tokens': max_part_tokens, 'index_stats': index_stats, 'dedup': dedup,
+                  'compression': compression, 'compression_level': compression_level, 'bundle_index': bundle_index,
+                  'output_formats': list(output_formats)}
+        manifest, file_paths, unchanged = _scan_for_changes(output_path, params, file_paths, read_workers, stats,
+                                                            run_report, reader)
+        if unchanged:
+            return len(file_paths)
+
+    writer = BundleWriter(delta_path(output_path) if delta else output_path, path_prefix=path_prefix,
+                          max_part_bytes=max_part_bytes, max_part_tokens=max_part_tokens, index_stats=index_stats,
+                          compression=compression, compression_level=compression_level, bundle_index=bundle_index,
+                          formats=output_formats)
+    loader = partial(load_file, max_file_size=max_file_size, skip_binary=skip_binary, stats=stats)
+    if delta:
+        return _write_delta(writer, output_path, file_paths, read_workers, loader, ContentIndex() if dedup else None,
+                            stats, reader, run_report, paths_only)
+    _fill_bundle(writer, file_paths, paths_only, read_workers, log_added=True, manifest=manifest, loader=loader,
+                 content_index=ContentIndex() if dedup else None, stats=stats, reader=reader)
+
+    _close_bundle(writer, manifest, stats, run_report)
+    return writer.file_count
+
+
+def _match_root_file(root_dir, entry, matcher, stats):
+    entry_path = os.path.join(root_dir, entry)
+
+    if os.path.isdir(entry_path):
+        return None
+
+    if matcher.is_excluded(entry):
+        print(f"🔒 Arquivo excluído (sensível): {entry_path}")
+        stats.count('files_excluded')
+        return None
+
+    if not matcher.matches_extension(entry):
+        stats.count('files_filtered')
+        return None
+
+    if matcher.is_gitignored(entry_path):
+        stats.count('files_gitignored')
+        return None
+
+    stats.count('files_matched')
+    return entry_path
+
+
+def _iter_root_files(root_dir, entries, matcher, stats, io_concurrency=None):
+    return _filter_paths(entries, partial(_match_root_file, root_dir, matcher=matcher, stats=stats), stats,
+                         io_concurrency)
+
+
+def _has_root_files(root_files):
+    """Indica se os primeiros arquivos da raiz justificam um bundle root (não só um `__init__.py`)"""
+    return bool(root_files) and root_files != ['__init__.py']
+
+
+def process_root_files(root_dir, kslist_dir, ignore_dirs=None, extensions=None, paths_only=False,
+                       read_workers=DEFAULT_READ_WORKERS, incremental=False, use_gitignore=True, matcher=None,
+                       max_file_size=DEFAULT_MAX_FILE_SIZE, skip_binary=True, max_part_bytes=0, max_part_tokens=0,
+                       index_stats=True, dedup=True, content_index=None, run_report=True, compression=None,
+                       compression_level=None, io_mode='thread', io_concurrency=DEFAULT_IO_CONCURRENCY,
+                       bundle_index=True, output_formats=(), delta=False, file_paths=None, path_prefix=None,
+                       stats=None):
+    """Gera o bundle `root_<nome>.md` com os arquivos diretos da raiz (ou os `file_paths` recebidos)"""
+    if ignore_dirs is None:
+        ignore_dirs = []
 
-    if not processed_files:
-        print("ℹ️ Nenhum arquivo encontrado na raiz do diretório.")
-        return
+    if extensions is not None:
+        extensions = [ext if ext.startswith('.') else f'.{ext}' for ext in extensions]
+
+    if matcher is None:
+        matcher = PathMatcher(root_dir, ignore_dirs, extensions, use_gitignore=use_gitignore)
+
+    if stats is None:
+        stats = RunStats()
+    if path_prefix is None:
+        path_prefix = get_path_prefix()
+    reader, read_workers, io_concurrency = _io_setup(io_mode, read_workers, io_concurrency)
+
+    if file_paths is None:
+        try:
+            with stats.phase('walk'):
+                entries = os.listdir(root_dir)
+        except Exception as e:
+            print(f"❌ Erro ao listar diretório {root_dir}: {e}")
+            return 0
+        stats.count('dirs_visited')
+        file_paths = _iter_root_files(root_dir, entries, matcher, stats, io_concurrency)
 
     dir_name = os.path.basename(os.path.normpath(root_dir))
     output_path = os.path.join(kslist_dir, f"root_{dir_name}.md")
 
-    with open(output_path, 'w', encoding='utf-8') as outfile:
-        display_path = remove_path_prefix(root_dir, path_prefix)
-        outfile.write(f"# 📁 {display_path}\n\n")
-        outfile.write("# 📋 Índice de Arquivos da Raiz\n\n")
-        outfile.write(f"**Total de arquivos processados:** {len(processed_files)}\n\n")
+    manifest = None
+    if incremental and not delta:
+        params = {'kind': 'root', 'root_dir': root_dir, 'extensions': extensions, 'paths_only': paths_only,
+                  'path_prefix': path_prefix, 'use_gitignore': matcher.use_gitignore, 'max_file_size': max_file_size,
+                  'skip_binary': skip_binary, 'max_part_bytes': max_part_bytes, 'max_part_tokens': max_part_tokens,
+                  'index_stats': index_stats, 'dedup': dedup, 'compression': compression,
+                  'compression_level': compression_level, 'bundle_index': bundle_index,
+                  'output_formats': list(output_formats)}
+        manifest, file_paths, unchanged = _scan_for_changes(output_path, params, file_paths, read_workers, stats,
+                                                            run_report, reader)
+        if unchanged:
+            return len(file_paths)
+
+    writer = BundleWriter(
+        delta_path(output_path) if delta else output_path,
+        title=remove_path_prefix(root_dir, path_prefix),
+        index_title="Índice de Arquivos da Raiz",
+        path_prefix=path_prefix,
+        max_part_bytes=max_part_bytes,
+        max_part_tokens=max_part_tokens,
+        index_stats=index_stats,
+        compression=compression,
+        compression_level=compression_level,
+        bundle_index=bundle_index,
+        formats=output_formats
+    )
+    root_files = []
+
+    def track(file_paths):
+        for file_path in file_paths:
+            if len(root_files) < 2:
+                root_files.append(os.path.basename(file_path))
+            yield file_path
+
+    loader = partial(load_file, max_file_size=max_file_size, skip_binary=skip_binary, stats=stats)
+    if dedup and content_index is None:
+        content_index = ContentIndex()
+    if delta:
+        # o delta só grava depois de ver todos os paths, então a checagem vem antes dele
+        file_paths = list(track(file_paths))
+        if _has_root_files(root_files):
+            return _write_delta(writer, output_path, file_paths, read_workers, loader,
+                                content_index if dedup else None, stats, reader, run_report, paths_only)
+    else:
+        _fill_bundle(writer, track(file_paths), paths_only, read_workers, manifest=manifest, loader=loader,
+                     content_index=content_index if dedup else None, stats=stats, reader=reader)
+
+    if not _has_root_files(root_files):
+        writer.discard()
+        if dedup:
+            content_index.discard(os.path.basename(writer.output_path))
+        if manifest is not None:
+            manifest.remove()
+        if root_files:
+            print("ℹ️ Apenas __init__.py encontrado na raiz. Arquivo root não será gerado.")
+        else:
+            print("ℹ️ Nenhum arquivo encontrado na raiz do diretório.")
+        return 0
 
-        for idx, file_path in enumerate(processed_files, 1):
-            display_file_path = remove_path_prefix(file_path, path_prefix)
-            outfile.write(f"{idx}. `{display_file_path}`\n")
+    _close_bundle(writer, manifest, stats, run_report, content_index if dedup else None)
+    print(f"✅ Arquivo root_{dir_name}.md gerado: {output_path}")
+    return writer.file_count
+
+
+def _estimate_subfolder_size(subfolder_path, output_path):
+    """Estimativa barata do trabalho de uma subpasta, usada só para ordenar o agendamento.
 
-        outfile.write("\n---\n\n")
-        outfile.write("# 📦 Conteúdo dos Arquivos\n\n")
+    Usa o tamanho do bundle gerado na execução anterior; sem ele, conta as
+    entradas diretas da subpasta.
+    """
+    try:
+        return os.path.getsize(output_path)
+    except OSError:
+        pass
+    try:
+        with os.scandir(subfolder_path) as it:
+            return sum(SUBFOLDER_ENTRY_WEIGHT for _ in it)
+    except OSError:
+        return 0
 
-        if paths_only:
-            for file_path in processed_files:
-                display_file_path = remove_path_prefix(file_path, path_prefix)
-                outfile.write(f'{display_file_path}\n')
+
+def _run_bundle_task(task):
+    """Executa uma tarefa do modo 2 e devolve um resumo (roda dentro do pool)"""
+    started = time.perf_counter()
+    result = {'name': task['name'], 'output_path': task['output_path'], 'files': 0, 'error': None}
+    try:
+        if task['kind'] == 'root':
+            result['files'] = process_root_files(**task['kwargs'])
+        else:
+            result['files'] = merge_files_from_directory(**task['kwargs'])
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    finally:
+        content_index = task['kwargs'].get('content_index')
+        if content_index is not None:
+            # bundle não gravado (ex.: erro) libera os que esperam a vez dele; após o commit não tem efeito
+            content_index.discard(task['bundle'])
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+
+def _print_subfolders_summary(results):
+    print("\n📊 Resumo das subpastas:")
+    for result in results:
+        name = os.path.basename(result['output_path'])
+        if result['error']:
+            print(f"❌ {name} — erro: {result['error']}")
+        elif not result['files']:
+            print(f"ℹ️ {name} — não gerado (nenhum arquivo)")
         else:
-            for file_data in file_contents:
-                display_file_path = remove_path_prefix(file_data['path'], path_prefix)
-                outfile.write(f'## 📄 {display_file_path}\n\n')
-                outfile.write(f'```{file_data["lang"]}\n')
-                outfile.write(file_data['content'])
-                outfile.write('\n```\n\n')
+            print(f"✅ {name} — {result['files']} arquivo(s) em {result['seconds']:.2f}s")
 
-    print(f"✅ Arquivo root_{dir_name}.md gerado: {output_path}")
+
+def _list_subfolders(root_dir, matcher):
+    subfolders = []
+    for entry in os.scandir(root_dir):
+        if entry.is_dir():
+            if matcher.ignores_dir(entry.path, entry.name) or matcher.is_gitignored(entry.path, is_dir=True):
+                print(f"🚫 Subpasta ignorada: {entry.path}")
+                continue
+            subfolders.append(entry.name)
+    return subfolders
 
 
-def process_subfolders(root_dir, ignore_dirs=None, extensions=None, max_depth=0, paths_only=False):
+def _process_subfolders_parallel(root_dir, kslist_dir, subfolders, root_kwargs, subfolder_kwargs, subfolder_workers,
+                                 use_processes):
+    dir_name = os.path.basename(os.path.normpath(root_dir))
+    tasks = [{
+        'kind': 'root',
+        'name': '',
+        'output_path': os.path.join(kslist_dir, f"root_{dir_name}.md"),
+        'kwargs': dict(root_kwargs, root_dir=root_dir, kslist_dir=kslist_dir),
+    }]
+    for subfolder in subfolders:
+        subfolder_path = os.path.join(root_dir, subfolder)
+        output_path = os.path.join(kslist_dir, f"{subfolder}.md")
+        tasks.append({
+            'kind': 'subfolder',
+            'name': subfolder,
+            'output_path': output_path,
+            'kwargs': dict(subfolder_kwargs, dir_path=subfolder_path, output_path=output_path),
+        })
+
+    for task in tasks:
+        source = root_dir if task['kind'] == 'root' else task['kwargs']['dir_path']
+        task['estimate'] = _estimate_subfolder_size(source, task['output_path'])
+        task['bundle'] = os.path.basename(delta_path(task['output_path']) if root_kwargs['delta']
+                                          else task['output_path'])
+    content_index = root_kwargs['content_index']
+    if content_index is not None:
+        # deduplicação entre bundles: ordem fixa (a do modo sequencial), independente das threads
+        content_index.set_order([task['bundle'] for task in tasks])
+        scheduled = tasks
+    else:
+        scheduled = sorted(tasks, key=lambda t: t['estimate'], reverse=True)
+
+    pool_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    print(f"\n⚡ Processando {len(tasks)} bundle(s) com {subfolder_workers} worker(s)...")
+    with pool_class(max_workers=subfolder_workers) as executor:
+        futures = {task['output_path']: executor.submit(_run_bundle_task, task) for task in scheduled}
+        results = [futures[task['output_path']].result() for task in tasks]
+
+    _print_subfolders_summary(results)
+    return results
+
+
+def subfolders_matcher(root_dir, ignore_dirs=None, extensions=None, use_gitignore=True):
+    """PathMatcher da raiz compartilhado por todos os bundles do modo 2.
+
+    A pasta de saída nunca vira subpasta, mesmo fora do `ignore_dirs` (o dos
+    parâmetros do manifest continua sendo o da configuração).
+    """
+    return PathMatcher(root_dir, list(ignore_dirs or []) + [KSLIST_DIRNAME], extensions, use_gitignore=use_gitignore)
+
+
+def process_subfolders(root_dir, ignore_dirs=None, extensions=None, max_depth=0, paths_only=False,
+                       read_workers=DEFAULT_READ_WORKERS, subfolder_workers=DEFAULT_SUBFOLDER_WORKERS,
+                       use_processes=False, incremental=False, walk_workers=DEFAULT_WALK_WORKERS, use_gitignore=True,
+                       max_file_size=DEFAULT_MAX_FILE_SIZE, skip_binary=True, max_part_bytes=0, max_part_tokens=0,
+                       index_stats=True, dedup=True, dedup_across_bundles=False, run_report=True, compression=None,
+                       compression_level=None, io_mode='thread', io_concurrency=DEFAULT_IO_CONCURRENCY,
+                       bundle_index=True, output_formats=(), delta=False):
     kslist_dir = ensure_kslist_dir(root_dir)
     if ignore_dirs is None:
         ignore_dirs = []
 
-    print(f"\n📁 Processando arquivos da raiz de {root_dir}...")
-    process_root_files(root_dir, kslist_dir, ignore_dirs, extensions, paths_only)
+    matcher = subfolders_matcher(root_dir, ignore_dirs, extensions, use_gitignore)
+    content_index = None
+    if dedup and dedup_across_bundles:
+        if use_processes and subfolder_workers > 1:
+            print("ℹ️ Deduplicação entre bundles não funciona com processos; deduplicando dentro de cada bundle.")
+        else:
+            content_index = ContentIndex()
+            if incremental:
+                print("ℹ️ Deduplicação entre bundles: todos os bundles serão regenerados nesta execução.")
+                incremental = False
+    root_kwargs = dict(ignore_dirs=ignore_dirs, extensions=extensions, paths_only=paths_only,
+                       read_workers=read_workers, incremental=incremental, matcher=matcher,
+                       max_file_size=max_file_size, skip_binary=skip_binary, max_part_bytes=max_part_bytes,
+                       max_part_tokens=max_part_tokens, index_stats=index_stats, dedup=dedup,
+                       content_index=content_index, run_report=run_report, compression=compression,
+                       compression_level=compression_level, io_mode=io_mode, io_concurrency=io_concurrency,
+                       bundle_index=bundle_index, output_formats=output_formats, delta=delta)
+    subfolder_kwargs = dict(root_kwargs, max_depth=max_depth, walk_workers=walk_workers)
+
+    if subfolder_workers > 1:
+        if max_depth == 1:
+            print(f"ℹ️ max_depth=1: processando apenas a raiz, subpastas ignoradas.")
+            subfolders = []
+        else:
+            subfolders = _list_subfolders(root_dir, matcher)
+        return _process_subfolders_parallel(root_dir, kslist_dir, subfolders, root_kwargs, subfolder_kwargs,
+                                            subfolder_workers, use_processes)
 
     if max_depth == 1:
+        print(f"\n📁 Processando arquivos da raiz de {root_dir}...")
+        dir_name = os.path.basename(os.path.normpath(root_dir))
+        started = time.perf_counter()
+        files = process_root_files(root_dir, kslist_dir, **root_kwargs)
         print(f"ℹ️ max_depth=1: processando apenas a raiz, subpastas ignoradas.")
-        return
-
-    print(f"\n📁 Processando subpastas de {root_dir}...")
-    for entry in os.scandir(root_dir):
-        if entry.is_dir():
-            if should_ignore_dir(entry.path, ignore_dirs):
-                print(f"🚫 Subpasta ignorada: {entry.path}")
-                continue
-
-            subfolder = entry.name
-            subfolder_path = os.path.join(root_dir, subfolder)
-            output_path = os.path.join(kslist_dir, f"{subfolder}.md")
+        return [{'name': '', 'output_path': os.path.join(kslist_dir, f"root_{dir_name}.md"), 'files': files,
+                 'error': None, 'seconds': time.perf_counter() - started}]
+
+    return _process_subfolders_single_pass(root_dir, kslist_dir, matcher, max_depth, walk_workers, root_kwargs,
+                                           subfolder_kwargs)
+
+
+class _StatsRouter:
+    """Encaminha as fases e contadores do walk compartilhado para o RunStats de cada bundle.
+
+    O trabalho sobre um path (filtros, listagem de diretórios, com separador
+    no fim) vai para o bundle a que ele pertence (`for_path`), mesmo quando
+    uma thread do pool o faz adiantado enquanto outro bundle está sendo
+    gravado. O resto vai para o bundle em construção (`current`).
+    """
+
+    def __init__(self, root_dir):
+        self.root_prefix = os.path.join(root_dir, '')
+        self._bundles = {}
+        self._lock = threading.Lock()
+        self.current = self.stats('')
+
+    def stats(self, name):
+        """RunStats do bundle `name` ('' = raiz), criado no primeiro uso"""
+        with self._lock:
+            stats = self._bundles.get(name)
+            if stats is None:
+                stats = self._bundles[name] = RunStats()
+            return stats
+
+    def start(self, name):
+        """Passa a gravar o bundle `name`: ele vira o `current` e a sua duração conta a partir daqui"""
+        self.current = self.stats(name)
+        self.current.started = time.perf_counter()
+        return self.current
+
+    def for_path(self, path):
+        return self.stats(_top_level_name(self.root_prefix, path))
+
+    def phase(self, name):
+        return self.current.phase(name)
+
+    def count(self, name, amount=1):
+        self.current.count(name, amount)
+
+
+def _top_level_name(root_prefix, file_path):
+    """Subpasta direta de `file_path` dentro da raiz ('' para arquivos da própria raiz)"""
+    head, sep, _ = file_path[len(root_prefix):].partition(os.sep)
+    return head if sep else ''
+
+
+def _process_subfolders_single_pass(root_dir, kslist_dir, matcher, max_depth, walk_workers, root_kwargs,
+                                    subfolder_kwargs):
+    """Modo 2 sequencial com um único walk da árvore.
+
+    O walk é em profundidade, então os arquivos de cada subpasta direta
+    chegam contíguos: cada fatia vai para o bundle da sua subpasta (ou para
+    o `root_<nome>.md`), que é aberto quando a fatia começa e fechado quando
+    ela termina. Matcher, prefixo de path e filtros são os mesmos para todos
+    os bundles. Subpastas sem nenhum arquivo selecionado ainda geram o bundle
+    vazio; subpastas que são symlinks (não seguidos pelo walk) são percorridas
+    à parte, como antes.
+    """
+    dir_name = os.path.basename(os.path.normpath(root_dir))
+    path_prefix = get_path_prefix()
+    router = _StatsRouter(root_dir)
+    subfolders = []
+    walk_depth = max_depth + 1 if max_depth else 0
+    _, _, io_concurrency = _io_setup(root_kwargs['io_mode'], None, root_kwargs['io_concurrency'])
+    file_paths = _iter_directory_files(root_dir, None, matcher, walk_depth, walk_workers, router, subfolders,
+                                       io_concurrency)
+    results = {}
+
+    def run(name, group):
+        started = time.perf_counter()
+        stats = router.start(name)
+        if not name:
+            print(f"\n📁 Processando arquivos da raiz de {root_dir}...")
+            output_path = os.path.join(kslist_dir, f"root_{dir_name}.md")
+            files = process_root_files(root_dir, kslist_dir, file_paths=group, path_prefix=path_prefix, stats=stats,
+                                       **root_kwargs)
+        else:
+            if len(results) == 1:
+                print(f"\n📁 Processando subpastas de {root_dir}...")
+            subfolder_path = os.path.join(root_dir, name)
+            output_path = os.path.join(kslist_dir, f"{name}.md")
+            if group is None and os.path.islink(subfolder_path):
+                group_kwargs = {}
+            else:
+                group_kwargs = {'file_paths': (path for path in group or ()
+                                               if not is_bundle_output(path, output_path))}
             print(f"Processando {subfolder_path} -> {output_path}")
-            merge_files_from_directory(
-                subfolder_path,
-                output_path,
-                ignore_dirs=ignore_dirs,
-                extensions=extensions,
-                max_depth=max_depth,
-                paths_only=paths_only
-            )
+            files = merge_files_from_directory(subfolder_path, output_path, path_prefix=path_prefix, stats=stats,
+                                               **group_kwargs, **subfolder_kwargs)
+        results[name] = {'name': name, 'output_path': output_path, 'files': files, 'error': None,
+                         'seconds': time.perf_counter() - started}
+
+    root_prefix = os.path.join(root_dir, '')
+    for name, group in itertools.groupby(file_paths, key=partial(_top_level_name, root_prefix)):
+        if name and '' not in results:
+            run('', iter(()))
+        run(name, group)
+    if '' not in results:
+        run('', iter(()))
+    for name in subfolders:
+        if name not in results:
+            run(name, None)
+    return [results['']] + [results[name] for name in subfolders]
@@ -0,0 +1,156 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from src.constants import PROGRESS_INTERVAL, RUN_REPORT_SUFFIX
+
+
+def report_path(output_path):
+    """Relatório da execução, gravado ao lado do bundle (`nome.report.json`)"""
+    return os.path.splitext(output_path)[0] + RUN_REPORT_SUFFIX
+
+
+class _Phase:
+    """Context manager de uma fase numa thread; reutilizável (o estado fica na pilha da thread)"""
+    __slots__ = ('state', 'name')
+
+    def __init__(self, state, name):
+        self.state = state
+        self.name = name
+
+    def __enter__(self):
+        state = self.state
+        now = time.perf_counter()
+        if state.stack:
+            outer = state.stack[-1]
+            state.phases[outer] = state.phases.get(outer, 0.0) + now - state.mark
+        state.stack.append(self.name)
+        state.mark = now
+
+    def __exit__(self, *exc_info):
+        state = self.state
+        now = time.perf_counter()
+        name = state.stack.pop()
+        state.phases[name] = state.phases.get(name, 0.0) + now - state.mark
+        state.mark = now
+
+
+class _ThreadState:
+    __slots__ = ('phases', 'counters', 'stack', 'mark', 'timers')
+
+    def __init__(self):
+        self.phases = {}
+        self.counters = {}
+        self.stack = []
+        self.mark = 0.0
+        self.timers = {}
+
+
+class RunStats:
+    """Tempo por fase e contadores de uma geração de bundle.
+
+    As fases são medidas por thread e de forma exclusiva: uma fase aberta
+    dentro de outra (ex.: a checagem de ignore chamada durante o walk) pausa a
+    de fora, então nenhum intervalo é contado duas vezes. Fases executadas nas
+    threads de leitura (`read`, `decode`) somam o tempo de todas as threads e
+    podem passar do tempo total da execução. Cada thread acumula no próprio
+    estado, sem lock no caminho quente; os totais só são somados no relatório.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._states = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _state(self):
+        try:
+            return self._local.state
+        except AttributeError:
+            state = self._local.state = _ThreadState()
+            with self._lock:
+                self._states.append(state)
+            return state
+
+    def for_path(self, path):
+        """RunStats que recebe o trabalho sobre `path`; um roteador (modo 2) devolve o do bundle do path"""
+        return self
+
+    def count(self, name, amount=1):
+        counters = self._state().counters
+        counters[name] = counters.get(name, 0) + amount
+
+    def phase(self, name):
+        """Context manager da fase `name` na thread atual (pode ser guardado e reutilizado nela)"""
+        state = self._state()
+        timer = state.timers.get(name)
+        if timer is None:
+            timer = state.timers[name] = _Phase(state, name)
+        return timer
+
+    def timed(self, name, func):
+        """Envolve `func` (ex.: o loader do `read_files`) na fase `name`"""
+        def run(*args, **kwargs):
+            with self.phase(name):
+                return func(*args, **kwargs)
+        return run
+
+    def _totals(self, attribute):
+        totals = defaultdict(int)
+        with self._lock:
+            for state in self._states:
+                for name, value in getattr(state, attribute).items():
+                    totals[name] += value
+        return totals
+
+    @property
+    def phases(self):
+        return self._totals('phases')
+
+    @property
+    def counters(self):
+        return self._totals('counters')
+
+    def to_dict(self):
+        return {
+            'seconds': round(time.perf_counter() - self.started, 6),
+            'phases': {name: round(seconds, 6) for name, seconds in sorted(self.phases.items())},
+            'counters': dict(sorted(self.counters.items())),
+        }
+
+    def write_report(self, output_path, outputs):
+        """Grava o relatório JSON ao lado do bundle (escrita atômica) e devolve o path"""
+        data = {
+            'bundle': os.path.basename(output_path),
+            'outputs': [os.path.basename(path) for path in outputs],
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        data.update(self.to_dict())
+        path = report_path(output_path)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        return path
+
+
+class Progress:
+    """Progresso no console com no máximo uma linha a cada `interval` segundos"""
+
+    def __init__(self, label, interval=PROGRESS_INTERVAL):
+        self.label = label
+        self.interval = interval
+        self.count = 0
+        self.printed = False
+        self._next = time.monotonic() + interval
+
+    def update(self, amount=1):
+        self.count += amount
+        now = time.monotonic()
+        if now >= self._next:
+            print(f"⏳ {self.label}: {self.count} arquivo(s) processado(s)...")
+            self.printed = True
+            self._next = now + self.interval
@@ -0,0 +1,297 @@
+import codecs
+import contextlib
+import hashlib
+import os
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from src.constants import (
+    DEFAULT_READ_WORKERS, DEFAULT_MAX_FILE_SIZE, BINARY_SNIFF_SIZE, BINARY_CONTROL_RATIO, COPY_CHUNK_SIZE,
+    PASSTHROUGH_MIN_SIZE
+)
+from src.utils import format_size, count_lines
+
+_TEXT_BYTES = bytes({7, 8, 9, 10, 12, 13, 27} | set(range(0x20, 0x100)) - {0x7f})
+_C1_BYTES = re.compile(rb'[\x80-\x9f]')
+# O BOM de UTF-32 LE começa com os mesmos bytes do de UTF-16 LE, por isso vem antes
+_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+)
+_CODE_UNIT = {'utf-32-le': 4, 'utf-32-be': 4, 'utf-16-le': 2, 'utf-16-be': 2}
+
+
+def is_binary_sample(sample):
+    """Classifica pelos primeiros bytes: NUL ou muitos caracteres de controle indicam binário"""
+    if not sample:
+        return False
+    if b'\0' in sample:
+        return True
+    control = sample.translate(None, _TEXT_BYTES)
+    return len(control) / len(sample) > BINARY_CONTROL_RATIO
+
+
+def sniff_bom(sample):
+    """Devolve (encoding, tamanho do BOM), ou (None, 0) quando não há BOM"""
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding, len(bom)
+    return None, 0
+
+
+def detect_legacy_encoding(data):
+    """Escolhe entre cp1252 e latin-1 para um texto que não é UTF-8.
+
+    Bytes 0x80–0x9F são caracteres de controle em latin-1 mas aspas, travessões
+    e € em cp1252, que é o caso comum em código legado de Windows.
+    """
+    if _C1_BYTES.search(data):
+        try:
+            data.decode('cp1252')
+            return 'cp1252'
+        except UnicodeDecodeError:
+            pass
+    return 'latin-1'
+
+
+def _normalize_newlines(text):
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def decode_text(data, encoding=None):
+    """Decodifica um buffer já lido: UTF-8 ou, se inválido, a codificação legada detectada.
+
+    Devolve (texto, encoding) com as quebras de linha normalizadas.
+    """
+    if encoding is None:
+        try:
+            return _normalize_newlines(data.decode('utf-8')), 'utf-8'
+        except UnicodeDecodeError:
+            encoding = detect_legacy_encoding(data)
+    return _normalize_newlines(data.decode(encoding, errors='replace')), encoding
+
+
+def _is_utf8_prefix(sample):
+    """Indica se a amostra é o início de um texto UTF-8 (um caractere cortado no fim é aceito)"""
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def _utf8_boundaries(head, tail):
+    """Recua o fim de `head` e avança o início de `tail` até fronteiras de caractere UTF-8"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        decoder.decode(head)
+    except UnicodeDecodeError:
+        return head, tail
+    pending = len(decoder.getstate()[0])
+    if pending:
+        head = head[:-pending]
+    start = 0
+    while start < min(len(tail), 3) and tail[start] & 0xC0 == 0x80:
+        start += 1
+    return head, tail[start:]
+
+
+def _truncate_middle(infile, sample, size, max_file_size, encoding, bom_length):
+    unit = _CODE_UNIT.get(encoding, 1)
+    half = (max_file_size // 2) // unit * unit
+    head = sample[bom_length:bom_length + half]
+    if len(head) < half:
+        infile.seek(bom_length + len(head))
+        head += infile.read(half - len(head))
+    tail_start = max(size - half, bom_length + len(head))
+    tail_start -= (tail_start - bom_length) % unit
+    infile.seek(tail_start)
+    tail = infile.read()
+
+    if unit == 1:
+        if encoding is not None or _is_utf8_prefix(sample[bom_length:]):
+            head, tail = _utf8_boundaries(head, tail)
+        newline = head.rfind(b'\n')
+        if newline != -1:
+            head = head[:newline + 1]
+        newline = tail.find(b'\n')
+        if newline != -1:
+            tail = tail[newline + 1:]
+        head_text, detected = decode_text(head, 'utf-8' if encoding == 'utf-8-sig' else None)
+        tail_text, _ = decode_text(tail, detected)
+        encoding = encoding or detected
+    else:
+        head_text, _ = decode_text(head, encoding)
+        tail_text, _ = decode_text(tail, encoding)
+        head_text = head_text[:head_text.rfind('\n') + 1] or head_text
+        tail_text = tail_text[tail_text.find('\n') + 1:]
+
+    omitted = size - len(head) - len(tail) - bom_length
+    marker = f"\n... ✂️ [{format_size(omitted)} omitidos de {format_size(size)}] ...\n\n"
+    return head_text + marker + tail_text, omitted, encoding
+
+
+def _data_record(data, size, encoding, **extra):
+    """Registro com o conteúdo final em UTF-8, já com linhas e sha256 calculados na thread de leitura"""
+    return dict(extra, data=data, size=size, encoding=encoding, lines=count_lines(data),
+                sha256=hashlib.sha256(data).hexdigest())
+
+
+def _text_record(data, size, encoding=None):
+    """Registro de um texto já em memória: UTF-8 válido segue como bytes, sem decode/encode"""
+    if encoding is not None and encoding != 'utf-8-sig':
+        content, encoding = decode_text(data, encoding)
+        return _data_record(content.encode('utf-8'), size, encoding)
+    if b'\r' in data:
+        data = data.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+    if not data.isascii():
+        try:
+            data.decode('utf-8')
+        except UnicodeDecodeError:
+            content, legacy = decode_text(data, detect_legacy_encoding(data))
+            return _data_record(content.encode('utf-8'), size, legacy)
+    return _data_record(data, size, encoding or 'utf-8')
+
+
+def _scan_utf8_stream(infile, first_chunk):
+    """Valida o restante do arquivo como UTF-8 em blocos, calculando sha256 e linhas sem reter o conteúdo.
+
+    Devolve (sha256, linhas), ou None quando o arquivo precisa do caminho em memória (não é UTF-8
+    válido ou tem quebras de linha CR, que são normalizadas).
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    digest = hashlib.sha256()
+    lines = 0
+    last = b'\n'
+    chunk = first_chunk
+    try:
+        while chunk:
+            if b'\r' in chunk:
+                return None
+            if not chunk.isascii() or decoder.getstate()[0]:
+                decoder.decode(chunk)
+            digest.update(chunk)
+            lines += chunk.count(b'\n')
+            last = chunk[-1:]
+            chunk = infile.read(COPY_CHUNK_SIZE)
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        return None
+    return digest.hexdigest(), lines + (last != b'\n')
+
+
+def _decode_phase(stats):
+    return stats.phase('decode') if stats is not None else contextlib.nullcontext()
+
+
+def load_file(file_path, max_file_size=DEFAULT_MAX_FILE_SIZE, skip_binary=True, stats=None):
+    """Loader padrão do pipeline: lê o arquivo uma única vez e devolve o registro com o conteúdo.
+
+    Só os primeiros BINARY_SNIFF_SIZE bytes são lidos antes de decidir: um BOM
+    define a codificação, binários viram `{'skipped': 'binary'}` sem serem
+    lidos por inteiro, e textos acima de `max_file_size` (0 = sem limite)
+    mantêm só o início e o fim. Arquivos UTF-8 seguem como bytes (`data`); os
+    grandes (acima de PASSTHROUGH_MIN_SIZE) são só validados aqui e copiados
+    direto do disco pelo writer (`source`). Codificações legadas (cp1252,
+    latin-1) e UTF-16/32 são decodificadas do mesmo buffer e reconvertidas
+    para UTF-8, e a codificação detectada vai em `encoding`. Todo registro de
+    texto sai com `lines` e `sha256` do conteúdo que vai para o bundle. Com
+    `stats` (RunStats), a decodificação e o hash são medidos na fase `decode`.
+    """
+    with open(file_path, 'rb') as infile:
+        size = os.fstat(infile.fileno()).st_size
+        sample = infile.read(BINARY_SNIFF_SIZE)
+        encoding, bom_length = sniff_bom(sample)
+        if skip_binary and encoding is None and is_binary_sample(sample):
+            return {'skipped': 'binary', 'size': size}
+        if max_file_size and size > max_file_size:
+            with _decode_phase(stats):
+                content, omitted, encoding = _truncate_middle(infile, sample, size, max_file_size, encoding,
+                                                              bom_length)
+                return _data_record(content.encode('utf-8'), size, encoding, truncated=omitted)
+        if encoding in (None, 'utf-8-sig') and size >= PASSTHROUGH_MIN_SIZE:
+            scanned = _scan_utf8_stream(infile, sample[bom_length:])
+            if scanned is not None:
+                return {
+                    'source': file_path, 'offset': bom_length, 'size': infile.tell() - bom_length,
+                    'sha256': scanned[0], 'lines': scanned[1], 'encoding': encoding or 'utf-8',
+                }
+            infile.seek(bom_length)
+            sample = b''
+        else:
+            sample = sample[bom_length:]
+        data = sample + infile.read()
+    with _decode_phase(stats):
+        return _text_record(data, size, encoding)
+
+
+def _source_changed(record):
+    try:
+        return os.stat(record['source']).st_size != record.get('offset', 0) + record['size']
+    except OSError:
+        return True
+
+
+def refresh_if_changed(record, copied=None):
+    """Relê em memória um registro `source` cujo arquivo mudou de tamanho desde a varredura em `load_file`.
+
+    Devolve o próprio registro quando nada mudou (ou ele não é `source`); senão
+    um registro com `data`, `lines` e `sha256` do conteúdo atual. `copied` é
+    quanto uma cópia direta do arquivo acabou de copiar: diferente de `size`,
+    também conta como mudança.
+    """
+    if 'source' not in record:
+        return record
+    if (copied is None or copied == record['size']) and not _source_changed(record):
+        return record
+    offset = record.get('offset', 0)
+    with open(record['source'], 'rb') as infile:
+        infile.seek(offset)
+        data = infile.read()
+    encoding = record.get('encoding')
+    return _text_record(data, offset + len(data), None if encoding == 'utf-8' else encoding)
+
+
+def read_safely(loader, file_path):
+    try:
+        return loader(file_path), None
+    except Exception as e:
+        return None, e
+
+
+def read_files(file_paths, workers=DEFAULT_READ_WORKERS, max_in_flight=None, loader=load_file):
+    """Lê os arquivos num pool de threads, devolvendo (path, conteúdo, erro) na ordem de entrada.
+
+    `file_paths` pode ser um gerador (ex.: o walk); ele é consumido aos poucos e
+    nunca há mais de `max_in_flight` arquivos lidos e ainda não consumidos.
+    `loader` define o que é feito com cada path (por padrão, `load_file`).
+    """
+    if workers is None or workers <= 1:
+        for file_path in file_paths:
+            content, error = read_safely(loader, file_path)
+            yield file_path, content, error
+        return
+
+    if max_in_flight is None:
+        max_in_flight = workers * 2
+    max_in_flight = max(max_in_flight, 1)
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ks-read')
+    pending = deque()
+    try:
+        for file_path in file_paths:
+            pending.append((file_path, executor.submit(read_safely, loader, file_path)))
+            if len(pending) >= max_in_flight:
+                done_path, future = pending.popleft()
+                yield (done_path,) + future.result()
+        while pending:
+            done_path, future = pending.popleft()
+            yield (done_path,) + future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
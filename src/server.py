@@ -0,0 +1,373 @@
+"""Modo servidor HTTP: serve os bundles das configurações sob demanda, direto da memória.
+
+    python cli.py --serve --port 8765
+    curl localhost:8765/bundle/minha-config
+    curl 'localhost:8765/bundle/minha-config?format=jsonl'
+    curl 'localhost:8765/bundle/config-modo-2?subfolder=src'
+    curl 'localhost:8765/bundle?dir=/projeto&ext=.py&ext=.md'
+
+A cada pedido os arquivos da configuração são listados e a impressão digital
+da árvore é calculada só com `stat` (path, tamanho e mtime de cada arquivo).
+Se o bundle dessa configuração com essa impressão digital está no cache, ele
+é enviado sem reler nenhum arquivo; senão é gerado com `src/api.py`, sem
+gravar nada em disco. Bundles cujos arquivos somam mais que o limite do cache
+não são montados em memória: vão para o cliente em blocos, com
+`Transfer-Encoding: chunked`, à medida que são gerados.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from src.api import (
+    fingerprint_paths, iter_directory_paths, iter_list_paths, iter_path_records, render_bundle, render_jsonl
+)
+from src.config import config_index, get_path_prefix, list_configs, load_config
+from src.constants import (
+    DEFAULT_SERVER_HOST, DEFAULT_SERVER_PORT, DEFAULT_SERVER_CACHE_BYTES, SERVER_CHUNK_SIZE, DEFAULT_CONFIG_IGNORE_DIRS,
+    DEFAULT_IGNORE_DIRS, KSLIST_DIRNAME
+)
+from src.menu import config_options
+from src.merge import subfolders_matcher
+from src.utils import format_size, normalize_path, remove_path_prefix
+
+CONTENT_TYPES = {'md': 'text/markdown; charset=utf-8', 'jsonl': 'application/x-ndjson; charset=utf-8'}
+_TRUE_VALUES = ('1', 'true', 'yes', 'sim')
+
+
+class _Flight:
+    """Build em andamento de uma versão de bundle, aguardado pelos pedidos simultâneos"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.data = None
+        self.error = None
+
+
+class BundleCache:
+    """Cache LRU dos bundles renderizados, limitado pela soma dos tamanhos em bytes.
+
+    Guarda uma versão por chave (configuração + formato), válida só para a
+    impressão digital da árvore com que foi gerada: uma versão nova substitui
+    a anterior. Pedidos simultâneos da mesma versão esperam um único build.
+    Bundles maiores que o limite são entregues sem ficar no cache.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_SERVER_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.counters = dict.fromkeys(('hits', 'misses', 'shared', 'evictions', 'errors', 'streamed'), 0)
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, fingerprint, build):
+        """(bytes, status) do bundle `key` na versão `fingerprint`; status é 'hit', 'miss' (gerado) ou 'shared'"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == fingerprint:
+                self._entries.move_to_end(key)
+                self.counters['hits'] += 1
+                return entry[1], 'hit'
+            flight = self._flights.get((key, fingerprint))
+            leader = flight is None
+            if leader:
+                flight = self._flights[(key, fingerprint)] = _Flight()
+                self.counters['misses'] += 1
+            else:
+                self.counters['shared'] += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.data, 'shared'
+
+        try:
+            flight.data = build()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if flight.error is None:
+                    self._store(key, fingerprint, flight.data)
+                else:
+                    self.counters['errors'] += 1
+                del self._flights[(key, fingerprint)]
+            flight.done.set()
+        return flight.data, 'miss'
+
+    def fits(self, size):
+        """Indica se um bundle de `size` bytes pode ficar no cache; senão conta um envio em stream"""
+        if size <= self.max_bytes:
+            return True
+        with self._lock:
+            self.counters['streamed'] += 1
+        return False
+
+    def _store(self, key, fingerprint, data):
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous[1])
+        if len(data) > self.max_bytes:
+            return
+        self._entries[key] = (fingerprint, data)
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+            self.counters['evictions'] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, entries=len(self._entries), bytes=self.size, max_bytes=self.max_bytes,
+                        building=len(self._flights))
+
+
+def _bundle_source(config_data, options, subfolder=None):
+    """(paths, título, título do índice, nome do bundle) da configuração, como o CLI os geraria.
+
+    ValueError para configuração ou pedido inválido; FileNotFoundError quando
+    o CLI não geraria o bundle pedido (ex.: subpasta ignorada no modo 2).
+    """
+    modo = config_data.get('modo')
+    if modo == '3':
+        file_paths = list(iter_list_paths(config_data.get('file_list', []), config_data.get('base_dir')))
+        return file_paths, None, "Índice de Arquivos", os.path.basename(config_data.get('output_path') or 'bundle.md')
+
+    dir_path = config_data.get('dir_path')
+    if not dir_path or not os.path.isdir(dir_path):
+        raise ValueError(f"diretório não encontrado: {dir_path}")
+    ignore_dirs = config_data.get('ignore_dirs', DEFAULT_CONFIG_IGNORE_DIRS)
+    max_depth = config_data.get('max_depth', 0)
+    walk_options = dict(walk_workers=options['walk_workers'], io_mode=options['io_mode'],
+                        io_concurrency=options['io_concurrency'])
+    if modo == '2':
+        return _subfolders_bundle_source(config_data, options, dir_path, ignore_dirs, max_depth, walk_options,
+                                         subfolder)
+    # o CLI grava o bundle do modo 1 em `dir/_kslist/` e não o inclui em si mesmo
+    name = os.path.basename(os.path.normpath(dir_path)) + '.md'
+    file_paths = iter_directory_paths(dir_path, ignore_dirs, config_data.get('extensions'), max_depth,
+                                      options['use_gitignore'],
+                                      output_path=os.path.join(dir_path, KSLIST_DIRNAME, name), **walk_options)
+    return list(file_paths), remove_path_prefix(dir_path, get_path_prefix()), "Índice de Arquivos", name
+
+
+def _subfolders_bundle_source(config_data, options, root_dir, ignore_dirs, max_depth, walk_options, subfolder):
+    """Bundle do modo 2: sem `subfolder`, o `root_<nome>.md`; senão o da subpasta, com os filtros da raiz"""
+    matcher = subfolders_matcher(root_dir, ignore_dirs, config_data.get('extensions'), options['use_gitignore'])
+    root_name = os.path.basename(os.path.normpath(root_dir))
+    title = remove_path_prefix(root_dir, get_path_prefix())
+    if not subfolder:
+        file_paths = list(iter_directory_paths(root_dir, max_depth=1, matcher=matcher, **walk_options))
+        root_files = [os.path.basename(file_path) for file_path in file_paths[:2]]
+        if not root_files or root_files == ['__init__.py']:
+            raise FileNotFoundError(f"sem bundle root_{root_name}.md: a raiz não tem arquivos além de __init__.py")
+        return file_paths, title, "Índice de Arquivos da Raiz", f"root_{root_name}.md"
+
+    if subfolder in (os.curdir, os.pardir) or os.sep in subfolder or '/' in subfolder:
+        raise ValueError("subfolder deve ser o nome de uma subpasta direta")
+    dir_path = os.path.join(root_dir, subfolder)
+    if (max_depth == 1 or not os.path.isdir(dir_path) or matcher.ignores_dir(dir_path, subfolder)
+            or matcher.is_gitignored(dir_path, is_dir=True)):
+        raise FileNotFoundError(f"subpasta sem bundle no modo 2: {subfolder}")
+    file_paths = iter_directory_paths(dir_path, max_depth=max_depth, matcher=matcher,
+                                      output_path=os.path.join(root_dir, KSLIST_DIRNAME, f"{subfolder}.md"),
+                                      **walk_options)
+    return list(file_paths), remove_path_prefix(dir_path, get_path_prefix()), "Índice de Arquivos", f"{subfolder}.md"
+
+
+def get_bundle(cache, config_data, output_format='md', subfolder=None):
+    """Bundle da configuração no formato pedido ('md' ou 'jsonl'): (conteúdo, status do cache, ETag).
+
+    O conteúdo são os bytes do bundle (status 'hit', 'miss' ou 'shared') ou,
+    quando os arquivos somam mais que o limite do cache, um gerador de blocos
+    ainda não iniciado (status 'stream'), que não passa pelo cache. Opções de
+    divisão em partes, compressão e arquivos extras não se aplicam: o bundle
+    é servido inteiro e sem compressão.
+    """
+    if output_format not in CONTENT_TYPES:
+        raise ValueError(f"formato desconhecido: {output_format!r} (use {', '.join(CONTENT_TYPES)})")
+    options = config_options(config_data)
+    file_paths, title, index_title, name = _bundle_source(config_data, options, subfolder)
+    path_prefix = get_path_prefix()
+    key = hashlib.sha256(json.dumps([config_data, subfolder, output_format, path_prefix], sort_keys=True,
+                                    default=str).encode('utf-8')).hexdigest()
+    fingerprint, total_size = fingerprint_paths(file_paths, options['read_workers'], options['io_mode'],
+                                                options['io_concurrency'], with_size=True)
+    etag = f'"{key[:16]}-{fingerprint[:16]}"'
+
+    def render():
+        records = iter_path_records(file_paths, path_prefix, config_data.get('paths_only', False),
+                                    options['max_file_size'], options['skip_binary'], options['dedup'],
+                                    options['read_workers'], options['io_mode'], options['io_concurrency'])
+        if output_format == 'jsonl':
+            return render_jsonl(records)
+        return render_bundle(records, title=title, index_title=index_title, index_stats=options['index_stats'],
+                             name=name)
+
+    if not cache.fits(total_size):
+        return render(), 'stream', etag
+    data, status = cache.get(key, fingerprint, lambda: b''.join(render()))
+    return data, status, etag
+
+
+def config_from_query(query):
+    """Configuração avulsa (modo 1) a partir dos parâmetros da URL: dir, ext, ignore_dir, max_depth, paths_only"""
+    dir_path = _param(query, 'dir')
+    if not dir_path or not os.path.isdir(normalize_path(dir_path)):
+        raise ValueError("o parâmetro dir deve apontar para um diretório existente")
+    try:
+        max_depth = int(_param(query, 'max_depth', '0'))
+    except ValueError:
+        raise ValueError("max_depth deve ser um número inteiro")
+    return {
+        'modo': '1',
+        'dir_path': normalize_path(dir_path),
+        'extensions': query.get('ext') or None,
+        'max_depth': max_depth,
+        'ignore_dirs': query.get('ignore_dir') or list(DEFAULT_IGNORE_DIRS),
+        'paths_only': _param(query, 'paths_only', '').lower() in _TRUE_VALUES,
+    }
+
+
+def _param(query, name, default=None):
+    values = query.get(name)
+    return values[-1] if values else default
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = 'make-ks-api'
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        # cada pedido já gera a sua linha em `_log`
+        pass
+
+    def _log(self, code, detail, started):
+        icon = '📤' if code < 400 else '❌'
+        print(f"{icon} {self.command} {self.path} — {code} {detail} em {time.perf_counter() - started:.2f}s")
+
+    def _send(self, code, body, content_type, headers=()):
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        view = memoryview(body)
+        for start in range(0, len(view), SERVER_CHUNK_SIZE):
+            self.wfile.write(view[start:start + SERVER_CHUNK_SIZE])
+
+    def _send_json(self, code, data, started):
+        body = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+        self._send(code, body, 'application/json; charset=utf-8')
+        self._log(code, data.get('error', '') if code >= 400 else 'json', started)
+
+    def do_GET(self):
+        started = time.perf_counter()
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        route = url.path.rstrip('/') or '/'
+        try:
+            if route == '/configs':
+                self._send_json(200, config_index(), started)
+            elif route == '/stats':
+                self._send_json(200, self.server.cache.stats(), started)
+            elif route == '/bundle' or route.startswith('/bundle/'):
+                self._send_bundle(route, query, started)
+            else:
+                self._send_json(404, {'error': f"rota desconhecida: {url.path}"}, started)
+        except (BrokenPipeError, ConnectionResetError):
+            # cliente desconectou no meio da resposta
+            self.close_connection = True
+
+    def _send_bundle(self, route, query, started):
+        output_format = _param(query, 'format', 'md')
+        try:
+            if route == '/bundle':
+                config_data = config_from_query(query)
+            else:
+                name = unquote(route[len('/bundle/'):])
+                config_data = load_config(name) if name in list_configs() else None
+                if config_data is None:
+                    self._send_json(404, {'error': f"configuração '{name}' não encontrada"}, started)
+                    return
+            data, status, etag = get_bundle(self.server.cache, config_data, output_format, _param(query, 'subfolder'))
+        except ValueError as e:
+            self._send_json(400, {'error': str(e)}, started)
+            return
+        except FileNotFoundError as e:
+            self._send_json(404, {'error': str(e)}, started)
+            return
+        except Exception as e:
+            self._send_json(500, {'error': f"{type(e).__name__}: {e}"}, started)
+            return
+
+        headers = [('ETag', etag), ('X-KS-Cache', status)]
+        if self.headers.get('If-None-Match') == etag:
+            if not isinstance(data, bytes):
+                data.close()
+            self._send(304, b'', CONTENT_TYPES[output_format], headers)
+            self._log(304, status, started)
+            return
+        if not isinstance(data, bytes):
+            self._send_chunked(data, CONTENT_TYPES[output_format], headers, started)
+            return
+        self._send(200, data, CONTENT_TYPES[output_format], headers)
+        self._log(200, f"{status}, {format_size(len(data))}", started)
+
+    def _send_chunked(self, chunks, content_type, headers, started):
+        """Envia os blocos à medida que são gerados; um erro no meio só pode encerrar a conexão"""
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Transfer-Encoding', 'chunked')
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        sent = 0
+        try:
+            for chunk in chunks:
+                view = memoryview(chunk)
+                for start in range(0, len(view), SERVER_CHUNK_SIZE):
+                    block = view[start:start + SERVER_CHUNK_SIZE]
+                    self.wfile.write(b'%x\r\n' % len(block))
+                    self.wfile.write(block)
+                    self.wfile.write(b'\r\n')
+                    sent += len(block)
+            self.wfile.write(b'0\r\n\r\n')
+        except (BrokenPipeError, ConnectionResetError):
+            raise
+        except Exception as e:
+            # cabeçalhos já enviados: sem o bloco final o cliente vê a resposta incompleta
+            self.close_connection = True
+            self._log(500, f"{type(e).__name__}: {e} após {format_size(sent)}", started)
+            return
+        finally:
+            chunks.close()
+        self._log(200, f"stream, {format_size(sent)}", started)
+
+
+def create_server(host=DEFAULT_SERVER_HOST, port=DEFAULT_SERVER_PORT, cache_bytes=DEFAULT_SERVER_CACHE_BYTES):
+    """Servidor HTTP (uma thread por conexão) com o seu cache em `server.cache`; porta 0 escolhe uma livre"""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.cache = BundleCache(cache_bytes)
+    return server
+
+
+def serve(host=DEFAULT_SERVER_HOST, port=DEFAULT_SERVER_PORT, cache_bytes=DEFAULT_SERVER_CACHE_BYTES):
+    """Serve os bundles até Ctrl+C"""
+    server = create_server(host, port, cache_bytes)
+    print(f"🌐 Servindo bundles em http://{host}:{server.server_port} (cache de {format_size(cache_bytes)}). "
+          "Ctrl+C para sair.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Servidor encerrado.")
+    finally:
+        server.server_close()
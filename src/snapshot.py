@@ -0,0 +1,55 @@
+import json
+import os
+from datetime import datetime
+
+from src.constants import MANIFEST_DIRNAME, MANIFEST_VERSION, SNAPSHOT_SUFFIX, SNAPSHOT_VERSION
+from src.manifest import manifest_path
+
+
+def snapshot_path(output_path):
+    """Snapshot do bundle, em `_kslist/.manifest/<bundle>.snapshot.json`"""
+    return os.path.join(os.path.dirname(output_path), MANIFEST_DIRNAME, os.path.basename(output_path) + SNAPSHOT_SUFFIX)
+
+
+def _read_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f), os.stat(path).st_mtime_ns
+    except (OSError, ValueError):
+        return None, None
+
+
+def load_snapshot(output_path):
+    """Estado da execução anterior do bundle: {path: (tamanho, mtime_ns, sha256)}, ou None se não houver.
+
+    Usa o snapshot da última execução delta ou o manifesto da última geração
+    completa (incremental), o que tiver sido gravado por último.
+    """
+    candidates = []
+    data, mtime_ns = _read_json(snapshot_path(output_path))
+    if data is not None and data.get('version') == SNAPSHOT_VERSION:
+        files = {path: tuple(entry) for path, entry in data.get('files', {}).items()}
+        candidates.append((mtime_ns, files))
+    data, mtime_ns = _read_json(manifest_path(output_path))
+    if data is not None and data.get('version') == MANIFEST_VERSION:
+        files = {entry['path']: (entry['size'], entry['mtime_ns'], entry.get('sha256'))
+                 for entry in data.get('files', [])}
+        candidates.append((mtime_ns, files))
+    if not candidates:
+        return None
+    return max(candidates, key=lambda candidate: candidate[0])[1]
+
+
+def save_snapshot(output_path, entries):
+    """Grava o snapshot (escrita atômica) a partir de [(path, tamanho, mtime_ns, sha256)]"""
+    data = {
+        'version': SNAPSHOT_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'files': {path: [size, mtime_ns, sha256] for path, size, mtime_ns, sha256 in entries},
+    }
+    path = snapshot_path(output_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
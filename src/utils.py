@@ -1,7 +1,7 @@
 import os
 
 from src.config import get_path_prefix
-from src.constants import EXCLUDED_FILES
+from src.constants import EXCLUDED_FILES, EXTENSION_LANGUAGE_MAP, BYTES_PER_TOKEN
 
 
 def normalize_path(path):
@@ -19,25 +19,6 @@ def is_excluded_file(file_path):
     return filename in EXCLUDED_FILES
 
 
-def should_ignore_dir(dir_path, ignore_dirs):
-    dir_name = os.path.basename(dir_path)
-    normalized_path = os.path.normpath(dir_path)
-
-    for ignore_pattern in ignore_dirs:
-        ignore_pattern = os.path.normpath(ignore_pattern)
-
-        if dir_name == ignore_pattern or dir_name == os.path.basename(ignore_pattern):
-            return True
-
-        if ignore_pattern in normalized_path:
-            return True
-
-        if normalized_path.endswith(ignore_pattern):
-            return True
-
-    return False
-
-
 def remove_path_prefix(path, prefix=None):
     """Remove o prefixo configurado do path"""
     if prefix is None:
@@ -46,3 +27,40 @@ def remove_path_prefix(path, prefix=None):
     if prefix and path.startswith(prefix):
         return path[len(prefix):]
     return path
+
+
+def language_for(file_path):
+    ext = os.path.splitext(file_path)[1]
+    return EXTENSION_LANGUAGE_MAP.get(ext, ext.lstrip('.'))
+
+
+def format_size(num_bytes):
+    if num_bytes < 1024:
+        return f"{num_bytes} B"
+    for unit in ('KB', 'MB', 'GB'):
+        num_bytes /= 1024
+        if num_bytes < 1024 or unit == 'GB':
+            return f"{num_bytes:.1f} {unit}"
+
+
+def count_lines(text):
+    """Conta linhas de um texto (str ou bytes); a última linha conta mesmo sem quebra final"""
+    newline = b'\n' if isinstance(text, bytes) else '\n'
+    lines = text.count(newline)
+    if text and not text.endswith(newline):
+        lines += 1
+    return lines
+
+
+def estimate_tokens(num_bytes):
+    """Estimativa de tokens a partir do tamanho em bytes (BYTES_PER_TOKEN bytes por token)"""
+    return -(-num_bytes // BYTES_PER_TOKEN)
+
+
+def format_stats(num_bytes, lines=None):
+    """Resumo exibido no índice: tamanho, linhas (quando conhecidas) e tokens estimados"""
+    parts = [format_size(num_bytes)]
+    if lines is not None:
+        parts.append(f"{lines:,} {'linha' if lines == 1 else 'linhas'}".replace(',', '.'))
+    parts.append(f"~{estimate_tokens(num_bytes):,} tokens".replace(',', '.'))
+    return ', '.join(parts)
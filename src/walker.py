@@ -0,0 +1,95 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from src.constants import DEFAULT_WALK_WORKERS, WALK_PARALLEL_THRESHOLD, WALK_PREFETCH_PER_WORKER
+
+
+def list_dir(dir_path):
+    try:
+        with os.scandir(dir_path) as it:
+            return list(it)
+    except OSError:
+        return None
+
+
+def _entry_is_dir(entry):
+    try:
+        return entry.is_dir()
+    except OSError:
+        return False
+
+
+def _entry_is_symlink(entry):
+    try:
+        return entry.is_symlink()
+    except OSError:
+        return False
+
+
+def split_entries(entries, ignore_dir=None):
+    """Separa a listagem de um diretório em (arquivos, subpastas a percorrer)"""
+    files = []
+    subdirs = []
+    for entry in entries:
+        if not _entry_is_dir(entry):
+            files.append(entry)
+        elif ignore_dir is None or not ignore_dir(entry):
+            if not _entry_is_symlink(entry):
+                subdirs.append(entry)
+    return files, subdirs
+
+
+def walk_files(dir_path, max_depth=0, ignore_dir=None, workers=DEFAULT_WALK_WORKERS, stats=None):
+    """Percorre a árvore com `os.scandir`, gerando (DirEntry, profundidade) para cada arquivo.
+
+    A ordem é a mesma do `os.walk` top-down: os arquivos de um diretório vêm
+    antes dos das suas subpastas. `ignore_dir(entry)` decide se uma subpasta é
+    podada e `max_depth` segue a mesma regra das funções de merge (0 = sem
+    limite, 1 = só a raiz). Em árvores grandes (mais de
+    WALK_PARALLEL_THRESHOLD diretórios) a listagem das subpastas é antecipada
+    em `workers` threads, sem alterar a ordem do resultado. Com `stats`
+    (RunStats), conta os diretórios listados em `dirs_visited` (no RunStats
+    de `stats.for_path` do diretório).
+    """
+    executor = None
+    prefetching = 0
+    max_prefetch = max(workers, 1) * WALK_PREFETCH_PER_WORKER
+    visited = 0
+    stack = [(dir_path, 0, None)]
+
+    try:
+        while stack:
+            current_path, depth, future = stack.pop()
+            if future is not None:
+                prefetching -= 1
+                entries = future.result()
+            else:
+                entries = list_dir(current_path)
+            visited += 1
+            if stats is not None:
+                stats.for_path(os.path.join(current_path, '')).count('dirs_visited')
+            if entries is None:
+                continue
+
+            files, subdirs = split_entries(entries, ignore_dir)
+
+            for entry in files:
+                yield entry, depth
+
+            if 0 < max_depth <= depth + 1 or not subdirs:
+                continue
+
+            if executor is None and workers > 1 and visited >= WALK_PARALLEL_THRESHOLD:
+                executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ks-walk')
+
+            children = []
+            for entry in subdirs:
+                child_future = None
+                if executor is not None and prefetching < max_prefetch:
+                    child_future = executor.submit(list_dir, entry.path)
+                    prefetching += 1
+                children.append((entry.path, depth + 1, child_future))
+            stack.extend(reversed(children))
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
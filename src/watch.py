@@ -0,0 +1,348 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+
+from src.constants import (
+    WATCH_DEBOUNCE, WATCH_POLL_INTERVAL, WATCH_READ_SIZE, DEFAULT_CONFIG_IGNORE_DIRS, KSLIST_DIRNAME
+)
+from src.matcher import PathMatcher
+from src.menu import execute_from_config, config_options
+from src.merge import ensure_kslist_dir, merge_files_from_directory, process_root_files
+from src.utils import normalize_path
+from src.walker import walk_files
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+               | IN_DELETE_SELF | IN_MOVE_SELF)
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+def _load_libc():
+    """libc com as funções de inotify, ou None fora do Linux / sem suporte"""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class InotifyWatcher:
+    """Observa diretórios com inotify (via ctypes), sem dependências nem serviços externos.
+
+    Em modo recursivo cada subdiretório não ignorado recebe o seu watch, e
+    diretórios criados depois são adicionados assim que aparecem. Se o
+    kernel recusa um watch por limite (ENOSPC/ENOMEM, ex.:
+    `fs.inotify.max_user_watches`), levanta OSError em vez de deixar a
+    subárvore sem observação; quem chama passa para o polling.
+    """
+
+    def __init__(self, roots, recursive=True, ignore_dir=None, libc=None):
+        self._libc = libc or _load_libc()
+        if self._libc is None:
+            raise OSError("inotify indisponível")
+        self._fd = self._libc.inotify_init1(IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falhou")
+        self.roots = roots
+        self.recursive = recursive
+        self.ignore_dir = ignore_dir
+        self._dirs = {}
+        try:
+            for root in roots:
+                self._add(root)
+        except OSError:
+            self.close()
+            raise
+
+    def _add(self, dir_path):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dir_path), _WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error in (errno.ENOSPC, errno.ENOMEM):
+                raise OSError(error, f"limite de watches do inotify atingido em {dir_path}")
+            # diretório removido ou sem permissão: não há o que observar
+            return
+        self._dirs[wd] = dir_path
+        if not self.recursive:
+            return
+        try:
+            with os.scandir(dir_path) as it:
+                subdirs = [entry for entry in it if entry.is_dir(follow_symlinks=False)]
+        except OSError:
+            return
+        for entry in subdirs:
+            if self.ignore_dir is None or not self.ignore_dir(entry.path, entry.name):
+                self._add(entry.path)
+
+    def wait(self, timeout=None):
+        """Bloqueia até haver eventos (ou `timeout` segundos) e devolve o conjunto de paths alterados"""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        data = os.read(self._fd, WATCH_READ_SIZE)
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, name_length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + name_length].rstrip(b'\0'))
+            offset += name_length
+            if mask & IN_Q_OVERFLOW:
+                changed.update(self.roots)
+                continue
+            dir_path = self._dirs.get(wd)
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            if dir_path is None:
+                continue
+            path = os.path.join(dir_path, name) if name else dir_path
+            if mask & IN_ISDIR:
+                if self.ignore_dir is not None and name and self.ignore_dir(path, name):
+                    continue
+                if self.recursive and mask & (IN_CREATE | IN_MOVED_TO):
+                    self._add(path)
+            changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """Alternativa portátil ao inotify: compara tamanho/mtime dos arquivos a cada intervalo"""
+
+    def __init__(self, roots, recursive=True, ignore_dir=None, interval=WATCH_POLL_INTERVAL):
+        self.roots = roots
+        self.recursive = recursive
+        self.ignore_dir = ignore_dir
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        ignore_entry = None
+        if self.ignore_dir is not None:
+            def ignore_entry(entry):
+                return self.ignore_dir(entry.path, entry.name)
+        for root in self.roots:
+            for entry, _ in walk_files(root, max_depth=0 if self.recursive else 1, ignore_dir=ignore_entry):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                snapshot[entry.path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            delay = self.interval if deadline is None else min(self.interval, max(deadline - time.monotonic(), 0))
+            time.sleep(delay)
+            snapshot = self._scan()
+            changed = {path for path in snapshot.keys() | self._snapshot.keys()
+                       if snapshot.get(path) != self._snapshot.get(path)}
+            self._snapshot = snapshot
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        pass
+
+
+def create_watcher(roots, recursive=True, ignore_dir=None, force_polling=False):
+    """inotify quando disponível; caso contrário, polling"""
+    if not force_polling:
+        try:
+            return InotifyWatcher(roots, recursive, ignore_dir)
+        except OSError as e:
+            if e.errno is not None:
+                print(f"⚠️ {e.strerror}; usando polling.")
+    return PollingWatcher(roots, recursive, ignore_dir)
+
+
+def _list_paths(config_data):
+    """Paths absolutos dos arquivos de uma configuração do modo 3"""
+    base_dir = config_data.get('base_dir')
+    paths = set()
+    for file_path in config_data.get('file_list', []):
+        file_path = normalize_path(file_path.strip())
+        if base_dir and not os.path.isabs(file_path):
+            file_path = os.path.join(base_dir, file_path)
+        paths.add(os.path.abspath(file_path))
+    return paths
+
+
+class _ConfigWatch:
+    """Liga os eventos do sistema de arquivos aos bundles de uma configuração"""
+
+    def __init__(self, config_data):
+        self.config_data = config_data
+        self.modo = config_data.get('modo')
+        if self.modo == '3':
+            self.list_paths = _list_paths(config_data)
+            self.roots = sorted({os.path.dirname(path) for path in self.list_paths
+                                 if os.path.isdir(os.path.dirname(path))})
+            self.matcher = None
+            self.root_only = False
+        else:
+            self.dir_path = os.path.abspath(config_data.get('dir_path'))
+            self.roots = [self.dir_path]
+            # com max_depth=1 o modo 2 gera só o bundle da raiz, como em process_subfolders
+            self.root_only = self.modo == '2' and config_data.get('max_depth', 0) == 1
+            self.matcher = PathMatcher(self.dir_path, config_data.get('ignore_dirs', DEFAULT_CONFIG_IGNORE_DIRS),
+                                       config_data.get('extensions'),
+                                       use_gitignore=config_data.get('use_gitignore', True))
+
+    @property
+    def recursive(self):
+        return self.modo != '3' and not self.root_only
+
+    def ignore_dir(self, dir_path, dir_name):
+        if dir_name == KSLIST_DIRNAME:
+            return True
+        if self.matcher is None:
+            return False
+        return self.matcher.ignores_dir(dir_path, dir_name) or self.matcher.is_gitignored(dir_path, is_dir=True)
+
+    def is_relevant(self, path):
+        path = os.path.abspath(path)
+        if self.modo == '3':
+            return path in self.list_paths
+        relative = os.path.relpath(path, self.dir_path)
+        if relative.startswith(os.pardir) or KSLIST_DIRNAME in relative.split(os.sep):
+            return False
+        if self.root_only and (os.sep in relative or os.path.isdir(path)):
+            return False
+        if os.path.isdir(path) or not os.path.exists(path):
+            return True
+        name = os.path.basename(path)
+        return (not self.matcher.is_excluded(name) and self.matcher.matches_extension(name)
+                and not self.matcher.is_gitignored(path))
+
+    def affected_bundles(self, paths):
+        """Bundles a regenerar: None para a configuração inteira, ou os nomes das subpastas ('' = raiz) no modo 2"""
+        if self.modo != '2' or self.config_data.get('dedup_across_bundles'):
+            return None
+        if self.root_only:
+            return {''}
+        targets = set()
+        for path in paths:
+            relative = os.path.relpath(os.path.abspath(path), self.dir_path)
+            if relative == os.curdir:
+                return None
+            first, sep, _ = relative.partition(os.sep)
+            if sep or os.path.isdir(path):
+                targets.add(first)
+            elif not os.path.exists(path) and os.path.exists(self._bundle_path(first)):
+                targets.add(first)
+            else:
+                targets.add('')
+        return targets
+
+    def _bundle_path(self, subfolder):
+        return os.path.join(self.dir_path, KSLIST_DIRNAME, f"{subfolder}.md")
+
+    def rebuild(self, targets):
+        if targets is None:
+            execute_from_config(self.config_data)
+            return
+        config_data = self.config_data
+        dir_path = config_data.get('dir_path')
+        options = config_options(config_data)
+        kslist_dir = ensure_kslist_dir(dir_path)
+        common = dict(ignore_dirs=config_data.get('ignore_dirs', DEFAULT_CONFIG_IGNORE_DIRS),
+                      extensions=config_data.get('extensions'), paths_only=config_data.get('paths_only', False),
+                      matcher=self.matcher)
+        for target in sorted(targets):
+            if not target:
+                root_options = {key: value for key, value in options.items() if key != 'walk_workers'}
+                process_root_files(dir_path, kslist_dir, **common, **root_options)
+                continue
+            subfolder_path = os.path.join(dir_path, target)
+            if not os.path.isdir(subfolder_path):
+                print(f"ℹ️ Subpasta removida, bundle mantido: {target}.md")
+                continue
+            output_path = self._bundle_path(target)
+            print(f"Processando {subfolder_path} -> {output_path}")
+            merge_files_from_directory(subfolder_path, output_path, max_depth=config_data.get('max_depth', 0),
+                                       **common, **options)
+
+
+def watch_config(config_data, debounce=WATCH_DEBOUNCE, force_polling=False, max_rounds=None):
+    """Gera os bundles da configuração e os mantém atualizados até Ctrl+C.
+
+    Rajadas de eventos são agrupadas: a regeneração só começa após `debounce`
+    segundos sem novas alterações. No modo 2 só os bundles das subpastas
+    afetadas são refeitos; em todos os modos a geração incremental reaproveita
+    as seções dos arquivos que não mudaram. `max_rounds` limita o número de
+    regenerações (útil para testes).
+    """
+    state = _ConfigWatch(config_data)
+    print("🚀 Gerando estado inicial...")
+    execute_from_config(config_data)
+
+    watcher = create_watcher(state.roots, recursive=state.recursive, ignore_dir=state.ignore_dir,
+                             force_polling=force_polling)
+    kind = 'inotify' if isinstance(watcher, InotifyWatcher) else 'polling'
+    print(f"👀 Observando {', '.join(state.roots)} ({kind}). Ctrl+C para sair.")
+
+    def wait(timeout=None):
+        nonlocal watcher
+        try:
+            return watcher.wait(timeout)
+        except OSError as e:
+            # um diretório novo ficou sem watch: passa para o polling e regenera tudo
+            print(f"⚠️ {e.strerror}; usando polling.")
+            watcher.close()
+            watcher = PollingWatcher(state.roots, state.recursive, state.ignore_dir)
+            return set(state.roots)
+
+    rounds = 0
+    try:
+        while max_rounds is None or rounds < max_rounds:
+            changed = {path for path in wait() if state.is_relevant(path)}
+            if not changed:
+                continue
+            while True:
+                more = wait(debounce)
+                if not more:
+                    break
+                changed.update(path for path in more if state.is_relevant(path))
+
+            targets = state.affected_bundles(changed)
+            print(f"\n🔄 {len(changed)} alteração(ões) detectada(s); regenerando "
+                  f"{'tudo' if targets is None else ', '.join(t or 'raiz' for t in sorted(targets))}...")
+            started = time.perf_counter()
+            try:
+                state.rebuild(targets)
+            except Exception as e:
+                print(f"❌ Erro ao regenerar: {type(e).__name__}: {e}")
+            else:
+                print(f"✅ Atualizado em {time.perf_counter() - started:.2f}s")
+            rounds += 1
+    except KeyboardInterrupt:
+        print("\n👋 Watch encerrado.")
+    finally:
+        watcher.close()
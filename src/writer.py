@@ -0,0 +1,625 @@
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+
+from src.bundle_index import index_path, write_bundle_index
+from src.compression import compressed_path, compressing_writer, strip_compression_suffix, validate_compression
+from src.constants import (
+    SPOOL_MAX_SIZE, COPY_CHUNK_SIZE, BYTES_PER_TOKEN, PART_FILENAME_FORMAT, RUN_REPORT_SUFFIX, COMPRESSION_SUFFIXES,
+    COMPRESS_MIN_SIZE, BUNDLE_INDEX_SUFFIX, OUTPUT_FORMAT_SUFFIXES, DELTA_SUFFIX
+)
+from src.formats import SECTION_END, SINKS, format_path, validate_formats
+from src.manifest import manifest_path
+from src.reader import refresh_if_changed
+from src.snapshot import snapshot_path
+from src.utils import remove_path_prefix, format_size, format_stats, count_lines, language_for
+
+SKIP_REASONS = {'binary': 'binário'}
+_SEPARATOR = "\n---\n\n# 📦 Conteúdo dos Arquivos\n\n".encode('utf-8')
+
+
+def section_header(display_path, lang):
+    """Início da seção de um arquivo no corpo do bundle; o conteúdo vem em seguida, fechado por `SECTION_END`"""
+    return f'## 📄 {display_path}\n\n```{lang}\n'.encode('utf-8')
+
+
+def duplicate_section(display_path, where):
+    """Seção de um arquivo duplicado: uma referência à primeira ocorrência (`where`) no lugar do conteúdo"""
+    return f"## 📄 {display_path}\n\n🔁 Conteúdo idêntico a {where}.\n\n".encode('utf-8')
+
+
+def index_note(record):
+    """Observação exibida ao lado do arquivo no índice (truncamento, codificação de origem)"""
+    notes = []
+    if record.get('truncated'):
+        notes.append('truncado')
+    if record.get('encoding') not in (None, 'utf-8'):
+        notes.append(f"codificação: {record['encoding']}")
+    return ', '.join(notes) or None
+
+
+def part_path(output_path, number):
+    """Path da parte `number` (1, 2, ...) de um bundle dividido: nome.part-001.md"""
+    stem, ext = os.path.splitext(output_path)
+    return PART_FILENAME_FORMAT.format(stem=stem, number=number, ext=ext)
+
+
+def delta_path(output_path):
+    """Path do bundle delta de `output_path`: nome.delta.md"""
+    stem, ext = os.path.splitext(output_path)
+    return stem + DELTA_SUFFIX + ext
+
+
+def is_bundle_output(file_path, output_path):
+    """Indica se `file_path` é o bundle `output_path`, uma das partes (comprimidas ou não), o relatório ou o índice.
+
+    Os temporários em escrita (`.tmp`) de partes e formatos extras, que já
+    existem enquanto o walk ainda está em andamento, o manifesto e o snapshot
+    em `.manifest/` e os arquivos do bundle delta (`nome.delta.md`...)
+    também contam.
+    """
+    file_path = os.path.normpath(file_path)
+    if file_path.endswith('.tmp'):
+        file_path = file_path[:-len('.tmp')]
+    file_path = strip_compression_suffix(file_path)
+    output_path = os.path.normpath(output_path)
+    if file_path == output_path:
+        return True
+    stem, ext = os.path.splitext(output_path)
+    if not stem.endswith(DELTA_SUFFIX) and is_bundle_output(file_path, delta_path(output_path)):
+        return True
+    if file_path in (stem + RUN_REPORT_SUFFIX, stem + BUNDLE_INDEX_SUFFIX):
+        return True
+    if file_path in (manifest_path(output_path), snapshot_path(output_path)):
+        return True
+    if file_path in [stem + suffix for suffix in OUTPUT_FORMAT_SUFFIXES.values()]:
+        return True
+    if not file_path.startswith(stem + '.part-') or not file_path.endswith(ext):
+        return False
+    return file_path[len(stem) + len('.part-'):len(file_path) - len(ext)].isdigit()
+
+
+def part_budget(max_part_bytes=0, max_part_tokens=0):
+    """Orçamento em bytes de cada parte (0 = sem divisão); tokens são estimados por BYTES_PER_TOKEN"""
+    budgets = [budget for budget in (max_part_bytes, max_part_tokens * BYTES_PER_TOKEN) if budget]
+    return min(budgets) if budgets else 0
+
+
+def record_stats(record):
+    """(bytes, linhas) do conteúdo que o registro coloca no bundle"""
+    if 'data' in record:
+        num_bytes = len(record['data'])
+    elif 'source' in record:
+        num_bytes = record['size']
+    else:
+        num_bytes = record.get('bytes')
+    lines = record.get('lines')
+    if lines is None and 'data' in record:
+        lines = count_lines(record['data'])
+    return num_bytes, lines
+
+
+class BundleWriter:
+    """Escreve um bundle Markdown em streaming.
+
+    Cada seção é gravada num spool assim que o arquivo é lido; o índice vai
+    para um segundo spool. Só no `close()` o arquivo de saída é aberto e
+    montado como cabeçalho + índice + corpo, sem manter o conteúdo em memória.
+
+    Com `max_part_bytes`/`max_part_tokens`, o bundle é dividido durante a
+    escrita em `nome.part-001.md`, `nome.part-002.md`... cada uma com o próprio
+    índice. Uma seção nunca é quebrada: só fica sozinha numa parte acima do
+    orçamento quando ela mesma já o excede.
+
+    Com `index_stats`, cada linha do índice e o cabeçalho trazem bytes, linhas
+    e tokens estimados, acumulados à medida que os registros chegam.
+
+    Com `compression` ('gzip', 'bz2' ou 'xz'), cada arquivo final passa por um
+    compressor em stream durante a montagem (`nome.md.gz`...), sem cópia
+    descomprimida em disco. Um bundle não dividido menor que
+    `compress_min_size` bytes é gravado sem compressão (`nome.md`). O
+    orçamento das partes e os offsets das seções continuam em bytes
+    descomprimidos.
+
+    Com `bundle_index`, o `close()` grava ao lado do bundle o índice das
+    seções (`nome.index.json`: path, parte, offset, tamanho, linguagem e
+    sha256 de cada uma) para leitura com seek direto.
+
+    Com `formats` (ex.: ('jsonl', 'pack')), cada registro também vai, na
+    mesma passada, para os arquivos desses formatos (`nome.jsonl`,
+    `nome.pack`), que não são divididos nem comprimidos.
+
+    Bundles delta registram com `add_deleted`/`add_renamed` os arquivos
+    removidos e renomeados desde o snapshot anterior, listados no cabeçalho
+    da última parte.
+    """
+
+    def __init__(self, output_path, title=None, index_title="Índice de Arquivos", path_prefix='', max_part_bytes=0,
+                 max_part_tokens=0, index_stats=True, compression=None, compression_level=None,
+                 compress_min_size=COMPRESS_MIN_SIZE, bundle_index=True, formats=()):
+        self.output_path = output_path
+        self.title = title
+        self.index_title = index_title
+        self.path_prefix = path_prefix
+        self.budget = part_budget(max_part_bytes, max_part_tokens)
+        self.index_stats = index_stats
+        self.compression = validate_compression(compression)
+        self.compression_level = compression_level
+        self.compress_min_size = compress_min_size
+        self.bundle_index = bundle_index
+        self.formats = validate_formats(formats)
+        self.file_count = 0
+        self.total_bytes = 0
+        self.total_lines = None
+        self.digest = None
+        self.sections = []
+        self.skipped = []
+        self.deleted = []
+        self.renamed = []
+        self.truncated_count = 0
+        self.duplicate_count = 0
+        self.bytes_saved = 0
+        self.outputs = []
+        self.extra_outputs = []
+        self._digest = hashlib.sha256()
+        self._pending = []
+        self._sinks = []
+        for output_format in self.formats:
+            self._sinks.append(SINKS[output_format](format_path(output_path, output_format)))
+        self._new_part()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def _new_part(self):
+        self._index = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        self._body = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        self._part_files = 0
+        self._part_sections = len(self.sections)
+        self._part_skipped = []
+        self._part_truncated = 0
+        self._part_duplicates = 0
+        self._part_saved = 0
+        self._part_bytes = 0
+        self._part_lines = None
+
+    @property
+    def current_part(self):
+        """Parte (0, 1, ...) em escrita, onde cai o próximo registro"""
+        return len(self._pending)
+
+    def display_path(self, file_path):
+        return remove_path_prefix(file_path, self.path_prefix)
+
+    def _make_room(self, size):
+        """Fecha a parte atual se `size` bytes a mais estourariam o orçamento"""
+        if not self.budget or not self._part_files:
+            return
+        header = self._header(len(self._pending) + 1)
+        if len(header) + self._index.tell() + len(_SEPARATOR) + self._body.tell() + size > self.budget:
+            self._finish_part(len(self._pending) + 1)
+            self._new_part()
+
+    def add_path(self, file_path, note=None, size=0, num_bytes=None, lines=None):
+        """Registra o arquivo no índice e devolve o path exibido.
+
+        `size` é o tamanho da seção que virá em seguida, usado para decidir a
+        troca de parte antes de a linha do índice ser escrita. Com `num_bytes`
+        (e `lines`, quando conhecidas) a linha do índice traz bytes, linhas e
+        tokens estimados, que também entram nos totais do cabeçalho.
+        """
+        display_file_path = self.display_path(file_path)
+        suffix = f" ({note})" if note else ''
+        if self.index_stats and num_bytes is not None:
+            suffix += f" — {format_stats(num_bytes, lines)}"
+        self._make_room(len(display_file_path) + len(suffix) + size + 16)
+        self.file_count += 1
+        self._part_files += 1
+        if num_bytes is not None:
+            self._count(num_bytes, lines)
+        self._index.write(f"{self._part_files}. `{display_file_path}`{suffix}\n".encode('utf-8'))
+        return display_file_path
+
+    def _count(self, num_bytes, lines):
+        self.total_bytes += num_bytes
+        self._part_bytes += num_bytes
+        if lines is not None:
+            self.total_lines = (self.total_lines or 0) + lines
+            self._part_lines = (self._part_lines or 0) + lines
+
+    def add_record(self, file_path, lang, record, note=None):
+        """Registra o arquivo no índice e grava a sua seção na mesma parte"""
+        if 'content' in record and 'data' not in record:
+            record = dict(record, data=record['content'].encode('utf-8'))
+        record = refresh_if_changed(record)
+        num_bytes, lines = record_stats(record)
+        self.add_path(file_path, note=note, size=self._section_size(file_path, lang, record), num_bytes=num_bytes,
+                      lines=lines)
+        size = record.get('size')
+        if 'source' in record:
+            # registros `source` trazem o tamanho a copiar, sem o BOM
+            size += record.get('offset', 0)
+        self._emit(file_path, record, lang=lang, encoding=record.get('encoding') or 'utf-8', size=size,
+                   truncated=record.get('truncated', 0))
+        return self.write_record(file_path, lang, dict(record, bytes=num_bytes, lines=lines))
+
+    def add_path_line(self, file_path, num_bytes=None):
+        """Formato só de paths: linha no índice e no corpo (`num_bytes` vem do stat, sem ler o arquivo)"""
+        self.add_path(file_path, size=len(self.display_path(file_path)) + 1, num_bytes=num_bytes)
+        self._emit(file_path, {}, size=num_bytes)
+        return self.write_path_line(file_path)
+
+    def add_skipped(self, file_path, reason, size):
+        """Registra um arquivo deixado de fora do bundle (ex.: binário) para o relatório do cabeçalho"""
+        skipped = {'path': file_path, 'reason': reason, 'size': size}
+        self._emit(file_path, {}, size=size, skipped=reason)
+        self.skipped.append(skipped)
+        self._part_skipped.append(skipped)
+        self.bytes_saved += size
+        self._part_saved += size
+
+    def add_duplicate(self, file_path, original, size, sha256=None):
+        """Registra um arquivo cujo conteúdo já foi emitido: no lugar da seção vai uma referência.
+
+        `original` é o (path exibido, arquivo, parte) da primeira ocorrência
+        devolvido por `ContentIndex.find`. Se ela está noutra parte deste
+        bundle, a referência traz o nome da parte, e cada parte continua
+        legível sozinha.
+        """
+        original_path, original_file, original_part = original
+        where = f"`{original_path}`"
+        part_where = where
+        if original_file is not None:
+            where = part_where = f"{where} em `{original_file}`"
+        elif original_part is not None:
+            part_file = compressed_path(part_path(self.output_path, original_part + 1), self.compression)
+            part_where += f" em `{os.path.basename(part_file)}`"
+        display_file_path = self.display_path(file_path)
+        self._emit(file_path, {}, size=size, duplicate_of=original_path)
+        self.add_path(file_path, note=f"idêntico a `{original_path}`",
+                      size=len(duplicate_section(display_file_path, part_where)))
+        if original_part is not None and original_part != self.current_part:
+            where = part_where
+        section = duplicate_section(display_file_path, where)
+        offset = self._body.tell()
+        self._body.write(section)
+        self.sections.append({
+            'path': file_path,
+            'offset': offset,
+            'length': len(section),
+            'sha256': sha256,
+            'duplicate_of': original_path,
+        })
+        self.duplicate_count += 1
+        self._part_duplicates += 1
+        self.bytes_saved += size
+        self._part_saved += size
+        return display_file_path
+
+    def add_deleted(self, file_path):
+        """Bundle delta: registra um arquivo removido desde o snapshot (só no cabeçalho, sem seção)"""
+        self._emit(file_path, {}, deleted=True)
+        self.deleted.append(file_path)
+
+    def add_renamed(self, old_path, file_path):
+        """Bundle delta: registra um arquivo movido de `old_path` sem mudar de conteúdo (só no cabeçalho)"""
+        self._emit(file_path, {}, renamed_from=self.display_path(old_path))
+        self.renamed.append((old_path, file_path))
+
+    def _emit(self, file_path, record, **meta):
+        """Repassa o registro aos formatos extras (conteúdo só quando o registro o traz)"""
+        if not self._sinks:
+            return
+        meta = dict({'path': file_path, 'display_path': self.display_path(file_path), 'lang': language_for(file_path),
+                     'encoding': None, 'size': None, 'truncated': 0}, **meta)
+        for sink in self._sinks:
+            sink.add(meta, record)
+
+    def write_path_line(self, file_path):
+        display_file_path = self.display_path(file_path)
+        self._body.write(f'{display_file_path}\n'.encode('utf-8'))
+        return display_file_path
+
+    def _section_size(self, file_path, lang, record):
+        if 'section' in record:
+            return len(record['section'])
+        overhead = len(self.display_path(file_path).encode('utf-8')) + len(lang) + 20
+        if 'source' in record:
+            return record['size'] + overhead
+        return len(record['data']) + overhead
+
+    def write_record(self, file_path, lang, record):
+        """Grava a seção de um registro do pipeline.
+
+        Registros com `section` (ex.: vindos do bundle anterior) são copiados
+        como estão, sem reler nem re-renderizar o arquivo de origem.
+        """
+        display_file_path = self.display_path(file_path)
+        offset = self._body.tell()
+        if 'section' in record:
+            sha256 = record['sha256']
+            self._body.write(record['section'])
+        else:
+            self._body.write(section_header(display_file_path, lang))
+            if 'source' in record:
+                sha256 = record['sha256']
+                content_start = self._body.tell()
+                copied = copy_file_into(record['source'], self._body, record['size'], record.get('offset', 0))
+                reloaded = refresh_if_changed(record, copied)
+                if reloaded is not record:
+                    # o arquivo mudou durante a cópia: a seção é refeita com o conteúdo relido em memória
+                    self._body.seek(content_start)
+                    self._body.truncate()
+                    sha256 = reloaded['sha256']
+                    self._body.write(reloaded['data'])
+            else:
+                data = record['data'] if 'data' in record else record['content'].encode('utf-8')
+                sha256 = record.get('sha256') or hashlib.sha256(data).hexdigest()
+                self._body.write(data)
+            self._body.write(SECTION_END)
+
+        truncated = record.get('truncated', 0)
+        if truncated:
+            self.truncated_count += 1
+            self.bytes_saved += truncated
+            self._part_truncated += 1
+            self._part_saved += truncated
+
+        self.sections.append({
+            'path': file_path,
+            'offset': offset,
+            'length': self._body.tell() - offset,
+            'language': lang,
+            'sha256': sha256,
+            'truncated': truncated,
+            'encoding': record.get('encoding'),
+            'bytes': record.get('bytes'),
+            'lines': record.get('lines'),
+        })
+        return display_file_path
+
+    def _header(self, part_number=None, last=False):
+        header = ''
+        if self.title is not None:
+            header += f"# 📁 {self.title}\n\n"
+        part = f" (parte {part_number})" if part_number else ''
+        header += f"# 📋 {self.index_title}{part}\n\n"
+        header += f"**Total de arquivos processados:** {self._part_files}\n\n"
+        if self.index_stats and self._part_files:
+            header += f"**Tamanho total:** {format_stats(self._part_bytes, self._part_lines)}\n\n"
+        if self._part_skipped or self._part_truncated or self._part_duplicates:
+            header += self._savings_report()
+        if last and (self.deleted or self.renamed):
+            header += self._changes_report()
+        return header.encode('utf-8')
+
+    def _changes_report(self):
+        report = ''
+        if self.deleted:
+            report += f"**Arquivos removidos:** {len(self.deleted)}\n\n"
+            report += ''.join(f"- `{self.display_path(path)}`\n" for path in self.deleted) + "\n"
+        if self.renamed:
+            report += f"**Arquivos renomeados (conteúdo inalterado):** {len(self.renamed)}\n\n"
+            for old_path, file_path in self.renamed:
+                report += f"- `{self.display_path(old_path)}` → `{self.display_path(file_path)}`\n"
+            report += "\n"
+        return report
+
+    def _savings_report(self):
+        report = ''
+        if self._part_skipped:
+            report += f"**Arquivos ignorados (binários):** {len(self._part_skipped)}\n\n"
+            for skipped in self._part_skipped:
+                reason = SKIP_REASONS.get(skipped['reason'], skipped['reason'])
+                report += f"- `{self.display_path(skipped['path'])}` ({reason}, {format_size(skipped['size'])})\n"
+            report += "\n"
+        if self._part_truncated:
+            report += f"**Arquivos truncados:** {self._part_truncated}\n\n"
+        if self._part_duplicates:
+            report += f"**Arquivos duplicados (referenciados):** {self._part_duplicates}\n\n"
+        report += f"**Bytes economizados:** {format_size(self._part_saved)}\n\n"
+        return report
+
+    def _finish_part(self, part_number=None, last=False):
+        """Monta a parte atual num arquivo temporário; o rename acontece só no `close()`"""
+        header = self._header(part_number, last)
+        compression = self.compression
+        size = len(header) + self._index.tell() + len(_SEPARATOR) + self._body.tell()
+        if part_number is None and size < self.compress_min_size:
+            compression = None
+        base_path = part_path(self.output_path, part_number) if part_number else self.output_path
+        final_path = compressed_path(base_path, compression)
+        tmp_path = final_path + '.tmp'
+        self._pending.append((tmp_path, final_path))
+        try:
+            with open(tmp_path, 'wb') as raw:
+                outfile = compressing_writer(raw, compression, self.compression_level) if compression else raw
+                with outfile:
+                    for source in (header, self._index, _SEPARATOR):
+                        for chunk in self._chunks(source, self._digest):
+                            outfile.write(chunk)
+                    body_start = outfile.tell()
+                    for chunk in self._chunks(self._body, self._digest):
+                        outfile.write(chunk)
+        finally:
+            self._index.close()
+            self._body.close()
+
+        part = len(self._pending) - 1
+        for section in self.sections[self._part_sections:]:
+            section['offset'] += body_start
+            section['part'] = part
+
+    def close(self):
+        """Monta o(s) arquivo(s) final(is) de forma atômica e calcula o digest do bundle"""
+        try:
+            self._finish_part(len(self._pending) + 1 if self._pending else None, last=True)
+            for tmp_path, final_path in self._pending:
+                os.replace(tmp_path, final_path)
+        except BaseException:
+            self.discard()
+            raise
+
+        self.outputs = [final_path for _, final_path in self._pending]
+        self._pending = []
+        self._remove_stale_outputs()
+        self.digest = self._digest.hexdigest()
+        if self.bundle_index:
+            write_bundle_index(self)
+        for sink in self._sinks:
+            sink.close()
+        self.extra_outputs = [sink.path for sink in self._sinks]
+        self._sinks = []
+        stale = [format_path(self.output_path, output_format) for output_format in OUTPUT_FORMAT_SUFFIXES
+                 if output_format not in self.formats]
+        if not self.bundle_index:
+            stale.append(index_path(self.output_path))
+        for path in stale:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _remove_stale_outputs(self):
+        """Apaga o bundle inteiro ou as partes de uma execução anterior que não fazem mais parte da saída.
+
+        Inclui as variantes com outra compressão (ex.: `nome.md` quando a
+        saída passou a ser `nome.md.gz`).
+        """
+        variants = [''] + list(COMPRESSION_SUFFIXES.values())
+        current = set(self.outputs)
+        candidates = [self.output_path]
+        number = 1
+        while any(os.path.exists(part_path(self.output_path, number) + suffix) for suffix in variants):
+            candidates.append(part_path(self.output_path, number))
+            number += 1
+        for base_path in candidates:
+            for suffix in variants:
+                path = base_path + suffix
+                if path in current:
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    @staticmethod
+    def _chunks(source, digest):
+        """Blocos de `source` (bytes ou spool), somados ao digest do bundle"""
+        if isinstance(source, bytes):
+            digest.update(source)
+            yield source
+            return
+        source.seek(0)
+        while True:
+            chunk = source.read(COPY_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            yield chunk
+
+    def iter_chunks(self):
+        """Gera o bundle montado em blocos de bytes, sem gravar arquivo (ex.: stream para um socket).
+
+        Alternativa ao `close()` para bundles sem divisão em partes: não há
+        compressão, índice de seções nem formatos extras. Ao final, as seções
+        têm os offsets definitivos e `digest` está calculado.
+        """
+        if self.budget:
+            raise ValueError("iter_chunks não gera bundles divididos em partes")
+        header = self._header(last=True)
+        body_start = len(header) + self._index.tell() + len(_SEPARATOR)
+        try:
+            for source in (header, self._index, _SEPARATOR, self._body):
+                yield from self._chunks(source, self._digest)
+        finally:
+            self._index.close()
+            self._body.close()
+            for sink in self._sinks:
+                sink.discard()
+            self._sinks = []
+        for section in self.sections:
+            section['offset'] += body_start
+            section['part'] = 0
+        self.digest = self._digest.hexdigest()
+
+    def discard(self):
+        self._index.close()
+        self._body.close()
+        for sink in self._sinks:
+            sink.discard()
+        self._sinks = []
+        for tmp_path, _ in self._pending:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._pending = []
+
+
+def _kernel_copy(in_fd, out_fd, count):
+    """Copia via copy_file_range/sendfile; devolve None se nenhum dos dois estiver disponível"""
+    for primitive in ('copy_file_range', 'sendfile'):
+        if not hasattr(os, primitive):
+            continue
+        copied = 0
+        try:
+            while copied < count:
+                if primitive == 'copy_file_range':
+                    sent = os.copy_file_range(in_fd, out_fd, count - copied)
+                else:
+                    sent = os.sendfile(out_fd, in_fd, None, count - copied)
+                if sent == 0:
+                    break
+                copied += sent
+        except OSError:
+            if copied:
+                raise
+            continue
+        return copied
+    return None
+
+
+def copy_file_into(source_path, target, count, offset=0):
+    """Copia `count` bytes de um arquivo (a partir de `offset`) para `target` sem passar o conteúdo pelo Python.
+
+    Usa cópia no kernel quando `target` tem descritor (um SpooledTemporaryFile vai
+    para disco nesse momento) e, na falta dela, um `mmap` do arquivo de origem.
+    """
+    with open(source_path, 'rb') as source:
+        if count <= 0:
+            return 0
+        source.seek(offset)
+        try:
+            target.flush()
+            out_fd = target.fileno()
+        except (OSError, io.UnsupportedOperation):
+            out_fd = None
+        if out_fd is not None:
+            copied = _kernel_copy(source.fileno(), out_fd, count)
+            if copied is not None:
+                target.seek(0, os.SEEK_END)
+                return copied
+        try:
+            with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)[offset:offset + count]
+                try:
+                    target.write(view)
+                    return len(view)
+                finally:
+                    view.release()
+        except (OSError, ValueError):
+            copied = 0
+            while copied < count:
+                chunk = source.read(min(COPY_CHUNK_SIZE, count - copied))
+                if not chunk:
+                    break
+                target.write(chunk)
+                copied += len(chunk)
+            return copied
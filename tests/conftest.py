@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.config as config  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def config_store(tmp_path, monkeypatch):
+    """Configurações salvas num diretório temporário, com prefixo de path vazio (paths absolutos nos bundles)"""
+    config_dir = tmp_path / 'configs'
+    config_dir.mkdir()
+    store = config.ConfigStore(str(config_dir), str(config_dir / '.cache' / 'index.json'),
+                               str(config_dir / 'path_prefix.json'))
+    store.set_path_prefix('')
+    monkeypatch.setattr(config, '_store', store)
+    return store
+
+
+def write_files(root, files):
+    """Cria os arquivos de `files` ({path relativo: conteúdo}) sob `root`"""
+    for relative, content in files.items():
+        path = os.path.join(root, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+
+def read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
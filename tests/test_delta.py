@@ -0,0 +1,68 @@
+import os
+
+from src.merge import merge_files_from_directory, process_root_files
+from src.writer import delta_path
+
+from conftest import read_bytes, write_files
+
+
+def _run(root, output_path, **kwargs):
+    merge_files_from_directory(root, output_path, delta=True, run_report=False, **kwargs)
+    return read_bytes(delta_path(output_path)).decode('utf-8')
+
+
+def test_delta_reports_added_modified_deleted_and_renamed(tmp_path):
+    root = str(tmp_path / 'proj')
+    write_files(root, {'a.py': 'a = 1\n', 'b.py': 'b = 1\n', 'c.py': 'c = 1\n', 'd.py': 'mover = 1\n'})
+    output_path = str(tmp_path / 'out' / 'proj.md')
+    os.makedirs(os.path.dirname(output_path))
+
+    first = _run(root, output_path)
+    assert first.count('(novo)') == 4
+
+    write_files(root, {'a.py': 'a = 2\n', 'n.py': 'n = 1\n'})
+    os.remove(os.path.join(root, 'b.py'))
+    os.rename(os.path.join(root, 'd.py'), os.path.join(root, 'e.py'))
+    delta = _run(root, output_path)
+
+    assert f"`{root}/a.py` (alterado)" in delta
+    assert f"`{root}/n.py` (novo)" in delta
+    assert f"**Arquivos removidos:** 1\n\n- `{root}/b.py`" in delta
+    assert f"`{root}/d.py` → `{root}/e.py`" in delta
+    assert 'a = 2' in delta
+    assert 'c.py' not in delta
+
+
+def test_delta_without_changes_is_empty(tmp_path):
+    root = str(tmp_path / 'proj')
+    write_files(root, {'a.py': 'a = 1\n'})
+    output_path = str(tmp_path / 'proj.md')
+    _run(root, output_path)
+
+    os.utime(os.path.join(root, 'a.py'), ns=(1, 1))
+    delta = _run(root, output_path)
+
+    assert '**Total de arquivos processados:** 0' in delta
+
+
+def test_delta_paths_only_lists_paths(tmp_path):
+    root = str(tmp_path / 'proj')
+    write_files(root, {'a.py': 'a = 1\n'})
+    output_path = str(tmp_path / 'proj.md')
+    _run(root, output_path, paths_only=True)
+
+    write_files(root, {'a.py': 'conteudo_novo = 1\n'})
+    delta = _run(root, output_path, paths_only=True)
+
+    assert f"{root}/a.py" in delta
+    assert 'conteudo_novo' not in delta
+
+
+def test_delta_root_with_only_init_writes_nothing(tmp_path):
+    root = str(tmp_path / 'proj')
+    write_files(root, {'__init__.py': '', 'pkg/mod.py': 'x = 1\n'})
+    kslist_dir = str(tmp_path / 'out')
+    os.makedirs(kslist_dir)
+
+    assert process_root_files(root, kslist_dir, delta=True, run_report=False) == 0
+    assert not os.path.exists(os.path.join(kslist_dir, 'root_proj.delta.md'))
@@ -0,0 +1,69 @@
+import os
+import shutil
+
+import pytest
+
+from src.merge import merge_files_from_directory, process_subfolders
+
+from conftest import read_bytes, write_files
+
+TREE = {
+    'app.py': 'print("app")\n',
+    'pkg/mod.py': 'def f():\n    return 1\n',
+    'pkg/data.txt': 'linha\n' * 50,
+    'pkg/sub/deep.py': 'X = 2\n',
+    'docs/readme.md': '# Docs\n',
+}
+
+
+def _change_tree(root):
+    write_files(root, {'pkg/mod.py': 'def f():\n    return 2\n', 'docs/novo.md': '# Novo\n'})
+    os.remove(os.path.join(root, 'pkg', 'sub', 'deep.py'))
+
+
+@pytest.mark.parametrize('io_mode', ['thread', 'async'])
+def test_incremental_directory_matches_full_build(tmp_path, io_mode):
+    root = str(tmp_path / 'proj')
+    write_files(root, TREE)
+    incremental = str(tmp_path / 'inc' / 'proj.md')
+    full = str(tmp_path / 'full' / 'proj.md')
+    os.makedirs(os.path.dirname(incremental))
+    os.makedirs(os.path.dirname(full))
+
+    merge_files_from_directory(root, incremental, incremental=True, run_report=False, io_mode=io_mode)
+    _change_tree(root)
+    merge_files_from_directory(root, incremental, incremental=True, run_report=False, io_mode=io_mode)
+    merge_files_from_directory(root, full, run_report=False, io_mode=io_mode)
+
+    assert read_bytes(incremental) == read_bytes(full)
+    assert b'return 2' in read_bytes(incremental)
+    assert b'deep.py' not in read_bytes(incremental)
+
+
+def test_incremental_unchanged_run_keeps_bundle(tmp_path):
+    root = str(tmp_path / 'proj')
+    write_files(root, TREE)
+    output_path = str(tmp_path / 'proj.md')
+    merge_files_from_directory(root, output_path, incremental=True, run_report=False)
+    first = read_bytes(output_path)
+
+    assert merge_files_from_directory(root, output_path, incremental=True, run_report=False) == 5
+    assert read_bytes(output_path) == first
+
+
+def test_incremental_subfolders_match_full_build(tmp_path):
+    root = str(tmp_path / 'proj')
+    kslist_dir = os.path.join(root, '_kslist')
+    write_files(root, TREE)
+
+    process_subfolders(root, incremental=True, run_report=False)
+    _change_tree(root)
+    process_subfolders(root, incremental=True, run_report=False)
+    names = sorted(name for name in os.listdir(kslist_dir) if name.endswith('.md'))
+    incremental = {name: read_bytes(os.path.join(kslist_dir, name)) for name in names}
+    shutil.rmtree(kslist_dir)
+    process_subfolders(root, run_report=False)
+
+    assert names == ['docs.md', 'pkg.md', 'root_proj.md']
+    for name in names:
+        assert incremental[name] == read_bytes(os.path.join(kslist_dir, name))
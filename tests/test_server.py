@@ -0,0 +1,103 @@
+import http.client
+import json
+import os
+import threading
+from urllib.parse import urlencode
+
+import pytest
+
+from src.config import save_config
+from src.menu import execute_from_config
+from src.server import create_server
+
+from conftest import read_bytes, write_files
+
+TREE = {
+    '.gitignore': '*.log\n',
+    'main.py': 'main = 1\n',
+    'pkg_a/a.py': 'a = 1\n',
+    'pkg_b/b.py': 'b = 1\n',
+    'pkg_b/x.log': 'log\n' * 100,
+    '.git/config': '[core]\n',
+}
+
+
+@pytest.fixture
+def server():
+    server = create_server('127.0.0.1', 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _get(server, path, headers=None):
+    connection = http.client.HTTPConnection('127.0.0.1', server.server_port, timeout=10)
+    try:
+        connection.request('GET', path, headers=headers or {})
+        response = connection.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        connection.close()
+
+
+@pytest.fixture
+def subfolders_config(tmp_path):
+    root = str(tmp_path / 'proj')
+    write_files(root, TREE)
+    config_data = {'modo': '2', 'dir_path': root, 'ignore_dirs': ['.git'], 'run_report': False}
+    save_config('m2', config_data)
+    execute_from_config(config_data)
+    return root
+
+
+@pytest.mark.parametrize('query, bundle', [('?subfolder=pkg_a', 'pkg_a.md'), ('?subfolder=pkg_b', 'pkg_b.md'),
+                                           ('', 'root_proj.md')])
+def test_subfolder_bundle_matches_cli(server, subfolders_config, query, bundle):
+    status, _, body = _get(server, '/bundle/m2' + query)
+
+    assert status == 200
+    assert body == read_bytes(os.path.join(subfolders_config, '_kslist', bundle))
+    assert b'x.log' not in body
+
+
+@pytest.mark.parametrize('subfolder', ['.git', '_kslist', 'inexistente'])
+def test_ignored_subfolders_are_not_served(server, subfolders_config, subfolder):
+    status, _, body = _get(server, '/bundle/m2?subfolder=' + subfolder)
+
+    assert status == 404
+    assert 'error' in json.loads(body)
+
+
+def test_subfolder_outside_root_is_rejected(server, subfolders_config):
+    status, _, _ = _get(server, '/bundle/m2?subfolder=..')
+
+    assert status == 400
+
+
+def test_root_bundle_with_only_init_is_not_found(server, tmp_path):
+    root = str(tmp_path / 'proj')
+    write_files(root, {'__init__.py': '', 'pkg/mod.py': 'x = 1\n'})
+    save_config('m2', {'modo': '2', 'dir_path': root})
+
+    status, _, _ = _get(server, '/bundle/m2')
+
+    assert status == 404
+
+
+def test_large_bundle_is_streamed_like_cached(server, tmp_path):
+    root = str(tmp_path / 'proj')
+    write_files(root, {'a.py': 'a = 1\n' * 200, 'b.py': 'b = 1\n'})
+    path = '/bundle?' + urlencode({'dir': root})
+
+    _, headers, cached = _get(server, path)
+    server.cache.max_bytes = 100
+    status, stream_headers, streamed = _get(server, path)
+
+    assert headers['X-KS-Cache'] == 'miss'
+    assert status == 200
+    assert stream_headers['X-KS-Cache'] == 'stream'
+    assert stream_headers['Transfer-Encoding'] == 'chunked'
+    assert streamed == cached
+    assert _get(server, path, {'If-None-Match': stream_headers['ETag']})[0] == 304
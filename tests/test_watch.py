@@ -0,0 +1,114 @@
+import errno
+import os
+import threading
+
+import pytest
+
+import src.watch as watch
+from src.watch import PollingWatcher, _ConfigWatch, watch_config
+
+from conftest import read_bytes, write_files
+
+
+@pytest.fixture
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(PollingWatcher.__init__, '__defaults__', (True, None, 0.05))
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = str(tmp_path / 'proj')
+    write_files(root, {'main.py': 'main = 1\n', 'a/mod.py': 'a = 1\n', 'b/mod.py': 'b = 1\n'})
+    return root
+
+
+def _start(monkeypatch, config_data, watcher=None, max_rounds=1):
+    """Roda watch_config numa thread; devolve (thread, evento de watcher pronto)"""
+    ready = threading.Event()
+    create_watcher = watch.create_watcher
+
+    def create(*args, **kwargs):
+        created = watcher if watcher is not None else create_watcher(*args, **kwargs)
+        ready.set()
+        return created
+
+    monkeypatch.setattr(watch, 'create_watcher', create)
+    thread = threading.Thread(target=watch_config, args=(config_data,),
+                              kwargs={'debounce': 0.1, 'force_polling': True, 'max_rounds': max_rounds}, daemon=True)
+    thread.start()
+    assert ready.wait(10)
+    return thread
+
+
+def test_watch_polling_rebuilds_only_affected_subfolder(monkeypatch, fast_polling, project):
+    config_data = {'modo': '2', 'dir_path': project, 'run_report': False}
+    kslist_dir = os.path.join(project, '_kslist')
+    thread = _start(monkeypatch, config_data)
+    untouched = os.stat(os.path.join(kslist_dir, 'b.md')).st_mtime_ns
+
+    write_files(project, {'a/mod.py': 'a = 2\n'})
+    thread.join(10)
+
+    assert not thread.is_alive()
+    assert b'a = 2' in read_bytes(os.path.join(kslist_dir, 'a.md'))
+    assert os.stat(os.path.join(kslist_dir, 'b.md')).st_mtime_ns == untouched
+
+
+def test_watch_stops_after_max_rounds(monkeypatch, fast_polling, project):
+    config_data = {'modo': '1', 'dir_path': project, 'run_report': False}
+    output_path = os.path.join(project, '_kslist', 'proj.md')
+    thread = _start(monkeypatch, config_data, max_rounds=2)
+
+    write_files(project, {'main.py': 'main = 2\n'})
+    while b'main = 2' not in read_bytes(output_path):
+        thread.join(0.05)
+        assert thread.is_alive()
+    write_files(project, {'b/novo.py': 'novo = 1\n'})
+    thread.join(10)
+
+    assert not thread.is_alive()
+    assert b'novo = 1' in read_bytes(output_path)
+
+
+class _FullWatcher:
+    """Watcher cujo primeiro `wait` falha como um inotify sem watches livres"""
+
+    def __init__(self):
+        self.closed = False
+
+    def wait(self, timeout=None):
+        raise OSError(errno.ENOSPC, "limite de watches do inotify atingido")
+
+    def close(self):
+        self.closed = True
+
+
+def test_watch_falls_back_to_polling_on_inotify_limit(monkeypatch, fast_polling, project, capsys):
+    config_data = {'modo': '2', 'dir_path': project, 'run_report': False}
+    watcher = _FullWatcher()
+    thread = _start(monkeypatch, config_data, watcher=watcher)
+    thread.join(10)
+
+    assert not thread.is_alive()
+    assert watcher.closed
+    output = capsys.readouterr().out
+    assert 'limite de watches do inotify atingido; usando polling.' in output
+    assert 'regenerando tudo' in output
+
+
+def test_root_only_watch_ignores_subfolders(project):
+    state = _ConfigWatch({'modo': '2', 'dir_path': project, 'max_depth': 1})
+
+    assert not state.recursive
+    assert state.is_relevant(os.path.join(project, 'main.py'))
+    assert not state.is_relevant(os.path.join(project, 'a', 'mod.py'))
+    assert not state.is_relevant(os.path.join(project, 'a'))
+    assert state.affected_bundles({os.path.join(project, 'main.py')}) == {''}
+
+
+def test_watch_ignores_output_dir(project):
+    state = _ConfigWatch({'modo': '2', 'dir_path': project})
+
+    assert state.ignore_dir(os.path.join(project, '_kslist'), '_kslist')
+    assert not state.is_relevant(os.path.join(project, '_kslist', 'a.md'))
+    assert state.affected_bundles({os.path.join(project, 'a', 'mod.py')}) == {'a'}